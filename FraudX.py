@@ -1,24 +1,822 @@
 import streamlit as st
 import sqlite3
+import sys
+import csv
+import functools
+import gzip
 import hashlib
+import html
+import importlib
+import io
+import os
+import queue
+import re
+import tempfile
+import threading
 import time
-import pandas as pd
-import plotly.express as px
-from streamlit_option_menu import option_menu
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from datetime import datetime
+import plotly.graph_objects as go
+import plotly.io as pio
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+
+class LazyModule:
+    # Stands in for a module and imports it on first attribute access, so
+    # the login page and launch pad never load pandas, numpy or
+    # plotly.express; the first analytics page pays for them instead.
+    def __init__(self, name, on_import=None):
+        self._name = name
+        self._on_import = on_import
+        self._module = None
+
+    def _load(self):
+        module = importlib.import_module(self._name)
+        if self._on_import is not None:
+            self._on_import(module)
+        self._module = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._module or self._load(), attr)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f"<LazyModule {self._name!r} ({state})>"
+
+
+def _configure_pandas(pandas):
+    # Copy-on-write: the result cache hands every session a shallow copy of
+    # the same cached frames, so a session writing to one must get its own
+    # copy of that column rather than change what every other session sees.
+    pandas.set_option('mode.copy_on_write', True)
+
+
+np = LazyModule('numpy')
+pd = LazyModule('pandas', on_import=_configure_pandas)
+px = LazyModule('plotly.express')
+
+DB_PATH = os.environ.get('FRAUDX_DB', 'fraudcases.db')
+DB_POOL_SIZE = int(os.environ.get('FRAUDX_DB_POOL_SIZE', '8'))
+DB_POOL_TIMEOUT = 30.0
+RESULT_CACHE_MB = int(os.environ.get('FRAUDX_CACHE_MB', '256'))
+PERF_ENABLED = os.environ.get('FRAUDX_PERF', '1') != '0'
+SLOW_QUERY_MS = float(os.environ.get('FRAUDX_SLOW_QUERY_MS', '250'))
+ADMIN_USERNAME = "Admin@fraudcases123*"
+
+# Columns supplied when creating a case, in CASE_INSERT_SQL parameter order
+CASE_INSERT_COLUMNS = ['case_name', 'case_type', 'description', 'location', 'amount_involved', 'currency',
+                       'date_detected', 'date_reported', 'date_resolved', 'parties_involved',
+                       'investigation_agency', 'court_reference', 'source_url', 'created_by', 'severity']
+CASE_INSERT_SQL = (f"INSERT INTO cases ({', '.join(CASE_INSERT_COLUMNS)}) "
+                   f"VALUES ({', '.join('?' * len(CASE_INSERT_COLUMNS))})")
+
+CURRENCIES = ["USD", "ZWL", "ZAR", "BWP", "NAD", "KES", "SZL"]
+SEVERITY_LEVELS = ["Low", "Medium", "High", "Critical"]
+
+# Columns in the cases_fts full-text index, with their bm25 weights: a hit in
+# the case name counts for more than one in the long description.
+SEARCH_COLUMN_WEIGHTS = {
+    'case_name': 10.0,
+    'description': 1.0,
+    'parties_involved': 5.0,
+    'investigation_agency': 3.0,
+    'court_reference': 8.0,
+}
+SEARCH_COLUMNS = list(SEARCH_COLUMN_WEIGHTS)
+
+# Keys per VALUES (...) lookup list; with up to three parameters per key this
+# stays under SQLite's bound-parameter limit
+LOOKUP_BATCH_KEYS = 10000
+
+MONTH_ORDER = ['January', 'February', 'March', 'April', 'May', 'June',
+               'July', 'August', 'September', 'October', 'November', 'December']
+
+# Report year of a case, as case_rollup buckets it. Filters on the year go
+# through _report_year_ranges() instead, so they stay on the date_reported
+# indexes.
+REPORT_YEAR_SQL = "CAST(strftime('%Y', date_reported) AS INTEGER)"
 
 # --------------------------
-# Database Setup
+# Database Connection Pool
 # --------------------------
-def init_db():
-    conn = sqlite3.connect('fraudcases.db')
-    c = conn.cursor()
-    
+class ConnectionPool:
+    # Bounded pool of SQLite connections shared by every Streamlit session in
+    # the process. A thread that already holds a connection gets the same one
+    # back on nested checkouts, so helpers can call each other inside a single
+    # transaction without exhausting the pool.
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA cache_size=-20000",
+        "PRAGMA mmap_size=268435456",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA busy_timeout=5000",
+    )
+
+    def __init__(self, path, max_size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT):
+        self.path = path
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._open = 0
+        self._checkouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _connect(self):
+        # check_same_thread is off because Streamlit runs each rerun on a fresh
+        # thread; the pool guarantees a connection is only used by one at a time.
+        conn = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False, cached_statements=256,
+                               factory=TracedConnection if PERF_ENABLED else sqlite3.Connection)
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _acquire(self):
+        start = time.perf_counter()
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = None
+            with self._lock:
+                if self._open < self.max_size:
+                    self._open += 1
+                    grow = True
+                else:
+                    grow = False
+            if grow:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._open -= 1
+                    raise
+            else:
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise TimeoutError(f"No database connection available after {self.timeout}s")
+        waited = time.perf_counter() - start
+        with self._lock:
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        return conn
+
+    def _release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        held = getattr(self._local, 'conn', None)
+        if held is not None:
+            self._local.depth += 1
+            try:
+                yield held
+            finally:
+                self._local.depth -= 1
+            return
+
+        conn = self._acquire()
+        self._local.conn = conn
+        self._local.depth = 1
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            self._local.depth = 0
+            self._release(conn)
+
+    def metrics(self):
+        with self._lock:
+            checkouts = self._checkouts
+            return {
+                'checkouts': checkouts,
+                'open_connections': self._open,
+                'idle_connections': self._idle.qsize(),
+                'in_use': self._open - self._idle.qsize(),
+                'max_size': self.max_size,
+                'wait_seconds_total': round(self._wait_total, 6),
+                'wait_seconds_avg': round(self._wait_total / checkouts, 6) if checkouts else 0.0,
+                'wait_seconds_max': round(self._wait_max, 6),
+            }
+
+    def close_all(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._open -= 1
+
+
+_BARE_RESOURCES = {}
+_BARE_RESOURCES_LOCK = threading.RLock()
+
+def process_resource(func):
+    # st.cache_resource keeps one instance per process across reruns and
+    # sessions, but it does not cache when the module is imported outside a
+    # Streamlit runtime (CLI tools, benchmarks), so fall back to a plain dict.
+    cached = st.cache_resource(show_spinner=False)(func)
+
+    @functools.wraps(func)
+    def wrapper(*args):
+        if st.runtime.exists():
+            return cached(*args)
+        key = (func.__name__, args)
+        with _BARE_RESOURCES_LOCK:
+            if key not in _BARE_RESOURCES:
+                _BARE_RESOURCES[key] = func(*args)
+            return _BARE_RESOURCES[key]
+
+    wrapper.clear = cached.clear
+    return wrapper
+
+
+@process_resource
+def get_pool(path):
+    return ConnectionPool(path)
+
+def db_connection():
+    return get_pool(DB_PATH).connection()
+
+def get_pool_metrics():
+    return get_pool(DB_PATH).metrics()
+
+# --------------------------
+# Performance Instrumentation
+# --------------------------
+# Samples kept per page, function, chart or statement; percentiles and
+# histograms are over this rolling window
+PERF_SAMPLES = int(os.environ.get('FRAUDX_PERF_SAMPLES', '500'))
+# Measuring a chart's payload means serialising the figure a second time,
+# which costs about as much as sending it, so it is only done on request
+PERF_CHART_BYTES = PERF_ENABLED and os.environ.get('FRAUDX_PERF_CHART_BYTES', '0') == '1'
+PERF_MAX_SERIES = 1000
+# Upper bounds of the latency histogram buckets; the last bucket is open
+PERF_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+PERF_SUMMARY_COLUMNS = ['name', 'calls', 'window', 'p50_ms', 'p95_ms', 'max_ms', 'total_ms',
+                        'sql_ms', 'render_ms', 'python_ms', 'rows', 'bytes']
+_SQL_PARAM_LIST_RE = re.compile(r'\? ?(?:, ?\? ?)+')
+_SQL_ROW_LIST_RE = re.compile(r'(\( ?(?:\?|\?, …) ?\)) ?(?:, ?\1 ?)+')
+
+@functools.lru_cache(maxsize=4096)
+def normalize_sql(sql):
+    # One key per statement shape: whitespace collapsed and generated
+    # placeholder lists (IN (?, ?, ...), VALUES (?), (?), ...) folded
+    sql = ' '.join(sql.split())
+    sql = _SQL_PARAM_LIST_RE.sub('?, …', sql)
+    return _SQL_ROW_LIST_RE.sub(r'\1, …', sql)
+
+
+class PerfRecorder:
+    # Process-wide rolling window of timings per (kind, name), shared by every
+    # session. Each sample is [ms, sql_ms, rows, render_ms, bytes]; a query's
+    # sample is updated in place as its rows are fetched.
+    def __init__(self, samples=PERF_SAMPLES, max_series=PERF_MAX_SERIES):
+        self.samples = samples
+        self.max_series = max_series
+        self.started = datetime.now()
+        self._series = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def span_stack(self):
+        # Open perf_spans on this thread. Kept here rather than in a module
+        # global because Streamlit re-executes the script on every rerun,
+        # while pooled connections go on calling the first run's functions.
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def current_span(self):
+        stack = getattr(self._local, 'stack', None)
+        return stack[-1] if stack else None
+
+    def record(self, kind, name, ms, sql_ms=0.0, rows=0, render_ms=0.0, size=0):
+        sample = [ms, sql_ms, rows, render_ms, size]
+        key = (kind, name)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {'calls': 0, 'window': deque(maxlen=self.samples)}
+                if len(self._series) > self.max_series:
+                    self._series.popitem(last=False)
+            else:
+                self._series.move_to_end(key)
+            series['calls'] += 1
+            series['window'].append(sample)
+        return sample
+
+    def _windows(self, kind):
+        with self._lock:
+            return [(name, series['calls'], np.array(series['window'], dtype=float))
+                    for (k, name), series in self._series.items() if k == kind and series['window']]
+
+    def summary(self, kind):
+        # One row per name, slowest (by p95 over the window) first
+        rows = []
+        for name, calls, window in self._windows(kind):
+            ms, sql_ms, fetched, render_ms, size = window.T
+            rows.append({
+                'name': name, 'calls': calls, 'window': len(ms),
+                'p50_ms': np.percentile(ms, 50), 'p95_ms': np.percentile(ms, 95), 'max_ms': ms.max(),
+                'total_ms': ms.sum(), 'sql_ms': sql_ms.mean(), 'render_ms': render_ms.mean(),
+                'python_ms': (ms - sql_ms - render_ms).clip(min=0).mean(),
+                'rows': fetched.mean(), 'bytes': size.mean(),
+            })
+        frame = pd.DataFrame(rows, columns=PERF_SUMMARY_COLUMNS)
+        return frame.sort_values('p95_ms', ascending=False, ignore_index=True)
+
+    def histogram(self, kind, name):
+        with self._lock:
+            series = self._series.get((kind, name))
+            ms = np.array([sample[0] for sample in series['window']] if series else [], dtype=float)
+        counts = np.bincount(np.searchsorted(PERF_BUCKETS_MS, ms), minlength=len(PERF_BUCKETS_MS) + 1)
+        labels = [f"≤{bound:,} ms" for bound in PERF_BUCKETS_MS] + [f">{PERF_BUCKETS_MS[-1]:,} ms"]
+        return pd.DataFrame({'bucket': labels, 'calls': counts})
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+            self.started = datetime.now()
+
+
+@process_resource
+def get_perf_recorder():
+    return PerfRecorder()
+
+
+class PerfSpan:
+    # Time inside one traced call, plus what nested work charged to it
+    __slots__ = ('kind', 'name', 'sql_ms', 'rows', 'render_ms', 'size')
+
+    def __init__(self, kind, name):
+        self.kind, self.name = kind, name
+        self.sql_ms, self.rows, self.render_ms, self.size = 0.0, 0, 0.0, 0
+
+
+@contextmanager
+def perf_span(kind, name):
+    # Records the wall time of the block under (kind, name). SQL time and rows
+    # (from TracedCursor) and chart render time and bytes (from plot_chart)
+    # are charged to the innermost span on this thread and roll up into its
+    # parents; the rest of a span's time is Python/pandas work.
+    span = PerfSpan(kind, name)
+    if not PERF_ENABLED:
+        yield span
+        return
+    recorder = get_perf_recorder()
+    stack = recorder.span_stack()
+    stack.append(span)
+    started = time.perf_counter()
+    try:
+        yield span
+    finally:
+        ms = (time.perf_counter() - started) * 1000
+        stack.pop()
+        if stack:
+            parent = stack[-1]
+            parent.sql_ms += span.sql_ms
+            parent.rows += span.rows
+            parent.render_ms += span.render_ms
+            parent.size += span.size
+        recorder.record(kind, span.name, ms, span.sql_ms, span.rows, span.render_ms, span.size)
+
+def traced(kind):
+    # Decorator form of perf_span, named after the function. Put it under
+    # @versioned_cache so the samples are real work, not cache hits.
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with perf_span(kind, func.__name__):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class TracedCursor(sqlite3.Cursor):
+    # Times every statement and fetch: each execute adds a 'query' sample
+    # under its normalised SQL, and fetches add their time and row count to
+    # it. Both are charged to the current perf_span too. A statement that
+    # took SLOW_QUERY_MS or more in all goes to the slow-query log once it
+    # has run to completion.
+    _sample = None
+    _sql = None
+    _params = None
+    _many = False
+
+    def __init__(self, connection):
+        super().__init__(connection)
+        self._recorder = get_perf_recorder()
+
+    def _executed(self, sql, params, started, many=False):
+        ms = (time.perf_counter() - started) * 1000
+        self._sql, self._params, self._many = sql, params, many
+        self._sample = self._recorder.record('query', normalize_sql(sql), ms, ms)
+        span = self._recorder.current_span()
+        if span is not None:
+            span.sql_ms += ms
+        if self.description is None:
+            # Returns no rows, so it is already done
+            self._finish()
+
+    def _finish(self):
+        # The statement has been fully fetched, or the cursor moved on to
+        # another one or was dropped
+        sample, params = self._sample, self._params
+        self._sample = self._params = None
+        if sample is None or sample[0] < SLOW_QUERY_MS:
+            return
+        rows = sample[2] if self.description is not None else max(self.rowcount, 0)
+        context = ' › '.join(span.name for span in self._recorder.span_stack())
+        get_slow_query_log(DB_PATH).submit(self._sql, param_shape(params, self._many), sample[0], rows, context)
+
+    def _fetched(self, started, rows):
+        ms = (time.perf_counter() - started) * 1000
+        sample = self._sample
+        if sample is not None:
+            sample[0] += ms
+            sample[1] += ms
+            sample[2] += rows
+        span = self._recorder.current_span()
+        if span is not None:
+            span.sql_ms += ms
+            span.rows += rows
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._executed(sql, parameters, started)
+
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._executed(sql, seq_of_parameters, started, many=True)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(started, row is not None)
+        if row is None:
+            self._finish()
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        started = time.perf_counter()
+        rows = super().fetchmany(size)
+        self._fetched(started, len(rows))
+        if len(rows) < size:
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(started, len(rows))
+        self._finish()
+        return rows
+
+    def __next__(self):
+        started = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(started, 0)
+            self._finish()
+            raise
+        self._fetched(started, 1)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+
+class TracedConnection(sqlite3.Connection):
+    # sqlite3.Connection.execute does not go through cursor(), so route it
+    # (and commits) through a TracedCursor explicitly.
+    cursor_factory = TracedCursor
+
+    def cursor(self, factory=None):
+        return super().cursor(factory or self.cursor_factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def commit(self):
+        started = time.perf_counter()
+        try:
+            super().commit()
+        finally:
+            ms = (time.perf_counter() - started) * 1000
+            recorder = get_perf_recorder()
+            recorder.record('query', 'COMMIT', ms, ms)
+            span = recorder.current_span()
+            if span is not None:
+                span.sql_ms += ms
+
+
+# --------------------------
+# Slow-query Log
+# --------------------------
+SLOW_QUERY_LOG_ROWS = 10000
+SLOW_QUERY_QUEUE = 1000
+# Longer statements (generated VALUES lists) are logged by shape only
+SLOW_QUERY_SQL_CHARS = 20000
+SLOW_QUERY_INDEX_COLUMNS = 4
+_EXPLAINABLE_SQL_RE = re.compile(r'\s*(SELECT|WITH|INSERT|REPLACE|UPDATE|DELETE)\b', re.IGNORECASE)
+_SQL_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_SQL_TABLE_RE = re.compile(r'\b(?:FROM|JOIN|UPDATE|INTO)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', re.IGNORECASE)
+_SQL_SET_RE = re.compile(r'\bSET\b.*?\bWHERE\b', re.IGNORECASE | re.DOTALL)
+_SQL_PREDICATE_RE = re.compile(r'(?:\b(\w+)\.)?\b(\w+)\s*(==|=|<=|>=|<(?![>=])|>|\bIN\b|\bIS\b|\bBETWEEN\b)',
+                               re.IGNORECASE)
+_SQL_EQUALITY_OPS = {'=', '==', 'IN', 'IS'}
+_SQL_ALIAS_STOPWORDS = {'WHERE', 'JOIN', 'ON', 'LEFT', 'INNER', 'CROSS', 'OUTER', 'NATURAL', 'USING', 'ORDER',
+                        'GROUP', 'LIMIT', 'SET', 'VALUES', 'SELECT', 'UNION', 'EXCEPT', 'INTERSECT', 'HAVING',
+                        'WINDOW', 'INDEXED', 'NOT', 'DEFAULT', 'AS'}
+# SCAN t, or a walk through a whole (non-covering) index of t
+_PLAN_SCAN_RE = re.compile(r'^SCAN (\w+)(?: USING INDEX \w+)?$')
+
+def param_shape(params, many=False):
+    # Types of the bound parameters with runs collapsed, e.g. (str, int×3);
+    # never the values themselves
+    if many:
+        if isinstance(params, (list, tuple)):
+            return f"{len(params):,} × {param_shape(params[0]) if params else '()'}"
+        return "many × (…)"
+    if params is None:
+        return "()"
+    if isinstance(params, dict):
+        return "{" + ", ".join(f":{name} {type(value).__name__}" for name, value in params.items()) + "}"
+    runs = []
+    for value in params:
+        kind = type(value).__name__
+        if runs and runs[-1][0] == kind:
+            runs[-1][1] += 1
+        else:
+            runs.append([kind, 1])
+    return "(" + ", ".join(kind if count == 1 else f"{kind}×{count}" for kind, count in runs) + ")"
+
+def _null_bindings(sql):
+    # The planner does not look at parameter values, so NULLs plan the same
+    return [None] * _SQL_STRING_RE.sub('', sql).count('?')
+
+def explain_query_plan(conn, sql):
+    # EXPLAIN QUERY PLAN as an indented tree, or None for statements that
+    # have no plan (PRAGMA, BEGIN, DDL)
+    if not _EXPLAINABLE_SQL_RE.match(sql):
+        return None
+    try:
+        rows = conn.execute("EXPLAIN QUERY PLAN " + sql, _null_bindings(sql)).fetchall()
+    except sqlite3.Error as e:
+        return f"(not explained: {e})"
+    depth, lines = {}, []
+    for node, parent, _, detail in rows:
+        depth[node] = depth.get(parent, -1) + 1
+        lines.append("  " * depth[node] + detail)
+    return "\n".join(lines)
+
+def _sql_aliases(sql):
+    aliases = {}
+    for table, alias in _SQL_TABLE_RE.findall(sql):
+        aliases[table.lower()] = table.lower()
+        if alias and alias.upper() not in _SQL_ALIAS_STOPWORDS:
+            aliases[alias.lower()] = table.lower()
+    return aliases
+
+def plan_full_scans(plan, sql, tables):
+    # Tables the plan reads end to end, with aliases resolved; subqueries,
+    # CTEs and virtual tables are not tables an index could be added to
+    scans = []
+    aliases = _sql_aliases(sql)
+    for line in (plan or '').splitlines():
+        match = _PLAN_SCAN_RE.match(line.strip())
+        if match:
+            table = aliases.get(match.group(1).lower(), match.group(1).lower())
+            if table in tables and table not in scans:
+                scans.append(table)
+    return scans
+
+def _real_tables(conn):
+    return {name.lower() for (name,) in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")}
+
+
+class SlowQueryLog:
+    # Statements that took SLOW_QUERY_MS or more, with their parameter shape,
+    # row count, EXPLAIN QUERY PLAN and the spans they ran under, kept in the
+    # slow_query_log table. A background thread writes them on a connection
+    # of its own (not pooled, not traced), so callers never wait on the log
+    # and it never joins or rolls back with their transaction.
+    def __init__(self, path, max_rows=SLOW_QUERY_LOG_ROWS):
+        self.path = path
+        self.max_rows = max_rows
+        self.submitted = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_error = None
+        self._queue = queue.Queue(maxsize=SLOW_QUERY_QUEUE)
+        self._thread = threading.Thread(target=self._run, name="slow-query-log", daemon=True)
+        self._thread.start()
+
+    def submit(self, sql, shape, duration_ms, rows, context):
+        try:
+            self._queue.put_nowait((datetime.now().strftime('%Y-%m-%d %H:%M:%S'), sql, shape, duration_ms,
+                                    rows, context))
+            self.submitted += 1
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        # Blocks until everything submitted so far is in the table
+        self._queue.join()
+
+    def _run(self):
+        conn = sqlite3.connect(self.path, timeout=DB_POOL_TIMEOUT)
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < 100:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(conn, batch)
+            except Exception as e:
+                self.errors += len(batch)
+                self.last_error = str(e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, conn, batch):
+        tables = _real_tables(conn)
+        entries = []
+        for logged_at, sql, shape, duration_ms, rows, context in batch:
+            plan = explain_query_plan(conn, sql)
+            scans = plan_full_scans(plan, sql, tables)
+            entries.append((logged_at, normalize_sql(sql), sql if len(sql) <= SLOW_QUERY_SQL_CHARS else None, shape,
+                            round(duration_ms, 3), rows, plan, ', '.join(scans) or None, context))
+        with conn:
+            conn.executemany('''INSERT INTO slow_query_log (logged_at, statement, sql, param_shape, duration_ms,
+                                                            rows, plan, full_scans, context)
+                                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''', entries)
+            conn.execute("DELETE FROM slow_query_log WHERE log_id <= (SELECT MAX(log_id) FROM slow_query_log) - ?",
+                         (self.max_rows,))
+
+    def stats(self):
+        return {
+            'threshold_ms': SLOW_QUERY_MS,
+            'submitted': self.submitted,
+            'queued': self._queue.qsize(),
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'last_error': self.last_error,
+        }
+
+
+@process_resource
+def get_slow_query_log(path):
+    return SlowQueryLog(path)
+
+def planner_schema_copy(conn):
+    # Empty in-memory copy of the schema with the same planner statistics
+    # (sqlite_stat1), for asking what plan SQLite would pick with an extra
+    # index without building it over the real rows.
+    copy = sqlite3.connect(':memory:')
+    for (sql,) in conn.execute('''SELECT sql FROM sqlite_master WHERE sql IS NOT NULL
+                                  AND type IN ('table', 'index', 'view') AND name NOT LIKE 'sqlite_%'
+                                  ORDER BY type = 'index', rowid'''):
+        try:
+            copy.execute(sql)
+        except sqlite3.OperationalError:
+            # Shadow tables of a virtual table, already created with it
+            pass
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone():
+        copy.execute("ANALYZE")
+        copy.execute("DELETE FROM sqlite_stat1")
+        copy.executemany("INSERT INTO sqlite_stat1 (tbl, idx, stat) VALUES (?, ?, ?)",
+                         conn.execute("SELECT tbl, idx, stat FROM sqlite_stat1").fetchall())
+        copy.execute("ANALYZE sqlite_schema")
+    return copy
+
+def candidate_index_columns(sql, table, columns):
+    # Columns of table compared in the statement's WHERE/ON clauses:
+    # equality columns first, then one range column
+    aliases = _sql_aliases(sql)
+    equality, ranged = [], []
+    for qualifier, column, op in _SQL_PREDICATE_RE.findall(_SQL_SET_RE.sub('WHERE', sql)):
+        column = column.lower()
+        if column not in columns or (qualifier and aliases.get(qualifier.lower()) != table):
+            continue
+        (equality if op.upper() in _SQL_EQUALITY_OPS else ranged).append(column)
+    equality = list(dict.fromkeys(equality))
+    ranged = [column for column in dict.fromkeys(ranged) if column not in equality]
+    return (equality + ranged[:1])[:SLOW_QUERY_INDEX_COLUMNS]
+
+def suggest_index(copy, sql, table):
+    # CREATE INDEX for table that takes it out of the statement's full
+    # scans on the schema copy, or None when no single index does
+    columns = {row[1].lower() for row in copy.execute(f"PRAGMA table_info({table})")}
+    candidate = candidate_index_columns(sql, table, columns)
+    if not candidate:
+        return None
+    name = f"idx_{table}_{'_'.join(candidate)}"
+    create = f"CREATE INDEX {name} ON {table}({', '.join(candidate)})"
+    tables = _real_tables(copy)
+    try:
+        copy.execute(create)
+    except sqlite3.OperationalError:
+        # An index by that name already exists and is not being used
+        return None
+    try:
+        fixed = table not in plan_full_scans(explain_query_plan(copy, sql), sql, tables)
+    finally:
+        copy.execute(f"DROP INDEX {name}")
+    return create if fixed else None
+
+@traced('data')
+def slow_query_report(limit=50):
+    # One row per statement shape in the slow-query log, slowest first, with
+    # its latest plan and, when it scans whole tables, the indexes that
+    # would turn those scans into searches
+    with db_connection() as conn:
+        report = pd.read_sql('''SELECT s.statement, s.calls, s.max_ms, s.mean_ms, s.mean_rows, s.last_seen,
+                                       l.param_shape, l.full_scans, l.context, l.plan, l.sql
+                                FROM (SELECT statement, COUNT(*) AS calls, MAX(duration_ms) AS max_ms,
+                                             AVG(duration_ms) AS mean_ms, AVG(rows) AS mean_rows,
+                                             MAX(logged_at) AS last_seen, MAX(log_id) AS last_id
+                                      FROM slow_query_log GROUP BY statement) s
+                                JOIN slow_query_log l ON l.log_id = s.last_id
+                                ORDER BY s.max_ms DESC LIMIT ?''', conn, params=(limit,))
+        suggestions = [None] * len(report)
+        scanning = report.index[report['full_scans'].notna() & report['sql'].notna()]
+        if len(scanning):
+            copy = planner_schema_copy(conn)
+            try:
+                for i in scanning:
+                    fixes = [suggest_index(copy, report.at[i, 'sql'], table)
+                             for table in report.at[i, 'full_scans'].split(', ')]
+                    suggestions[i] = '; '.join(fix for fix in fixes if fix) or None
+            finally:
+                copy.close()
+    report['suggested_index'] = suggestions
+    return report.drop(columns='sql')
+
+def get_slow_query_stats():
+    return get_slow_query_log(DB_PATH).stats()
+
+
+def plot_chart(fig):
+    # st.plotly_chart, charging the time to send the figure (and, with
+    # PERF_CHART_BYTES, its serialised size) to the enclosing perf_span
+    size = len(pio.to_json(fig, validate=False)) if PERF_CHART_BYTES else 0
+    started = time.perf_counter()
+    st.plotly_chart(fig, use_container_width=True)
+    span = get_perf_recorder().current_span()
+    if span is not None:
+        span.render_ms += (time.perf_counter() - started) * 1000
+        span.size += size
+
+def get_perf_summary(kind):
+    return get_perf_recorder().summary(kind)
+
+# --------------------------
+# Database Setup (schema migrations)
+# --------------------------
+def _migration_initial_schema(c):
     # Users table
     c.execute('''CREATE TABLE IF NOT EXISTS users
                  (username TEXT PRIMARY KEY, 
                   password TEXT,
                   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
-    
+
     # Cases table 
     c.execute('''CREATE TABLE IF NOT EXISTS cases
                  (case_id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -41,14 +839,14 @@ def init_db():
                   updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                   severity TEXT CHECK(severity IN ('Low', 'Medium', 'High', 'Critical')),
                   FOREIGN KEY(created_by) REFERENCES users(username))''')
-    
+
     # Case categories 
     c.execute('''CREATE TABLE IF NOT EXISTS case_categories
                  (category_id INTEGER PRIMARY KEY AUTOINCREMENT,
                   category_name TEXT UNIQUE,
                   description TEXT)''')
-    
-    
+
+def _migration_seed_reference_data(c):
     c.execute("SELECT COUNT(*) FROM case_categories")
     if c.fetchone()[0] == 0:
         categories = [
@@ -64,8 +862,8 @@ def init_db():
             ('Procurement Fraud', 'Bid rigging, kickbacks in purchasing')
         ]
         c.executemany("INSERT INTO case_categories (category_name, description) VALUES (?, ?)", categories)
-    
-    
+
+
     c.execute("SELECT COUNT(*) FROM cases")
     if c.fetchone()[0] == 0:
         # Zimbabwean fraud cases - recent and historical
@@ -74,204 +872,2230 @@ def init_db():
              "Harare", 2500000, "USD", "2023-05-15", "2023-06-01", None, 
              "XYZ Investment, ABC Bank", "ZRP Commercial Crimes", "HC 1234/23", 
              "https://www.zimbabwesituation.com/news/gold-scam", "admin", "High"),
-            
+        
             ("NSSA Pension Fraud", "Public Sector Fraud", "Misuse of pension funds", 
              "Nationwide", 50000000, "USD", "2018-01-01", "2019-03-15", "2022-08-20", 
              "NSSA officials", "ZACC", "HC 5678/19", 
              "https://www.newsday.co.zw/nssa-scandal", "admin", "Critical"),
-            
+        
             ("BancABC Internal Fraud", "Bank Fraud", "Employee siphoned client funds", 
              "Bulawayo", 120000, "USD", "2022-11-10", "2022-11-15", "2023-02-28", 
              "Bank employee", "Internal Audit", "MC 9012/22", 
              None, "admin", "Medium"),
-            
+        
             ("Harare City Housing Scam", "Public Sector Fraud", "Illegal sale of council land", 
              "Harare", 3500000, "USD", "2020-07-01", "2021-01-10", None, 
              "Council officials, Developers", "ZACC", "HC 3456/21", 
              "https://www.herald.co.zw/city-housing-scam", "admin", "High"),
-            
+        
             ("EcoCash Fraud Ring", "Cyber Fraud", "SIM swap fraud targeting mobile money", 
              "Nationwide", 850000, "USD", "2021-03-01", "2021-04-15", "2022-05-10", 
              "15 suspects", "ZRP Cyber Crime", "HC 7890/21", 
              "https://www.techzim.co.zw/ecocash-fraud", "admin", "High"),
-            
+        
             ("ZIMRA Tax Evasion", "Tax Evasion", "Undervaluation of imports", 
              "Beitbridge", 12000000, "USD", "2019-05-01", "2020-02-20", "2021-11-15", 
              "Clearing agents, Businesses", "ZIMRA", "HC 2345/20", 
              "https://www.chronicle.co.zw/zimra-case", "admin", "Critical"),
-            
+        
             ("Cottco Manager Fraud", "Corporate Fraud", "Ghost workers payroll fraud", 
              "Gweru", 450000, "USD", "2022-02-01", "2022-03-10", "2022-09-30", 
              "HR Manager", "Internal Audit", None, 
              None, "admin", "Medium"),
-            
+        
             ("COVID-19 Fund Misuse", "Public Sector Fraud", "Diverted pandemic relief funds", 
              "Nationwide", 3000000, "USD", "2020-06-01", "2021-01-05", None, 
              "Govt officials", "ZACC", "HC 6789/21", 
              "https://www.newzimbabwe.com/covid-funds", "admin", "High"),
-            
+        
             ("ZSE Insider Trading", "Corporate Fraud", "Illegal share trading", 
              "Harare", 1800000, "USD", "2021-07-01", "2021-09-15", "2022-04-20", 
              "Stockbrokers, Executives", "SECZ", "HC 1234/21", 
              "https://www.businessweekly.co.zw/zse-case", "admin", "High"),
-            
+        
             ("Fuel Coupon Scam", "Procurement Fraud", "Fraudulent fuel procurement", 
              "Nationwide", 7500000, "USD", "2017-01-01", "2018-03-01", "2020-12-15", 
              "Govt officials, Suppliers", "ZACC", "HC 4567/18", 
              "https://www.sundaymail.co.zw/fuel-scam", "admin", "Critical")
         ]
-        
-        
+    
+    
         additional_cases = [
             ("Chinhoyi Ponzi Scheme 2025", "Ponzi Scheme", "Investors promised high returns", 
              "Chinhoyi", 197300, "USD", "2025-04-15", "2025-04-20", None, 
              "2 suspects", "ZRP Commercial Crimes", "CRB 1234/25", 
              "https://lawportalzim.co.zw/cases/criminal/213/fraud-and-criminal-promise", "admin", "High"),
-            
+        
             ("Insurance Fraud Harare", "Insurance Fraud", "False claims submission", 
              "Harare", 1000000, "ZWL", "2025-04-10", "2025-04-12", None, 
              "Insurance client", "Insurance Council", "CRB 5678/25", 
              "https://lawportalzim.co.zw/cases/criminal/215/insurance-fraud", "admin", "Medium"),
-            
+        
             ("Fake ID Syndicate", "Identity Theft", "Production of fake IDs", 
              "Bulawayo", 0, "USD", "2025-04-05", "2025-04-08", None, 
              "5 suspects", "ZRP CID", "CRB 9012/25", 
              "https://lawportalzim.co.zw/cases/criminal/217/fake-ids", "admin", "High"),
-            
+        
             ("Forex Fraud Harare", "Bank Fraud", "Illegal forex trading", 
              "Harare", 322000, "USD", "2025-03-28", "2025-04-01", None, 
              "Forex dealer", "RBZ Financial Intelligence", "CRB 3456/25", 
              "https://lawportalzim.co.zw/cases/criminal/219/forex-fraud", "admin", "Critical"),
-            
+        
             ("Health Insurance Fraud", "Insurance Fraud", "False medical claims", 
              "Nationwide", 0, "USD", "2025-03-20", "2025-03-25", None, 
              "Medical providers", "Insurance Council", None, 
              "https://lawportalzim.co.zw/cases/criminal/221/health-fraud", "admin", "Medium"),
-            
+        
             # Historical cases from Zimbabwe
             ("Zimbabwe Housing Scam 2000s", "Public Sector Fraud", "Illegal land allocations", 
              "Harare", 50000000, "USD", "2005-01-01", "2007-03-15", "2010-12-20", 
              "Government officials", "ZACC", "HC 1234/07", 
              "https://www.herald.co.zw/housing-scandal", "admin", "Critical"),
-            
+        
             ("Zimbabwe Bank Closure 2004", "Bank Fraud", "Bank collapse due to fraud", 
              "Nationwide", 300000000, "USD", "2004-01-01", "2004-03-01", "2006-05-15", 
              "Bank executives", "RBZ", "HC 5678/04", 
              "https://www.financialgazette.co.zw/bank-collapse", "admin", "Critical"),
-            
+        
             ("Zimbabwe Diamond Fraud", "Public Sector Fraud", "Diamond revenue leakages", 
              "Marange", 2000000000, "USD", "2008-01-01", "2012-03-01", None, 
              "Mining companies, Officials", "ZACC", "HC 9012/12", 
              "https://www.zimbabwesituation.com/diamond-report", "admin", "Critical"),
-            
+        
             ("Zimbabwe Command Agric", "Public Sector Fraud", "Misuse of farming inputs", 
              "Nationwide", 3000000000, "USD", "2016-01-01", "2019-01-01", None, 
              "Govt officials, Suppliers", "ZACC", "HC 3456/19", 
              "https://www.newsday.co.zw/command-agric", "admin", "Critical"),
-            
+        
             ("Zimbabwe Fuel Scam 2019", "Procurement Fraud", "Fraudulent fuel imports", 
              "Nationwide", 1500000000, "USD", "2019-01-01", "2019-07-01", None, 
              "Fuel companies, Officials", "ZACC", "HC 7890/19", 
              "https://www.sundaymail.co.zw/fuel-imports", "admin", "Critical"),
-            
+        
             # Regional cases
             ("VBS Bank Heist SA", "Bank Fraud", "Looting of municipal funds", 
              "South Africa", 2000000000, "ZAR", "2016-01-01", "2018-03-01", "2021-06-15", 
              "Bank executives", "Hawks", "GPV 1234/18", 
              "https://www.dailymaverick.co.za/vbs-bank", "admin", "Critical"),
-            
+        
             ("Steinhoff Scandal", "Corporate Fraud", "Accounting irregularities", 
              "South Africa", 10000000000, "ZAR", "2015-01-01", "2017-12-01", None, 
              "Company executives", "JSE", "GPV 5678/17", 
              "https://www.businesslive.co.za/steinhoff", "admin", "Critical"),
-            
+        
             ("Tongaat Hulett Fraud", "Corporate Fraud", "Revenue overstatement", 
              "South Africa", 6500000000, "ZAR", "2014-01-01", "2019-05-01", "2022-03-15", 
              "Company executives", "JSE", "GPV 9012/19", 
              "https://www.moneyweb.co.za/tongaat", "admin", "Critical"),
-            
+        
             ("Eswatini Health Fraud", "Public Sector Fraud", "COVID funds misappropriation", 
              "Eswatini", 250000000, "SZL", "2020-06-01", "2021-03-01", None, 
              "Health officials", "Anti-Corruption", "HC 2345/21", 
              "https://www.times.co.sz/health-scandal", "admin", "High"),
-            
+        
             ("Zambia Fire Tender Scam", "Procurement Fraud", "Overpriced fire trucks", 
              "Zambia", 42000000, "USD", "2017-01-01", "2018-01-01", "2020-06-15", 
              "Govt officials", "ACC", "HC 6789/18", 
              "https://www.lusakatimes.com/fire-tenders", "admin", "High"),
-            
+        
             ("Malawi Cashgate", "Public Sector Fraud", "Looting of govt funds", 
              "Malawi", 32000000, "USD", "2013-01-01", "2013-09-01", "2016-12-15", 
              "Civil servants", "ACB", "HC 1234/13", 
              "https://www.nyasatimes.com/cashgate", "admin", "Critical"),
-            
+        
             ("Namibia Fishrot", "Public Sector Fraud", "Fishing quotas corruption", 
              "Namibia", 150000000, "NAD", "2014-01-01", "2019-11-01", None, 
              "Ministers, Businessmen", "ACU", "HC 5678/19", 
              "https://www.namibian.com.na/fishrot", "admin", "Critical"),
-            
+        
             ("Botswana Housing Scam", "Public Sector Fraud", "Irregular land allocation", 
              "Botswana", 50000000, "BWP", "2018-01-01", "2019-03-01", "2021-06-15", 
              "Council officials", "DCEC", "HC 9012/19", 
              "https://www.mmegi.bw/housing-scam", "admin", "High"),
-            
+        
             ("Mozambique Tuna Bonds", "Public Sector Fraud", "Hidden govt debt", 
              "Mozambique", 2000000000, "USD", "2013-01-01", "2016-04-01", None, 
              "Govt officials, Bankers", "Public Prosecutor", "HC 3456/16", 
              "https://www.zitamar.com/tuna-bonds", "admin", "Critical"),
-            
+        
             ("Kenya NYS Scandal", "Public Sector Fraud", "Theft of youth funds", 
              "Kenya", 800000000, "KES", "2015-01-01", "2018-05-01", None, 
              "Govt officials", "EACC", "HC 7890/18", 
              "https://www.nation.co.ke/nys", "admin", "Critical")
         ]
-        
-        # Insert all cases
-        for case in fraud_cases + additional_cases:
-            c.execute('''INSERT INTO cases 
-                        (case_name, case_type, description, location, amount_involved, currency, 
-                         date_detected, date_reported, date_resolved, parties_involved, 
-                         investigation_agency, court_reference, source_url, created_by, severity)
-                         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''', case)
     
-    conn.commit()
-    conn.close()
+        # Insert all cases
+        c.executemany(CASE_INSERT_SQL, fraud_cases + additional_cases)
+
+def _migration_case_indexes(c):
+    # Shaped after the real queries: newest-first listing, report filters on
+    # case_type/severity/year, DISTINCT case_type and per-location counts.
+    c.execute("CREATE INDEX IF NOT EXISTS idx_cases_date_reported ON cases(date_reported)")
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_cases_type_severity_date
+                 ON cases(case_type, severity, date_reported)''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_cases_location ON cases(location)")
+    c.execute(f"CREATE INDEX IF NOT EXISTS idx_cases_report_year ON cases({REPORT_YEAR_SQL})")
+    c.execute("ANALYZE cases")
+
+def _migration_case_rollup(c):
+    c.execute('''CREATE TABLE IF NOT EXISTS case_rollup
+                 (year INTEGER NOT NULL,
+                  month INTEGER NOT NULL,
+                  case_type TEXT NOT NULL,
+                  severity TEXT NOT NULL,
+                  location TEXT NOT NULL,
+                  currency TEXT NOT NULL,
+                  case_count INTEGER NOT NULL,
+                  amount_total REAL NOT NULL,
+                  amount_count INTEGER NOT NULL,
+                  positive_amount_total REAL NOT NULL,
+                  positive_amount_count INTEGER NOT NULL,
+                  min_date_reported DATE,
+                  max_date_reported DATE,
+                  PRIMARY KEY (year, month, case_type, severity, location, currency))''')
+    c.execute("DELETE FROM case_rollup")
+    # The cube as it was then: migration 11 adds the USD measures and refills it
+    c.execute(f"INSERT INTO case_rollup {_rollup_source_sql('1', usd=False)}")
+
+def _migration_data_version(c):
+    c.execute('''CREATE TABLE IF NOT EXISTS data_version
+                 (id INTEGER PRIMARY KEY CHECK (id = 1),
+                  version INTEGER NOT NULL)''')
+    c.execute("INSERT OR IGNORE INTO data_version (id, version) VALUES (1, 0)")
+
+def _migration_case_change_tracking(c):
+    # Keep updated_at honest on edits so readers can refresh incrementally
+    # from an updated_at watermark.
+    c.execute('''CREATE TRIGGER IF NOT EXISTS cases_touch_updated_at
+                 AFTER UPDATE ON cases FOR EACH ROW
+                 WHEN NEW.updated_at IS OLD.updated_at
+                 BEGIN
+                     UPDATE cases SET updated_at = CURRENT_TIMESTAMP WHERE case_id = NEW.case_id;
+                 END''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_cases_updated_at ON cases(updated_at)")
+
+def _migration_case_search(c):
+    # External-content FTS5 index over the free-text case columns; the text
+    # itself stays in cases and the triggers below keep the index in step.
+    columns = ', '.join(SEARCH_COLUMNS)
+    new_values = ', '.join(f'new.{col}' for col in SEARCH_COLUMNS)
+    old_values = ', '.join(f'old.{col}' for col in SEARCH_COLUMNS)
+    c.execute(f'''CREATE VIRTUAL TABLE IF NOT EXISTS cases_fts USING fts5(
+                     {columns},
+                     content='cases', content_rowid='case_id',
+                     tokenize='unicode61 remove_diacritics 2', prefix='2 3')''')
+    c.execute(f'''CREATE TRIGGER IF NOT EXISTS cases_fts_insert AFTER INSERT ON cases BEGIN
+                     INSERT INTO cases_fts (rowid, {columns}) VALUES (new.case_id, {new_values});
+                 END''')
+    c.execute(f'''CREATE TRIGGER IF NOT EXISTS cases_fts_delete AFTER DELETE ON cases BEGIN
+                     INSERT INTO cases_fts (cases_fts, rowid, {columns}) VALUES ('delete', old.case_id, {old_values});
+                 END''')
+    # Only edits to indexed columns re-index the row; the updated_at touch
+    # trigger does not.
+    c.execute(f'''CREATE TRIGGER IF NOT EXISTS cases_fts_update AFTER UPDATE OF {columns} ON cases BEGIN
+                     INSERT INTO cases_fts (cases_fts, rowid, {columns}) VALUES ('delete', old.case_id, {old_values});
+                     INSERT INTO cases_fts (rowid, {columns}) VALUES (new.case_id, {new_values});
+                 END''')
+    c.execute("INSERT INTO cases_fts (cases_fts) VALUES ('rebuild')")
+    weights = ', '.join(str(SEARCH_COLUMN_WEIGHTS[col]) for col in SEARCH_COLUMNS)
+    c.execute(f"INSERT INTO cases_fts (cases_fts, rank) VALUES ('rank', 'bm25({weights})')")
+
+def _migration_case_anomaly(c):
+    c.execute('''CREATE TABLE IF NOT EXISTS case_anomaly
+                 (case_id INTEGER PRIMARY KEY,
+                  case_type TEXT NOT NULL,
+                  location TEXT NOT NULL,
+                  year INTEGER NOT NULL,
+                  peer_size INTEGER NOT NULL,
+                  amount_z REAL,
+                  lag_days INTEGER,
+                  lag_z REAL,
+                  severity_gap REAL,
+                  score REAL NOT NULL,
+                  reasons TEXT,
+                  scored_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_case_anomaly_score ON case_anomaly(score DESC)")
+    # Peer-group lookup for incremental rescoring; same key expressions as
+    # the rollup so NULLs land in the '' / 0 buckets.
+    peer = ', '.join(ROLLUP_KEY_SQL[dim] for dim in ANOMALY_PEER_DIMENSIONS)
+    c.execute(f"CREATE INDEX IF NOT EXISTS idx_cases_anomaly_peer ON cases({peer})")
+    # Scored on the amounts as entered; migration 11 rescores them in USD
+    _write_anomaly_scores(c.connection, score_anomalies(_load_anomaly_frame(c.connection, amount_sql='amount_involved')))
+
+def _migration_case_minhash(c):
+    c.execute('''CREATE TABLE IF NOT EXISTS case_minhash
+                 (case_id INTEGER PRIMARY KEY,
+                  signature BLOB NOT NULL)''')
+    # One row per (LSH band bucket, case); the band number is folded into the
+    # bucket hash so a single key column serves every band.
+    c.execute('''CREATE TABLE IF NOT EXISTS case_lsh
+                 (bucket INTEGER NOT NULL,
+                  case_id INTEGER NOT NULL,
+                  PRIMARY KEY (bucket, case_id)) WITHOUT ROWID''')
+    c.execute('''CREATE TABLE IF NOT EXISTS case_duplicates
+                 (case_id INTEGER NOT NULL,
+                  duplicate_of INTEGER NOT NULL,
+                  similarity REAL NOT NULL,
+                  detected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                  PRIMARY KEY (case_id, duplicate_of))''')
+    last = c.execute("SELECT MAX(case_id) FROM cases").fetchone()[0]
+    for first in range(1, (last or 0) + 1, DUPLICATE_BATCH_ROWS):
+        update_duplicate_index(c.connection, first, min(first + DUPLICATE_BATCH_ROWS - 1, last))
+
+def _migration_case_entities(c):
+    c.execute('''CREATE TABLE IF NOT EXISTS entities
+                 (entity_id INTEGER PRIMARY KEY,
+                  kind TEXT NOT NULL,
+                  name_key TEXT NOT NULL,
+                  name TEXT NOT NULL,
+                  case_count INTEGER NOT NULL DEFAULT 0,
+                  UNIQUE (kind, name_key))''')
+    c.execute('''CREATE TABLE IF NOT EXISTS case_entities
+                 (case_id INTEGER NOT NULL,
+                  entity_id INTEGER NOT NULL,
+                  PRIMARY KEY (case_id, entity_id)) WITHOUT ROWID''')
+    # Entity -> cases direction of the adjacency
+    c.execute("CREATE INDEX IF NOT EXISTS idx_case_entities_entity ON case_entities(entity_id, case_id)")
+    last = c.execute("SELECT MAX(case_id) FROM cases").fetchone()[0]
+    for first in range(1, (last or 0) + 1, ENTITY_BATCH_ROWS):
+        update_case_entities(c.connection, first, min(first + ENTITY_BATCH_ROWS - 1, last))
+
+def _migration_fx_rates(c):
+    c.execute('''CREATE TABLE IF NOT EXISTS fx_rates
+                 (currency TEXT NOT NULL,
+                  rate_date DATE NOT NULL,
+                  units_per_usd REAL NOT NULL CHECK (units_per_usd > 0),
+                  source TEXT,
+                  PRIMARY KEY (currency, rate_date)) WITHOUT ROWID''')
+    c.executemany("INSERT OR IGNORE INTO fx_rates (currency, rate_date, units_per_usd, source) VALUES (?, ?, ?, 'seed')",
+                  FX_SEED_RATES)
+    c.execute("ALTER TABLE cases ADD COLUMN amount_usd REAL")
+    for column, kind in (('amount_usd_total', 'REAL'), ('amount_usd_count', 'INTEGER'),
+                         ('positive_amount_usd_total', 'REAL'), ('positive_amount_usd_count', 'INTEGER')):
+        c.execute(f"ALTER TABLE case_rollup ADD COLUMN {column} {kind} NOT NULL DEFAULT 0")
+    # Everything that sums or compares amounts is rebuilt from amount_usd
+    convert_case_amounts(c.connection)
+    c.execute("DELETE FROM case_rollup")
+    c.execute(f"INSERT INTO case_rollup {_rollup_source_sql('1')}")
+    c.execute("DELETE FROM case_anomaly")
+    _write_anomaly_scores(c.connection, score_anomalies(_load_anomaly_frame(c.connection)))
+
+def _migration_gazetteer(c):
+    c.execute('''CREATE TABLE IF NOT EXISTS locations
+                 (location_id INTEGER PRIMARY KEY,
+                  name TEXT NOT NULL UNIQUE,
+                  country TEXT,
+                  kind TEXT,
+                  lat REAL NOT NULL,
+                  lon REAL NOT NULL)''')
+    # Normalised spelling -> location; every location is also its own alias
+    c.execute('''CREATE TABLE IF NOT EXISTS location_aliases
+                 (alias_key TEXT PRIMARY KEY,
+                  location_id INTEGER NOT NULL REFERENCES locations(location_id)) WITHOUT ROWID''')
+    _write_gazetteer(c.connection, pd.DataFrame(GAZETTEER_SEED, columns=GAZETTEER_COLUMNS))
+    for column, kind in (('location_id', 'INTEGER'), ('lat', 'REAL'), ('lon', 'REAL')):
+        c.execute(f"ALTER TABLE cases ADD COLUMN {column} {kind}")
+    geocode_cases(c.connection)
+
+def _migration_case_geo_index(c):
+    # Covering index for the map: coordinates are read without touching the
+    # (wide) case rows
+    c.execute("CREATE INDEX IF NOT EXISTS idx_cases_geo ON cases(lat, lon, case_type, amount_usd)")
+
+def _migration_slow_query_log(c):
+    c.execute('''CREATE TABLE IF NOT EXISTS slow_query_log
+                 (log_id INTEGER PRIMARY KEY,
+                  logged_at TIMESTAMP NOT NULL,
+                  statement TEXT NOT NULL,
+                  sql TEXT,
+                  param_shape TEXT,
+                  duration_ms REAL NOT NULL,
+                  rows INTEGER NOT NULL,
+                  plan TEXT,
+                  full_scans TEXT,
+                  context TEXT)''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_slow_query_log_statement ON slow_query_log(statement)")
+
+def _migration_case_tombstones(c):
+    # Deleted case ids, in deletion order, so the case frame can drop them
+    # by reading past a tombstone_id watermark instead of recounting cases
+    c.execute('''CREATE TABLE IF NOT EXISTS case_tombstones
+                 (tombstone_id INTEGER PRIMARY KEY,
+                  case_id INTEGER NOT NULL,
+                  deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS cases_tombstone AFTER DELETE ON cases BEGIN
+                     INSERT INTO case_tombstones (case_id) VALUES (old.case_id);
+                 END''')
+
+def _migration_drop_case_tombstones(c):
+    # Nothing refreshes a case frame incrementally any more, so the
+    # tombstones and the updated_at index only cost writes. The updated_at
+    # touch trigger stays: it keeps the column right for anyone reading it.
+    c.execute("DROP TRIGGER IF EXISTS cases_tombstone")
+    c.execute("DROP TABLE IF EXISTS case_tombstones")
+    c.execute("DROP INDEX IF EXISTS idx_cases_updated_at")
+
+def _migration_drop_report_year_index(c):
+    # Report filters now seek date_reported ranges and the year options come
+    # from case_rollup, so nothing reads the expression index any more
+    c.execute("DROP INDEX IF EXISTS idx_cases_report_year")
+
+# Numbered, append-only list of schema migrations. Each one runs exactly once
+# per database, inside its own transaction, and is recorded in schema_version.
+MIGRATIONS = [
+    (1, "initial schema", _migration_initial_schema),
+    (2, "seed case categories and reference cases", _migration_seed_reference_data),
+    (3, "indexes for case listing, report filters and year grouping", _migration_case_indexes),
+    (4, "case_rollup cube for dashboard and analysis pages", _migration_case_rollup),
+    (5, "data_version counter for result caching", _migration_data_version),
+    (6, "updated_at trigger and index for incremental refresh", _migration_case_change_tracking),
+    (7, "cases_fts full-text index and sync triggers", _migration_case_search),
+    (8, "case_anomaly scores and peer-group index", _migration_case_anomaly),
+    (9, "MinHash signatures, LSH buckets and duplicate flags", _migration_case_minhash),
+    (10, "entities and case_entities link tables", _migration_case_entities),
+    (11, "fx_rates table and USD-normalised case amounts", _migration_fx_rates),
+    (12, "location gazetteer and cached case coordinates", _migration_gazetteer),
+    (13, "covering index for case map binning", _migration_case_geo_index),
+    (14, "slow_query_log with query plans", _migration_slow_query_log),
+    (15, "case_tombstones and delete trigger for incremental refresh", _migration_case_tombstones),
+    (16, "drop the incremental refresh's tombstones and updated_at index", _migration_drop_case_tombstones),
+    (17, "drop the report year expression index", _migration_drop_report_year_index),
+]
+
+def get_schema_version(conn):
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+def run_migrations(conn):
+    conn.execute('''CREATE TABLE IF NOT EXISTS schema_version
+                    (version INTEGER PRIMARY KEY,
+                     name TEXT,
+                     applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    applied = []
+    for version, name, migrate in MIGRATIONS:
+        if version <= get_schema_version(conn):
+            continue
+        # BEGIN IMMEDIATE serializes concurrent starters; re-check once we hold
+        # the write lock in case another process applied it meanwhile.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if version <= get_schema_version(conn):
+                conn.rollback()
+                continue
+            migrate(conn.cursor())
+            conn.execute("INSERT INTO schema_version (version, name) VALUES (?, ?)", (version, name))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(version)
+    return applied
+
+@process_resource
+def init_db(path=DB_PATH):
+    # Cached for the lifetime of the server process, so reruns pay no DDL cost.
+    with get_pool(path).connection() as conn:
+        return run_migrations(conn)
+
+
+# --------------------------
+# Result Cache
+# --------------------------
+def get_data_version():
+    with db_connection() as conn:
+        return conn.execute("SELECT version FROM data_version WHERE id = 1").fetchone()[0]
+
+def bump_data_version(conn):
+    # Call inside the writing transaction; every cached result keyed on the
+    # old version becomes unreachable once it commits.
+    conn.execute("UPDATE data_version SET version = version + 1 WHERE id = 1")
+
+def _is_pandas(value):
+    # A frame can only exist once pandas is imported; checking sys.modules
+    # first keeps caching a plain result from importing it.
+    return 'pandas' in sys.modules and isinstance(value, (pd.DataFrame, pd.Series))
+
+def _result_bytes(value):
+    if _is_pandas(value):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, dict):
+        return sum(_result_bytes(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(_result_bytes(v) for v in value)
+    return sys.getsizeof(value)
+
+def _shallow_copy(value):
+    # Callers get their own frame objects (so renaming or adding columns does
+    # not leak into the cache) that still share the cached column data.
+    if _is_pandas(value):
+        return value.copy(deep=False)
+    if isinstance(value, dict):
+        return {k: _shallow_copy(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return list(value)
+    return value
+
+
+class ResultCache:
+    # Process-wide LRU of query results keyed on (function, arguments, data
+    # version), bounded by the deep memory size of the cached values.
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # function name -> [hits, misses]
+        self._functions = {}
+
+    def _drop(self, key):
+        _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def get_or_compute(self, key, version, compute):
+        with self._lock:
+            if version != self._version:
+                # Results for older versions can never be hit again.
+                self.invalidations += len(self._entries)
+                for stale in list(self._entries):
+                    self._drop(stale)
+                self._version = version
+            counts = self._functions.setdefault(key[0], [0, 0])
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                counts[0] += 1
+                return self._entries[key][0]
+            self.misses += 1
+            counts[1] += 1
+
+        value = compute()
+        size = _result_bytes(value)
+        with self._lock:
+            if version == self._version and size <= self.max_bytes and key not in self._entries:
+                self._entries[key] = (value, size)
+                self._bytes += size
+                while self._bytes > self.max_bytes:
+                    self._drop(next(iter(self._entries)))
+                    self.evictions += 1
+        return value
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'data_version': self._version,
+            }
+
+    def function_stats(self):
+        with self._lock:
+            rows = [{'function': name, 'hits': hits, 'misses': misses, 'hit_ratio': round(hits / (hits + misses), 4)}
+                    for name, (hits, misses) in self._functions.items()]
+        frame = pd.DataFrame(rows, columns=['function', 'hits', 'misses', 'hit_ratio'])
+        return frame.sort_values(['hit_ratio', 'function'], ignore_index=True)
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._drop(key)
+
+
+@process_resource
+def get_result_cache():
+    return ResultCache(RESULT_CACHE_MB * 1024 * 1024)
+
+def _hashable(value):
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_hashable(v) for v in value)
+    return value
+
+def versioned_cache(func):
+    # Serves repeat calls from memory until the data version changes.
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        key = (func.__name__, _hashable(args), _hashable(sorted(kwargs.items())))
+        value = get_result_cache().get_or_compute(key, get_data_version(), lambda: func(*args, **kwargs))
+        return _shallow_copy(value)
+    return wrapper
+
+def get_result_cache_stats():
+    return get_result_cache().stats()
+
+# --------------------------
+# Case Management Functions
+# --------------------------
+CASE_DATE_COLUMNS = ['date_detected', 'date_reported', 'date_resolved', 'created_at', 'updated_at']
+
+# In-memory schema of case rows (a Reports page). Low-cardinality text
+# columns are Categoricals, free text is stored as Arrow strings when
+# pyarrow is available instead of one Python object per cell, and
+# coordinates are float32.
+CASE_CATEGORY_COLUMNS = ['case_type', 'severity', 'status', 'location', 'currency']
+CASE_TEXT_COLUMNS = ['case_name', 'description', 'parties_involved', 'investigation_agency',
+                     'court_reference', 'source_url', 'created_by']
+
+@functools.lru_cache(maxsize=None)
+def _case_text_dtype():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return object
+    return pd.StringDtype('pyarrow')
+
+def _typed_case_frame(df):
+    for col in CASE_DATE_COLUMNS:
+        df[col] = pd.to_datetime(df[col], errors='coerce')
+    for col in CASE_CATEGORY_COLUMNS:
+        df[col] = df[col].astype('category')
+    for col in CASE_TEXT_COLUMNS:
+        df[col] = df[col].astype(_case_text_dtype())
+    for col in ('lat', 'lon'):
+        df[col] = pd.to_numeric(df[col]).astype('float32')
+    df['location_id'] = pd.to_numeric(df['location_id']).astype('Int32')
+    return df
+
+def _concat_case_frames(frames):
+    # pd.concat falls back to object for categoricals whose categories
+    # differ, so widen every frame to the union first
+    frames = [frame for frame in frames if not frame.empty] or frames[:1]
+    if len(frames) == 1:
+        return frames[0]
+    for col in CASE_CATEGORY_COLUMNS:
+        categories = functools.reduce(pd.Index.union, (frame[col].cat.categories for frame in frames))
+        frames = [frame.assign(**{col: frame[col].cat.set_categories(categories)}) for frame in frames]
+    return pd.concat(frames, ignore_index=True)
+
+# --------------------------
+# Session Memory
+# --------------------------
+SESSION_IDLE_SECONDS = 30 * 60
+SESSION_SAMPLE_SECONDS = 5
+SESSION_SAMPLES = 720
+
+def process_rss_bytes():
+    # Current resident set size, where the OS exposes it (Linux /proc)
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class SessionTracker:
+    # Sessions seen within SESSION_IDLE_SECONDS, and a rolling history of
+    # (sessions, process RSS) samples that shows how memory grows with the
+    # number of investigators.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_seen = {}
+        self.samples = deque(maxlen=SESSION_SAMPLES)
+
+    def touch(self, session_id):
+        now = time.time()
+        with self._lock:
+            self._last_seen[session_id] = now
+            cutoff = now - SESSION_IDLE_SECONDS
+            for idle in [sid for sid, seen in self._last_seen.items() if seen < cutoff]:
+                del self._last_seen[idle]
+            if not self.samples or now - self.samples[-1]['time'] >= SESSION_SAMPLE_SECONDS:
+                self.samples.append(self._sample(now))
+
+    def _sample(self, now):
+        return {'time': now, 'sessions': len(self._last_seen), 'rss_bytes': process_rss_bytes()}
+
+    def snapshot(self):
+        with self._lock:
+            return self._sample(time.time()), pd.DataFrame(list(self.samples))
+
+
+@process_resource
+def get_session_tracker():
+    return SessionTracker()
+
+def track_session():
+    ctx = get_script_run_ctx()
+    if ctx is not None:
+        get_session_tracker().touch(ctx.session_id)
+
+def session_memory_gauge(current):
+    rss_mb = (current['rss_bytes'] or 0) / 2**20
+    fig = go.Figure(go.Indicator(
+        mode='gauge+number', value=rss_mb, number={'suffix': ' MB', 'valueformat': ',.0f'},
+        title={'text': f"{current['sessions']} active session{'s' if current['sessions'] != 1 else ''}"},
+        gauge={'axis': {'range': [0, max(rss_mb * 1.25, 1)]}, 'bar': {'color': '#667eea'}}))
+    fig.update_layout(height=220, margin=dict(l=20, r=20, t=50, b=10))
+    return fig
+
+@versioned_cache
+@traced('data')
+def get_case_types():
+    with db_connection() as conn:
+        c = conn.cursor()
+        c.execute("SELECT DISTINCT case_type FROM cases")
+        return [row[0] for row in c.fetchall()]
+
+def after_cases_inserted(conn, first_case_id, last_case_id):
+    # Keeps every derived structure in step with a block of newly inserted
+    # cases (ids are contiguous within one write transaction). Runs once per
+    # insert batch, inside the caller's transaction.
+    convert_case_amounts(conn, "case_id BETWEEN ? AND ?", (first_case_id, last_case_id))
+    geocode_cases(conn, "case_id BETWEEN ? AND ?", (first_case_id, last_case_id))
+    update_rollups(conn, first_case_id, last_case_id)
+    update_anomaly_scores(conn, first_case_id, last_case_id)
+    update_duplicate_index(conn, first_case_id, last_case_id)
+    update_case_entities(conn, first_case_id, last_case_id)
+    bump_data_version(conn)
+
+@traced('data')
+def add_new_case(case_data):
+    with db_connection() as conn:
+        c = conn.cursor()
+        try:
+            c.execute(CASE_INSERT_SQL, case_data)
+            case_id = c.lastrowid
+            after_cases_inserted(conn, case_id, case_id)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            st.error(f"Error adding case: {str(e)}")
+            return False
+    duplicates = get_case_duplicates(case_id)
+    for match in duplicates.itertuples(index=False):
+        st.warning(f"⚠️ Possible duplicate of case #{match.duplicate_of} \"{match.duplicate_name}\" "
+                   f"({match.similarity:.0%} similar).")
+    return True
+
+# --------------------------
+# Currency Conversion
+# --------------------------
+# Amounts are kept as entered (amount_involved in currency) and also stored
+# in USD as cases.amount_usd, converted at the fx_rates row in force on the
+# case's detection date. Every aggregate sums amount_usd, so charts never
+# convert at render time.
+FX_DATE_SQL = "COALESCE(date_detected, date_reported, created_at)"
+FX_RATE_COLUMNS = ['currency', 'rate_date', 'units_per_usd']
+
+# Approximate annual averages in units per USD, effective 1 January. NAD and
+# SZL are pegged 1:1 to the rand. ZWL traded at par with USD in the bond-note
+# era until it was floated in February 2019.
+_ZAR_PER_USD = {2000: 6.94, 2005: 6.36, 2008: 8.26, 2010: 7.32, 2012: 8.21, 2014: 10.85, 2015: 12.76,
+                2016: 14.71, 2017: 13.32, 2018: 13.23, 2019: 14.45, 2020: 16.46, 2021: 14.78,
+                2022: 16.36, 2023: 18.45, 2024: 18.33}
+FX_SEED_RATES = (
+    [('USD', '1900-01-01', 1.0)]
+    + [(currency, f'{year}-01-01', rate) for currency in ('ZAR', 'NAD', 'SZL')
+       for year, rate in _ZAR_PER_USD.items()]
+    + [('BWP', f'{year}-01-01', rate) for year, rate in {
+        2000: 5.10, 2005: 5.11, 2008: 6.83, 2010: 6.79, 2012: 7.62, 2014: 8.98, 2015: 10.13, 2016: 10.90,
+        2017: 10.35, 2018: 10.20, 2019: 10.76, 2020: 11.45, 2021: 11.09, 2022: 12.37, 2023: 13.45,
+        2024: 13.55}.items()]
+    + [('KES', f'{year}-01-01', rate) for year, rate in {
+        2000: 76.2, 2005: 75.6, 2008: 69.2, 2010: 79.2, 2012: 84.5, 2014: 87.9, 2015: 98.2, 2016: 101.5,
+        2017: 103.4, 2018: 101.3, 2019: 102.0, 2020: 106.5, 2021: 109.6, 2022: 117.9, 2023: 139.8,
+        2024: 134.8}.items()]
+    + [('ZWL', '2009-01-01', 1.0), ('ZWL', '2019-02-22', 3.0), ('ZWL', '2019-07-01', 9.0),
+       ('ZWL', '2020-01-01', 60.0), ('ZWL', '2021-01-01', 88.0), ('ZWL', '2022-01-01', 410.0),
+       ('ZWL', '2023-01-01', 3500.0), ('ZWL', '2024-01-01', 15000.0)]
+)
+
+# Header spellings accepted by load_fx_rates
+FX_COLUMN_ALIASES = {
+    'date': 'rate_date',
+    'effective_date': 'rate_date',
+    'rate': 'units_per_usd',
+    'per_usd': 'units_per_usd',
+}
+
+def _fx_rate_frame(conn):
+    # A few rows per currency per year, so read it whole each time
+    rates = pd.read_sql(f"SELECT {', '.join(FX_RATE_COLUMNS)} FROM fx_rates", conn)
+    rates['rate_date'] = pd.to_datetime(rates['rate_date'])
+    return rates.sort_values('rate_date', ignore_index=True)
+
+def to_usd(amounts, currencies, dates, rates):
+    # Vectorised as-of join: each amount uses the latest rate for its currency
+    # dated on or before its date, or the earliest rate when it predates them
+    # all. Missing currencies count as USD (the column default); missing or
+    # unparseable dates take the latest rate. NaN where no rate exists.
+    currencies = pd.Series(currencies, dtype=object).fillna('').astype(str).str.strip().str.upper()
+    keys = pd.DataFrame({
+        'currency': currencies.where(currencies != '', 'USD').to_numpy(),
+        'fx_date': pd.to_datetime(pd.Series(dates, dtype=object), errors='coerce', format='mixed')
+                     .fillna(pd.Timestamp.max).astype('datetime64[ns]').to_numpy(),
+        'row': np.arange(len(currencies)),
+    }).sort_values('fx_date', kind='stable')
+    rate = None
+    for direction in ('backward', 'forward'):
+        matched = pd.merge_asof(keys, rates, left_on='fx_date', right_on='rate_date', by='currency',
+                                direction=direction)['units_per_usd'].to_numpy()
+        rate = matched if rate is None else np.where(np.isnan(rate), matched, rate)
+    amounts = pd.to_numeric(pd.Series(amounts), errors='coerce').to_numpy(dtype=float)
+    order = keys['row'].to_numpy()
+    usd = np.full(len(order), np.nan)
+    usd[order] = amounts[order] / rate
+    return usd
+
+def convert_case_amounts(conn, where="1", params=()):
+    # Recomputes amount_usd for the matching cases and writes only the rows
+    # whose value changed. Returns the number of rows written.
+    cases = pd.read_sql(f'''SELECT case_id, amount_involved, currency, {FX_DATE_SQL} AS fx_date, amount_usd
+                            FROM cases WHERE {where}''', conn, params=params)
+    if cases.empty:
+        return 0
+    usd = to_usd(cases['amount_involved'], cases['currency'], cases['fx_date'], _fx_rate_frame(conn))
+    old = cases['amount_usd'].to_numpy(dtype=float)
+    changed = ~(np.isclose(usd, old, rtol=1e-12, atol=0) | (np.isnan(usd) & np.isnan(old)))
+    values = pd.Series(usd[changed]).astype(object).where(~np.isnan(usd[changed]), None)
+    conn.executemany("UPDATE cases SET amount_usd = ? WHERE case_id = ?",
+                     zip(values, cases['case_id'].to_numpy()[changed].tolist()))
+    return int(changed.sum())
+
+def read_fx_rates(source):
+    # Parses a rates CSV (currency, rate_date, units_per_usd) into rows for
+    # fx_rates; raises ValueError naming the first bad lines.
+    raw = pd.read_csv(source, dtype=str, keep_default_na=False)
+    raw.columns = [FX_COLUMN_ALIASES.get(key, key) for key in map(_normalize_import_header, raw.columns)]
+    missing = [col for col in FX_RATE_COLUMNS if col not in raw.columns]
+    if missing:
+        raise ValueError(f"rates file is missing column(s): {', '.join(missing)}")
+    rates = pd.DataFrame({
+        'currency': raw['currency'].str.strip().str.upper(),
+        'rate_date': pd.to_datetime(raw['rate_date'].str.strip(), errors='coerce', format='mixed'),
+        'units_per_usd': pd.to_numeric(raw['units_per_usd'].str.replace(',', '', regex=False), errors='coerce'),
+    })
+    bad = (rates['currency'] == '') | rates['rate_date'].isna() | ~(rates['units_per_usd'] > 0)
+    if bad.any():
+        lines = ', '.join(str(line + 2) for line in rates.index[bad][:10])
+        raise ValueError(f"{int(bad.sum())} invalid rate row(s), e.g. line(s) {lines}: need a currency, "
+                         f"a date and a positive units_per_usd")
+    rates['rate_date'] = rates['rate_date'].dt.strftime('%Y-%m-%d')
+    return rates.drop_duplicates(['currency', 'rate_date'], keep='last')
+
+@traced('data')
+def load_fx_rates(source, label='csv'):
+    # Upserts rates from a CSV, then reconverts every case and rebuilds the
+    # aggregates that depend on amount_usd, all in one transaction.
+    rates = read_fx_rates(source)
+    with db_connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany('''INSERT INTO fx_rates (currency, rate_date, units_per_usd, source)
+                                VALUES (?, ?, ?, ?)
+                                ON CONFLICT (currency, rate_date) DO UPDATE SET
+                                    units_per_usd = excluded.units_per_usd, source = excluded.source''',
+                             [(*row, label) for row in rates.itertuples(index=False, name=None)])
+            converted = convert_case_amounts(conn)
+            if converted:
+                conn.execute("DELETE FROM case_rollup")
+                conn.execute(f"INSERT INTO case_rollup {_rollup_source_sql('1')}")
+                conn.execute("DELETE FROM case_anomaly")
+                _write_anomaly_scores(conn, score_anomalies(_load_anomaly_frame(conn)))
+            bump_data_version(conn)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return {'rates': len(rates), 'currencies': sorted(rates['currency'].unique()), 'cases_converted': converted}
+
+@versioned_cache
+@traced('data')
+def get_fx_rates():
+    with db_connection() as conn:
+        return pd.read_sql("SELECT * FROM fx_rates ORDER BY currency, rate_date DESC", conn)
+
+# --------------------------
+# Gazetteer
+# --------------------------
+# Free-text case locations are matched to the locations table through
+# normalised aliases (case, accents, punctuation and spacing ignored; text
+# after the first comma is tried on its own too, so "Harare, Zimbabwe"
+# resolves). Each distinct spelling is resolved once and the coordinates are
+# stored on the case row; unmatched spellings keep NULL coordinates rather
+# than being placed at the country centroid.
+GAZETTEER_COLUMNS = ['name', 'country', 'kind', 'lat', 'lon', 'aliases']
+GAZETTEER_ALIAS_SEPARATOR = r'[|;]'
+GAZETTEER_SEED = [
+    ('Harare', 'Zimbabwe', 'city', -17.8292, 31.0522, ('Hre', 'Salisbury', 'Harare CBD', 'Harare Central')),
+    ('Bulawayo', 'Zimbabwe', 'city', -20.1325, 28.6265, ('Byo', 'Bulawayo City')),
+    ('Chitungwiza', 'Zimbabwe', 'city', -18.0127, 31.0756, ('Chitown',)),
+    ('Mutare', 'Zimbabwe', 'city', -18.9707, 32.6709, ('Umtali',)),
+    ('Gweru', 'Zimbabwe', 'city', -19.4500, 29.8167, ('Gwelo',)),
+    ('Kwekwe', 'Zimbabwe', 'city', -18.9281, 29.8149, ('Que Que',)),
+    ('Kadoma', 'Zimbabwe', 'city', -18.3333, 29.9153, ('Gatooma',)),
+    ('Masvingo', 'Zimbabwe', 'city', -20.0637, 30.8277, ('Fort Victoria',)),
+    ('Chinhoyi', 'Zimbabwe', 'city', -17.3667, 30.2000, ('Sinoia',)),
+    ('Marondera', 'Zimbabwe', 'city', -18.1853, 31.5519, ('Marandellas',)),
+    ('Bindura', 'Zimbabwe', 'city', -17.3019, 31.3306, ()),
+    ('Zvishavane', 'Zimbabwe', 'city', -20.3267, 30.0665, ('Shabani',)),
+    ('Beitbridge', 'Zimbabwe', 'city', -22.2167, 30.0000, ('Beit Bridge',)),
+    ('Victoria Falls', 'Zimbabwe', 'city', -17.9243, 25.8572, ('Vic Falls', 'Vicfalls')),
+    ('Hwange', 'Zimbabwe', 'city', -18.3646, 26.4988, ('Wankie',)),
+    ('Kariba', 'Zimbabwe', 'city', -16.5167, 28.8000, ()),
+    ('Marange', 'Zimbabwe', 'area', -19.9667, 32.3167, ('Chiadzwa', 'Marange Diamond Fields')),
+    ('Zimbabwe', 'Zimbabwe', 'country', -19.0154, 29.1549, ('Nationwide', 'National', 'Countrywide', 'Zim')),
+    ('South Africa', 'South Africa', 'country', -30.5595, 22.9375, ('SA', 'RSA', 'Republic of South Africa')),
+    ('Johannesburg', 'South Africa', 'city', -26.2041, 28.0473, ('Joburg', 'Jhb')),
+    ('Botswana', 'Botswana', 'country', -22.3285, 24.6849, ()),
+    ('Gaborone', 'Botswana', 'city', -24.6282, 25.9231, ()),
+    ('Zambia', 'Zambia', 'country', -13.1339, 27.8493, ()),
+    ('Lusaka', 'Zambia', 'city', -15.3875, 28.3228, ()),
+    ('Mozambique', 'Mozambique', 'country', -18.6657, 35.5296, ()),
+    ('Maputo', 'Mozambique', 'city', -25.9692, 32.5732, ()),
+    ('Malawi', 'Malawi', 'country', -13.2543, 34.3015, ()),
+    ('Namibia', 'Namibia', 'country', -22.9576, 18.4904, ()),
+    ('Windhoek', 'Namibia', 'city', -22.5609, 17.0658, ()),
+    ('Eswatini', 'Eswatini', 'country', -26.5225, 31.4659, ('Swaziland',)),
+    ('Kenya', 'Kenya', 'country', -0.0236, 37.9062, ()),
+    ('Nairobi', 'Kenya', 'city', -1.2921, 36.8219, ()),
+]
+
+def _location_key(names):
+    names = pd.Series(names, dtype=object).fillna('').astype(str)
+    names = names.str.normalize('NFKD').str.encode('ascii', 'ignore').str.decode('ascii').str.lower()
+    return names.str.replace(r'[^a-z0-9,]+', ' ', regex=True).str.strip()
+
+def _gazetteer_frame(conn):
+    return pd.read_sql('''SELECT a.alias_key, l.location_id, l.name, l.lat, l.lon
+                          FROM location_aliases a JOIN locations l ON l.location_id = a.location_id''', conn)
+
+def resolve_locations(names, gazetteer):
+    # Vectorised lookup of location_id/name/lat/lon for each name (NaN when
+    # unmatched), aligned with `names`.
+    keys = _location_key(names)
+    full = keys.str.replace(',', ' ', regex=False).str.split().str.join(' ')
+    head = keys.str.split(',').str[0].str.strip()
+    lookup = gazetteer.drop_duplicates('alias_key').set_index('alias_key')[['location_id', 'name', 'lat', 'lon']]
+    resolved = lookup.reindex(full.to_numpy()).reset_index(drop=True)
+    missing = resolved['location_id'].isna().to_numpy()
+    resolved.loc[missing] = lookup.reindex(head[missing].to_numpy()).to_numpy()
+    resolved.index = keys.index
+    return resolved
+
+def geocode_cases(conn, where="1", params=()):
+    # Resolves each distinct location among the matching cases once and
+    # writes location_id/lat/lon with one UPDATE per spelling, skipping rows
+    # that already hold the right values. Returns the number of spellings.
+    names = [row[0] for row in conn.execute(f"SELECT DISTINCT location FROM cases WHERE {where}", params)]
+    if not names:
+        return 0
+    resolved = resolve_locations(names, _gazetteer_frame(conn))
+    resolved = resolved[['location_id', 'lat', 'lon']].astype(object).where(resolved.notna(), None)
+    conn.executemany(f'''UPDATE cases SET location_id = ?, lat = ?, lon = ?
+                          WHERE {where} AND location IS ?
+                            AND (location_id IS NOT ? OR lat IS NOT ? OR lon IS NOT ?)''',
+                     [(*row, *params, name, *row) for row, name in
+                      zip(resolved.itertuples(index=False, name=None), names)])
+    return len(names)
+
+def _write_gazetteer(conn, frame):
+    conn.executemany('''INSERT INTO locations (name, country, kind, lat, lon) VALUES (?, ?, ?, ?, ?)
+                         ON CONFLICT (name) DO UPDATE SET
+                             country = COALESCE(excluded.country, country), kind = COALESCE(excluded.kind, kind),
+                             lat = excluded.lat, lon = excluded.lon''',
+                     frame[['name', 'country', 'kind', 'lat', 'lon']].astype(object)
+                     .where(frame[['name', 'country', 'kind', 'lat', 'lon']].notna(), None)
+                     .itertuples(index=False, name=None))
+    aliases = frame[['name', 'aliases']].explode('aliases').dropna()
+    aliases = pd.concat([frame[['name']].assign(aliases=frame['name']), aliases], ignore_index=True)
+    aliases['alias_key'] = _location_key(aliases['aliases']).str.replace(',', ' ', regex=False).str.split().str.join(' ')
+    aliases = aliases[aliases['alias_key'] != ''].drop_duplicates('alias_key', keep='last')
+    ids = dict(conn.execute("SELECT name, location_id FROM locations").fetchall())
+    conn.executemany("INSERT OR REPLACE INTO location_aliases (alias_key, location_id) VALUES (?, ?)",
+                     zip(aliases['alias_key'], aliases['name'].map(ids).astype(int).tolist()))
+
+def read_gazetteer(source):
+    # Parses a gazetteer CSV (name, lat, lon, optional country, kind and
+    # aliases separated by | or ;); raises ValueError naming bad lines.
+    raw = pd.read_csv(source, dtype=str, keep_default_na=False)
+    raw.columns = [str(col).strip().lower().replace(' ', '_') for col in raw.columns]
+    missing = [col for col in ('name', 'lat', 'lon') if col not in raw.columns]
+    if missing:
+        raise ValueError(f"gazetteer file is missing column(s): {', '.join(missing)}")
+    frame = pd.DataFrame({
+        'name': raw['name'].str.strip(),
+        'country': raw['country'].str.strip() if 'country' in raw.columns else '',
+        'kind': raw['kind'].str.strip().str.lower() if 'kind' in raw.columns else '',
+        'lat': pd.to_numeric(raw['lat'], errors='coerce'),
+        'lon': pd.to_numeric(raw['lon'], errors='coerce'),
+        'aliases': (raw['aliases'] if 'aliases' in raw.columns else pd.Series('', index=raw.index))
+                   .str.split(GAZETTEER_ALIAS_SEPARATOR),
+    })
+    bad = (frame['name'] == '') | ~frame['lat'].between(-90, 90) | ~frame['lon'].between(-180, 180)
+    if bad.any():
+        lines = ', '.join(str(line + 2) for line in frame.index[bad][:10])
+        raise ValueError(f"{int(bad.sum())} invalid location row(s), e.g. line(s) {lines}: need a name "
+                         f"and lat/lon in range")
+    frame[['country', 'kind']] = frame[['country', 'kind']].replace('', None)
+    frame['aliases'] = frame['aliases'].map(lambda names: [n.strip() for n in names if n.strip()])
+    return frame.drop_duplicates('name', keep='last')
+
+@traced('data')
+def load_gazetteer(source):
+    # Upserts locations and aliases from a CSV, then re-resolves every case.
+    frame = read_gazetteer(source)
+    with db_connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            _write_gazetteer(conn, frame)
+            spellings = geocode_cases(conn)
+            bump_data_version(conn)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return {'locations': len(frame), 'aliases': int(frame['aliases'].str.len().sum()), 'spellings': spellings}
+
+@versioned_cache
+@traced('data')
+def get_location_points():
+    # One map point per resolved location, aggregated from the rollup cube,
+    # plus the spellings the gazetteer could not place.
+    by_type = get_rollup(['location', 'case_type'])
+    with db_connection() as conn:
+        gazetteer = _gazetteer_frame(conn)
+    resolved = resolve_locations(by_type['location'], gazetteer)
+    by_type = pd.concat([by_type, resolved], axis=1)
+    placed = by_type[by_type['location_id'].notna()]
+    points = placed.groupby('location_id', as_index=False).agg(
+        name=('name', 'first'), lat=('lat', 'first'), lon=('lon', 'first'),
+        cases=('cases', 'sum'), amount_usd=('amount_usd_total', 'sum'),
+        spellings=('location', lambda names: ', '.join(sorted(set(names)))))
+    top = placed.sort_values(['cases', 'case_type'], ascending=[False, True]).drop_duplicates('location_id')
+    points = points.merge(top[['location_id', 'case_type']].rename(columns={'case_type': 'top_case_type'}),
+                          on='location_id')
+    unresolved = (by_type[by_type['location_id'].isna()].groupby('location', as_index=False)['cases'].sum()
+                  .sort_values('cases', ascending=False, ignore_index=True))
+    return points.sort_values('cases', ascending=False, ignore_index=True), unresolved
 
 # --------------------------
-# Case Management Functions
+# Case Map Binning
 # --------------------------
-def get_all_cases():
-    conn = sqlite3.connect('fraudcases.db')
-    df = pd.read_sql("SELECT * FROM cases ORDER BY date_reported DESC", conn)
-    conn.close()
+# The case map is aggregated server-side: cases are binned into a lat/lon
+# grid whose cell is about MAP_CELL_PIXELS screen pixels at the chosen zoom,
+# so the browser gets one marker per occupied cell instead of one per case.
+# Above MAP_DENSITY_THRESHOLD cells the map switches from markers to a
+# density heatmap, and only the MAP_MAX_POINTS busiest cells are ever sent.
+MAP_CENTER = {'lat': -19.0154, 'lon': 29.1549}
+MAP_ZOOM_LEVELS = (3, 12)
+MAP_CELL_PIXELS = 40
+MAP_DENSITY_THRESHOLD = int(os.environ.get('FRAUDX_MAP_DENSITY_THRESHOLD', '1500'))
+MAP_MAX_POINTS = int(os.environ.get('FRAUDX_MAP_MAX_POINTS', '5000'))
+
+def map_cell_degrees(zoom):
+    # Web Mercator tiles are 256 px wide and span 360 degrees at zoom 0
+    return 360.0 / (256 * 2 ** zoom) * MAP_CELL_PIXELS
+
+@versioned_cache
+@traced('data')
+def get_case_coordinates():
+    # Every geocoded case as compact arrays, read once per data version
+    # through idx_cases_geo and shared by all zoom levels
+    with db_connection() as conn:
+        df = pd.read_sql('''SELECT case_id, lat, lon, case_type, amount_usd FROM cases
+                             INDEXED BY idx_cases_geo WHERE lat IS NOT NULL''', conn)
+    df['case_type'] = df['case_type'].astype('category')
+    df['case_id'] = df['case_id'].astype(np.int64)
     return df
 
-def get_case_types():
-    conn = sqlite3.connect('fraudcases.db')
-    c = conn.cursor()
-    c.execute("SELECT DISTINCT case_type FROM cases")
-    types = [row[0] for row in c.fetchall()]
-    conn.close()
-    return types
+@versioned_cache
+@traced('data')
+def get_case_map_bins(zoom, case_type=None, max_points=MAP_MAX_POINTS):
+    # Grid aggregation for one zoom level: per occupied cell the case count,
+    # USD total, centroid and lowest case_id. Returns the busiest max_points
+    # cells and totals for what was left out.
+    coords = get_case_coordinates()
+    if case_type is not None:
+        coords = coords[coords['case_type'] == case_type]
+    cell = map_cell_degrees(zoom)
+    rows = np.floor((coords['lat'].to_numpy() + 90) / cell).astype(np.int64)
+    cols = np.floor((coords['lon'].to_numpy() + 180) / cell).astype(np.int64)
+    key = rows * (int(360 / cell) + 2) + cols
+    bins = coords.groupby(key, sort=False).agg(
+        cases=('case_id', 'size'), lat=('lat', 'mean'), lon=('lon', 'mean'),
+        amount_usd=('amount_usd', 'sum'), case_id=('case_id', 'min'))
+    bins = bins.sort_values(['cases', 'case_id'], ascending=[False, True], ignore_index=True)
+    shown = bins.head(max_points).copy()
+    # Round to ~1 m and whole dollars; nothing finer is visible, and it keeps
+    # the figure JSON small
+    shown[['lat', 'lon']] = shown[['lat', 'lon']].round(5)
+    shown['amount_usd'] = shown['amount_usd'].round(0)
+    singles = shown.loc[shown['cases'] == 1, 'case_id']
+    names = get_cases_by_id(singles, ('case_id', 'case_name')).set_index('case_id')['case_name']
+    shown['label'] = np.where(shown['cases'] == 1, shown['case_id'].map(names).fillna(''),
+                              shown['cases'].map('{:,} cases'.format))
+    return {
+        'bins': shown,
+        'cells': len(bins),
+        'cases': int(bins['cases'].sum()),
+        'omitted_cells': len(bins) - len(shown),
+        'omitted_cases': int(bins['cases'].iloc[len(shown):].sum()),
+    }
 
-def add_new_case(case_data):
-    conn = sqlite3.connect('fraudcases.db')
-    c = conn.cursor()
-    try:
-        c.execute('''INSERT INTO cases 
-                    (case_name, case_type, description, location, amount_involved, currency,
-                     date_detected, date_reported, date_resolved, parties_involved,
-                     investigation_agency, court_reference, source_url, created_by, severity)
-                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
-                  case_data)
-        conn.commit()
-        return True
-    except Exception as e:
-        st.error(f"Error adding case: {str(e)}")
-        return False
-    finally:
-        conn.close()
+def case_map_figure(binned, zoom, density_threshold=MAP_DENSITY_THRESHOLD):
+    bins = binned['bins']
+    if len(bins) > density_threshold:
+        trace = go.Densitymapbox(lat=bins['lat'], lon=bins['lon'], z=bins['cases'],
+                                 radius=MAP_CELL_PIXELS // 2, colorscale='Reds', hoverinfo='skip',
+                                 colorbar=dict(title='Cases'))
+    else:
+        size = np.sqrt(bins['cases'] / max(int(bins['cases'].max()), 1)) * 40 + 6 if len(bins) else []
+        trace = go.Scattermapbox(lat=bins['lat'], lon=bins['lon'], mode='markers+text',
+                                 marker=dict(size=size, color='#e63946', opacity=0.6),
+                                 text=np.where(bins['cases'] > 1, bins['cases'].map('{:,}'.format), ''),
+                                 textfont=dict(color='white', size=11),
+                                 customdata=np.column_stack([bins['label'], bins['amount_usd']]),
+                                 hovertemplate='%{customdata[0]}<br>USD %{customdata[1]:,.0f}<extra></extra>')
+    fig = go.Figure(trace)
+    fig.update_layout(mapbox=dict(style='open-street-map', center=MAP_CENTER, zoom=zoom),
+                      height=600, margin=dict(l=0, r=0, t=0, b=0))
+    return fig
+
+# --------------------------
+# Case Rollups
+# --------------------------
+# case_rollup is a small cube of per-bucket counts and sums over
+# (report year, month, case_type, severity, location, currency). Missing
+# values are stored as 0 / '' so the bucket can be part of the primary key.
+ROLLUP_KEY_SQL = {
+    'year': f"COALESCE({REPORT_YEAR_SQL}, 0)",
+    'month': "COALESCE(CAST(strftime('%m', date_reported) AS INTEGER), 0)",
+    'case_type': "COALESCE(case_type, '')",
+    'severity': "COALESCE(severity, '')",
+    'location': "COALESCE(location, '')",
+    'currency': "COALESCE(currency, '')",
+}
+
+# Dimensions the analytics pages can group by, and the filter that drops the
+# "missing" bucket for each (mirroring pandas groupby dropping NaN keys).
+ROLLUP_DIMENSIONS = {
+    'year': ('year', "year <> 0"),
+    'month': ('month', "month <> 0"),
+    'quarter': ('(month + 2) / 3', "month <> 0"),
+    'case_type': ('case_type', "case_type <> ''"),
+    'severity': ('severity', "severity <> ''"),
+    'location': ('location', "location <> ''"),
+    'currency': ('currency', "currency <> ''"),
+}
+
+ROLLUP_MEASURES = ('''SUM(case_count) AS cases,
+                     SUM(amount_total) AS amount_total,
+                     SUM(amount_count) AS amount_count,
+                     SUM(positive_amount_total) AS positive_amount_total,
+                     SUM(positive_amount_count) AS positive_amount_count,
+                     SUM(amount_usd_total) AS amount_usd_total,
+                     SUM(amount_usd_count) AS amount_usd_count,
+                     SUM(positive_amount_usd_total) AS positive_amount_usd_total,
+                     SUM(positive_amount_usd_count) AS positive_amount_usd_count,
+                     MIN(min_date_reported) AS first_reported,
+                     MAX(max_date_reported) AS last_reported''')
+
+def _rollup_source_sql(where, usd=True):
+    # usd=False leaves out the USD measures, for the cube as migration 4
+    # built it before cases.amount_usd existed
+    keys = ', '.join(f"{expr} AS {name}" for name, expr in ROLLUP_KEY_SQL.items())
+    usd_measures = ''',
+                   COALESCE(SUM(amount_usd), 0),
+                   COUNT(amount_usd),
+                   COALESCE(SUM(CASE WHEN amount_usd > 0 THEN amount_usd END), 0),
+                   COUNT(CASE WHEN amount_usd > 0 THEN 1 END)''' if usd else ''
+    return f'''SELECT {keys},
+                   COUNT(*),
+                   COALESCE(SUM(amount_involved), 0),
+                   COUNT(amount_involved),
+                   COALESCE(SUM(CASE WHEN amount_involved > 0 THEN amount_involved END), 0),
+                   COUNT(CASE WHEN amount_involved > 0 THEN 1 END),
+                   MIN(date_reported),
+                   MAX(date_reported){usd_measures}
+               FROM cases WHERE {where}
+               GROUP BY 1, 2, 3, 4, 5, 6'''
+
+def update_rollups(conn, first_case_id, last_case_id):
+    # Folds newly inserted cases into the cube; runs inside the caller's
+    # transaction so the rollup and the cases commit together.
+    conn.execute(f'''INSERT INTO case_rollup
+                     {_rollup_source_sql("case_id BETWEEN ? AND ?")}
+                     ON CONFLICT (year, month, case_type, severity, location, currency) DO UPDATE SET
+                         case_count = case_count + excluded.case_count,
+                         amount_total = amount_total + excluded.amount_total,
+                         amount_count = amount_count + excluded.amount_count,
+                         positive_amount_total = positive_amount_total + excluded.positive_amount_total,
+                         positive_amount_count = positive_amount_count + excluded.positive_amount_count,
+                         min_date_reported = MIN(COALESCE(min_date_reported, excluded.min_date_reported),
+                                                 COALESCE(excluded.min_date_reported, min_date_reported)),
+                         max_date_reported = MAX(COALESCE(max_date_reported, excluded.max_date_reported),
+                                                 COALESCE(excluded.max_date_reported, max_date_reported)),
+                         amount_usd_total = amount_usd_total + excluded.amount_usd_total,
+                         amount_usd_count = amount_usd_count + excluded.amount_usd_count,
+                         positive_amount_usd_total = positive_amount_usd_total + excluded.positive_amount_usd_total,
+                         positive_amount_usd_count = positive_amount_usd_count + excluded.positive_amount_usd_count''',
+                 (first_case_id, last_case_id))
+
+@traced('data')
+def rebuild_rollups():
+    with db_connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM case_rollup")
+            conn.execute(f"INSERT INTO case_rollup {_rollup_source_sql('1')}")
+            bump_data_version(conn)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return conn.execute("SELECT COUNT(*) FROM case_rollup").fetchone()[0]
+
+@traced('data')
+def verify_rollups():
+    # Recomputes the cube from the cases table and returns the buckets that
+    # differ from the stored one (empty when consistent).
+    keys = list(ROLLUP_KEY_SQL)
+    with db_connection() as conn:
+        stored = pd.read_sql("SELECT * FROM case_rollup", conn)
+        fresh = pd.read_sql(_rollup_source_sql('1'), conn)
+    fresh.columns = stored.columns
+    merged = stored.merge(fresh, on=keys, how='outer', suffixes=('', '_fresh'), indicator=True)
+    bad = merged['_merge'] != 'both'
+    for col in stored.columns.difference(keys):
+        left, right = merged[col], merged[f"{col}_fresh"]
+        if col.endswith('_total'):
+            same = (left - right).abs() <= 1e-6 * right.abs().clip(lower=1.0)
+        else:
+            same = (left == right) | (left.isna() & right.isna())
+        bad |= ~same
+    return merged.loc[bad, keys + ['_merge']]
+
+@versioned_cache
+@traced('data')
+def get_rollup(dimensions=(), **filters):
+    # Aggregates the cube by the given dimensions, with optional equality
+    # filters on any dimension, e.g. get_rollup(['year'], case_type='Bank Fraud').
+    select, where, params = [], [], []
+    for dim in dimensions:
+        expr, present = ROLLUP_DIMENSIONS[dim]
+        select.append(f"{expr} AS {dim}")
+        where.append(present)
+    for dim, value in filters.items():
+        where.append(f"{ROLLUP_DIMENSIONS[dim][0]} = ?")
+        params.append(value)
+    sql = f"SELECT {', '.join(select + [ROLLUP_MEASURES])} FROM case_rollup"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    if dimensions:
+        sql += f" GROUP BY {', '.join(str(i + 1) for i in range(len(dimensions)))}"
+    with db_connection() as conn:
+        df = pd.read_sql(sql, conn, params=params)
+    if not dimensions:
+        df = df.fillna({'cases': 0, 'amount_total': 0.0, 'amount_count': 0,
+                        'positive_amount_total': 0.0, 'positive_amount_count': 0,
+                        'amount_usd_total': 0.0, 'amount_usd_count': 0,
+                        'positive_amount_usd_total': 0.0, 'positive_amount_usd_count': 0})
+    return df
+
+# --------------------------
+# Anomaly Scoring
+# --------------------------
+# Each case is compared with its peers (same case_type, location and report
+# year) on three signals: robust z-score of log amount, robust z-score of
+# the detection-to-report lag (slow reporting only), and how far its
+# severity sits from what its amount rank within the peer group suggests.
+# A case's score is the largest of the three; ANOMALY_THRESHOLD and above is
+# flagged. Groups with fewer than ANOMALY_MIN_PEERS cases are not scored on
+# peer signals.
+ANOMALY_PEER_DIMENSIONS = ['case_type', 'location', 'year']
+ANOMALY_MIN_PEERS = 5
+ANOMALY_THRESHOLD = 3.0
+# Scales the severity gap (-1..1) so a gap of 0.9, e.g. Critical on a
+# bottom-decile amount, lands on the threshold
+ANOMALY_SEVERITY_SCALE = ANOMALY_THRESHOLD / 0.9
+SEVERITY_RANK = {level: i / (len(SEVERITY_LEVELS) - 1) for i, level in enumerate(SEVERITY_LEVELS)}
+
+def _load_anomaly_frame(conn, peer_keys=None, amount_sql='amount_usd'):
+    # Every case, or only the members of the given peer groups. Scores compare
+    # amount_sql, which only migration 8 sets to anything but amount_usd.
+    peer = ', '.join(ROLLUP_KEY_SQL[dim] for dim in ANOMALY_PEER_DIMENSIONS)
+    columns = ', '.join(f"{ROLLUP_KEY_SQL[dim]} AS {dim}" for dim in ANOMALY_PEER_DIMENSIONS)
+    columns = f"case_id, {columns}, {amount_sql} AS amount, severity, date_detected, date_reported"
+    if peer_keys is None:
+        return pd.read_sql(f"SELECT {columns} FROM cases", conn)
+    frames = []
+    for start in range(0, len(peer_keys), LOOKUP_BATCH_KEYS):
+        batch = peer_keys[start:start + LOOKUP_BATCH_KEYS]
+        # CROSS JOIN keeps peer_keys as the outer loop, so each group is one
+        # seek on idx_cases_anomaly_peer instead of a scan of cases.
+        frames.append(pd.read_sql(f'''WITH peer_keys (peer_type, peer_location, peer_year) AS
+                                        (VALUES {', '.join(['(?, ?, ?)'] * len(batch))})
+                                    SELECT {columns} FROM peer_keys CROSS JOIN cases
+                                    WHERE ({peer}) = (peer_type, peer_location, peer_year)''',
+                                  conn, params=[value for key in batch for value in key]))
+    return pd.concat([frame for frame in frames if not frame.empty] or frames[:1], ignore_index=True)
+
+def _robust_z(values, groups):
+    # 0.6745 * (x - median) / MAD within each group; falls back to the mean
+    # absolute deviation when more than half the group shares one value.
+    median = values.groupby(groups).transform('median')
+    deviation = (values - median).abs()
+    mad = deviation.groupby(groups).transform('median')
+    spread = mad.where(mad > 0, deviation.groupby(groups).transform('mean') * 1.2533 * 0.6745)
+    return (0.6745 * (values - median) / spread.where(spread > 0)).replace([np.inf, -np.inf], np.nan)
+
+def score_anomalies(df):
+    # Vectorized over the whole frame; returns one row per case in the
+    # case_anomaly column layout.
+    # Factorize the peer key once; every per-group statistic below groups
+    # on the integer id
+    groups = df.groupby(ANOMALY_PEER_DIMENSIONS, sort=False).ngroup()
+    peer_size = groups.map(groups.value_counts())
+    enough = peer_size >= ANOMALY_MIN_PEERS
+
+    amount = pd.to_numeric(df['amount'], errors='coerce')
+    amount = amount.where(amount >= 0)
+    amount_z = _robust_z(np.log1p(amount), groups).where(enough)
+
+    detected = pd.to_datetime(df['date_detected'], errors='coerce')
+    reported = pd.to_datetime(df['date_reported'], errors='coerce')
+    lag_days = (reported - detected).dt.days
+    backdated = lag_days < 0
+    lag_z = _robust_z(np.log1p(lag_days.where(~backdated)), groups).where(enough)
+
+    amount_rank = amount.groupby(groups).rank(pct=True)
+    severity_gap = (df['severity'].map(SEVERITY_RANK) - amount_rank).where(enough)
+
+    # Quick reporting is not suspicious, so only the slow tail of lag counts
+    components = pd.concat([amount_z.abs(), lag_z.clip(lower=0), severity_gap.abs() * ANOMALY_SEVERITY_SCALE], axis=1)
+    score = components.max(axis=1).fillna(0.0)
+    score = score.where(~backdated, np.maximum(score, ANOMALY_THRESHOLD))
+
+    flags = [
+        (amount_z >= ANOMALY_THRESHOLD, "amount high for peers"),
+        (amount_z <= -ANOMALY_THRESHOLD, "amount low for peers"),
+        (lag_z >= ANOMALY_THRESHOLD, "slow to be reported"),
+        (backdated, "reported before detected"),
+        (severity_gap * ANOMALY_SEVERITY_SCALE >= ANOMALY_THRESHOLD, "severity high for amount"),
+        (severity_gap * ANOMALY_SEVERITY_SCALE <= -ANOMALY_THRESHOLD, "severity low for amount"),
+    ]
+    reasons = pd.Series('', index=df.index, dtype=object)
+    for mask, text in flags:
+        reasons += np.where(mask.fillna(False), text + '; ', '')
+    reasons = reasons.str[:-2]
+
+    return pd.DataFrame({
+        'case_id': df['case_id'],
+        'case_type': df['case_type'],
+        'location': df['location'],
+        'year': df['year'],
+        'peer_size': peer_size,
+        'amount_z': amount_z.round(3),
+        'lag_days': lag_days.astype('Int64'),
+        'lag_z': lag_z.round(3),
+        'severity_gap': severity_gap.round(3),
+        'score': score.round(3),
+        'reasons': reasons.where(reasons != '', None),
+    })
+
+def _write_anomaly_scores(conn, scores):
+    columns = list(scores.columns)
+    rows = scores.astype(object).where(scores.notna(), None).itertuples(index=False, name=None)
+    conn.executemany(f'''INSERT OR REPLACE INTO case_anomaly ({', '.join(columns)})
+                         VALUES ({', '.join('?' * len(columns))})''', rows)
+
+def update_anomaly_scores(conn, first_case_id, last_case_id):
+    # Rescores every member of the peer groups the new cases joined; other
+    # groups' statistics are unchanged, so their scores stay valid.
+    peer = ', '.join(ROLLUP_KEY_SQL[dim] for dim in ANOMALY_PEER_DIMENSIONS)
+    keys = conn.execute(f"SELECT DISTINCT {peer} FROM cases WHERE case_id BETWEEN ? AND ?",
+                        (first_case_id, last_case_id)).fetchall()
+    if keys:
+        _write_anomaly_scores(conn, score_anomalies(_load_anomaly_frame(conn, keys)))
+
+@traced('data')
+def rebuild_anomaly_scores():
+    with db_connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM case_anomaly")
+            _write_anomaly_scores(conn, score_anomalies(_load_anomaly_frame(conn)))
+            bump_data_version(conn)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return conn.execute("SELECT COUNT(*) FROM case_anomaly WHERE score >= ?", (ANOMALY_THRESHOLD,)).fetchone()[0]
+
+@versioned_cache
+@traced('data')
+def get_top_anomalies(limit=25, min_score=ANOMALY_THRESHOLD):
+    with db_connection() as conn:
+        return pd.read_sql('''SELECT a.case_id, c.case_name, c.case_type, c.location, a.year,
+                                     c.amount_involved, c.currency, c.amount_usd, c.severity, a.lag_days,
+                                     a.peer_size, a.amount_z, a.lag_z, a.severity_gap, a.score, a.reasons
+                              FROM case_anomaly a JOIN cases c ON c.case_id = a.case_id
+                              WHERE a.score >= ?
+                              ORDER BY a.score DESC, a.case_id DESC
+                              LIMIT ?''', conn, params=(min_score, limit))
+
+@versioned_cache
+@traced('data')
+def get_anomaly_summary():
+    with db_connection() as conn:
+        row = conn.execute('''SELECT COUNT(*),
+                                     COUNT(CASE WHEN peer_size >= ? THEN 1 END),
+                                     COUNT(CASE WHEN score >= ? THEN 1 END)
+                              FROM case_anomaly''', (ANOMALY_MIN_PEERS, ANOMALY_THRESHOLD)).fetchone()
+    return {'cases': row[0], 'scored': row[1], 'flagged': row[2]}
+
+# --------------------------
+# Duplicate Detection
+# --------------------------
+# Cases are compared as sets of character 4-grams of their normalized name,
+# description and parties. Each case keeps a MinHash signature (estimates
+# Jaccard similarity) and is filed under DUPLICATE_BANDS LSH buckets, so a
+# new case is only compared with cases sharing a bucket. With 16 bands of 5
+# rows a pair at similarity 0.7 becomes a candidate ~95% of the time, one at
+# 0.4 ~15% of the time.
+DUPLICATE_NUM_PERM = 80
+DUPLICATE_BANDS = 16
+DUPLICATE_SIMILARITY = 0.7
+DUPLICATE_MIN_SHINGLES = 8
+DUPLICATE_TEXT_CHARS = 2000
+# Most recent bucket neighbours a case is compared with; bounds the work
+# when many cases share boilerplate text
+DUPLICATE_BUCKET_CANDIDATES = 20
+# Best matches kept per case
+DUPLICATE_MAX_MATCHES = 5
+DUPLICATE_BATCH_ROWS = 5000
+_MINHASH_PRIME = 4294967291  # largest prime below 2**32
+# Fixed seed: stored signatures are only comparable under the same hash family
+@functools.lru_cache(maxsize=None)
+def _minhash_coefficients():
+    return np.random.RandomState(20240611).randint(1, 2**31, size=(2, DUPLICATE_NUM_PERM)).astype(np.uint64)
+
+def _duplicate_text(df):
+    text = (df['case_name'].fillna('') + ' ' + df['description'].fillna('') + ' ' + df['parties_involved'].fillna(''))
+    return text.str.lower().str.replace(r'[^a-z0-9]+', ' ', regex=True).str.strip().str[:DUPLICATE_TEXT_CHARS]
+
+def minhash_signatures(df):
+    # Returns (signatures, valid): one uint32 row of DUPLICATE_NUM_PERM
+    # minima per case, and which cases had enough text to be compared.
+    # Each 4-gram is its 4 bytes read as a uint32; all cases of the frame
+    # are hashed in one pass and reduced per case with minimum.reduceat.
+    # Normalized text is ASCII, so characters and bytes line up
+    texts = _duplicate_text(df).tolist()
+    signatures = np.full((len(texts), DUPLICATE_NUM_PERM), _MINHASH_PRIME, dtype=np.uint64)
+    lengths = np.array([len(t) for t in texts], dtype=np.int64)
+    valid = lengths - 3 >= DUPLICATE_MIN_SHINGLES
+    if valid.any():
+        # Cases joined by 3 NUL bytes; the 6 grams touching each separator
+        # are dropped so no 4-gram spans two cases
+        raw = np.frombuffer('\0\0\0'.join(t for t, ok in zip(texts, valid) if ok).encode(), dtype=np.uint8)
+        raw = raw.astype(np.uint64)
+        grams = (raw[:-3] << 24) | (raw[1:-2] << 16) | (raw[2:-1] << 8) | raw[3:]
+        offsets = np.concatenate([[0], np.cumsum(lengths[valid] + 3)[:-1]])
+        keep = np.ones(len(grams), dtype=bool)
+        for back in range(1, 7):
+            keep[offsets[1:] - back] = False
+        grams = grams[keep]
+        starts = offsets - 6 * np.arange(len(offsets))
+        minima = np.empty((int(valid.sum()), DUPLICATE_NUM_PERM), dtype=np.uint64)
+        coeff_a, coeff_b = _minhash_coefficients()
+        for i in range(DUPLICATE_NUM_PERM):
+            hashed = (coeff_a[i] * grams + coeff_b[i]) % _MINHASH_PRIME
+            minima[:, i] = np.minimum.reduceat(hashed, starts)
+        signatures[valid] = minima
+    return signatures.astype(np.uint32), valid
+
+def _lsh_buckets(signatures):
+    # (n, DUPLICATE_BANDS) int64 bucket ids: each band's rows mixed with the
+    # band number into one 64-bit hash
+    rows = DUPLICATE_NUM_PERM // DUPLICATE_BANDS
+    bands = signatures.astype(np.uint64).reshape(len(signatures), DUPLICATE_BANDS, rows)
+    bucket = np.broadcast_to(np.arange(DUPLICATE_BANDS, dtype=np.uint64), bands.shape[:2]).copy()
+    with np.errstate(over='ignore'):
+        for r in range(rows):
+            bucket = bucket * np.uint64(0x100000001B3) ^ bands[:, :, r]
+    return bucket.view(np.int64)
+
+def update_duplicate_index(conn, first_case_id, last_case_id):
+    # Signs and files newly inserted cases, then flags each one against
+    # earlier cases that share an LSH bucket and whose signatures agree on
+    # at least DUPLICATE_SIMILARITY of their positions.
+    df = pd.read_sql('''SELECT case_id, case_name, description, parties_involved FROM cases
+                         WHERE case_id BETWEEN ? AND ?''', conn, params=(first_case_id, last_case_id))
+    signatures, valid = minhash_signatures(df)
+    case_ids = df['case_id'].to_numpy()[valid]
+    signatures = signatures[valid]
+    if not len(case_ids):
+        return 0
+    buckets = _lsh_buckets(signatures)
+    conn.executemany("INSERT OR REPLACE INTO case_minhash (case_id, signature) VALUES (?, ?)",
+                     zip(case_ids.tolist(), (sig.tobytes() for sig in signatures)))
+    probe = list(zip(np.repeat(case_ids, DUPLICATE_BANDS).tolist(), buckets.ravel().tolist()))
+    conn.executemany("INSERT OR IGNORE INTO case_lsh (bucket, case_id) VALUES (?, ?)", [(b, c) for c, b in probe])
+
+    # Bucket neighbours with a smaller id, newest first, at most
+    # DUPLICATE_BUCKET_CANDIDATES per bucket (the floor sub-select)
+    pairs = []
+    for start in range(0, len(probe), LOOKUP_BATCH_KEYS):
+        batch = probe[start:start + LOOKUP_BATCH_KEYS]
+        pairs.extend(conn.execute(f'''WITH probe (probe_id, probe_bucket) AS
+                                           (VALUES {', '.join(['(?, ?)'] * len(batch))})
+                                       SELECT probe_id, case_id FROM probe CROSS JOIN case_lsh
+                                       WHERE bucket = probe_bucket AND case_id < probe_id
+                                         AND case_id >= COALESCE((SELECT case_id FROM case_lsh
+                                                                   WHERE bucket = probe_bucket AND case_id < probe_id
+                                                                   ORDER BY case_id DESC LIMIT 1 OFFSET ?), 0)''',
+                                    [value for pair in batch for value in pair] + [DUPLICATE_BUCKET_CANDIDATES - 1]))
+    if not pairs:
+        return 0
+
+    # A pair sharing several buckets comes back once per bucket
+    packed = np.unique(np.array(pairs, dtype=np.int64) @ np.array([1 << 32, 1], dtype=np.int64))
+    pairs = np.column_stack([packed >> 32, packed & 0xFFFFFFFF])
+    ids, sigs = [case_ids], [signatures]
+    older = np.setdiff1d(pairs[:, 1], case_ids).tolist()
+    for start in range(0, len(older), LOOKUP_BATCH_KEYS):
+        batch = older[start:start + LOOKUP_BATCH_KEYS]
+        rows = conn.execute(f"SELECT case_id, signature FROM case_minhash WHERE case_id IN ({', '.join('?' * len(batch))})",
+                            batch).fetchall()
+        if rows:
+            ids.append(np.array([row[0] for row in rows], dtype=np.int64))
+            sigs.append(np.frombuffer(b''.join(row[1] for row in rows), dtype=np.uint32).reshape(len(rows), -1))
+    ids, sigs = np.concatenate(ids), np.concatenate(sigs)
+    order = np.argsort(ids)
+    ids, sigs = ids[order], sigs[order]
+    left = np.searchsorted(ids, pairs[:, 0])
+    right = np.searchsorted(ids, pairs[:, 1])
+    similarity = (sigs[left] == sigs[right]).mean(axis=1)
+
+    hits = pd.DataFrame({'case_id': pairs[:, 0], 'duplicate_of': pairs[:, 1], 'similarity': similarity.round(3)})
+    hits = hits[hits['similarity'] >= DUPLICATE_SIMILARITY]
+    hits = hits.sort_values(['case_id', 'similarity', 'duplicate_of'], ascending=[True, False, False])
+    hits = hits[hits.groupby('case_id').cumcount() < DUPLICATE_MAX_MATCHES]
+    conn.executemany("INSERT OR REPLACE INTO case_duplicates (case_id, duplicate_of, similarity) VALUES (?, ?, ?)",
+                     hits.itertuples(index=False, name=None))
+    return len(hits)
+
+@traced('data')
+def get_case_duplicates(first_case_id, last_case_id=None):
+    # Likely duplicates flagged for a block of cases, best match first
+    with db_connection() as conn:
+        return pd.read_sql('''SELECT d.case_id, c.case_name, d.duplicate_of, o.case_name AS duplicate_name,
+                                     o.date_reported AS duplicate_reported, d.similarity
+                              FROM case_duplicates d
+                              JOIN cases c ON c.case_id = d.case_id
+                              JOIN cases o ON o.case_id = d.duplicate_of
+                              WHERE d.case_id BETWEEN ? AND ?
+                              ORDER BY d.case_id, d.similarity DESC''', conn,
+                           params=(first_case_id, last_case_id or first_case_id))
+
+# --------------------------
+# Entity Graph
+# --------------------------
+# Parties, agencies and courts named on each case are normalized into
+# entities and linked through case_entities. Two cases are connected when
+# they share an entity, so the graph is bipartite: case - entity - case.
+ENTITY_KINDS = {
+    'party': "Party",
+    'agency': "Agency",
+    'court': "Court",
+    'court_case': "Court reference",
+}
+# Kinds that link cases by default; agencies and court codes are shared by
+# most cases and say little about a connection
+ENTITY_LINK_KINDS = ('party', 'court_case')
+ENTITY_SPLIT_PATTERN = r'[,;\n]+'
+ENTITY_BATCH_ROWS = 5000
+# Entities linked to more cases than this (e.g. "ZACC", "Govt officials")
+# connect nearly everything, so graph queries skip them by default
+ENTITY_HUB_DEGREE = 50
+ENTITY_GRAPH_MAX_NODES = 300
+
+def _entity_key(names):
+    return names.str.lower().str.replace(r'[^a-z0-9]+', ' ', regex=True).str.strip()
+
+def extract_case_entities(df):
+    # (case_id, kind, name_key, name) for every entity named on the cases:
+    # each party and agency of the comma lists, the court reference and the
+    # court code it starts with (HC, MC, CRB, ...)
+    parts = []
+    for kind, column in (('party', 'parties_involved'), ('agency', 'investigation_agency')):
+        names = df[column].fillna('').astype(str).str.split(ENTITY_SPLIT_PATTERN, regex=True)
+        parts.append(pd.DataFrame({'case_id': df['case_id'], 'kind': kind, 'name': names}).explode('name'))
+    reference = df['court_reference'].fillna('').astype(str)
+    parts.append(pd.DataFrame({'case_id': df['case_id'], 'kind': 'court_case', 'name': reference}))
+    court = reference.str.extract(r'^\s*([A-Za-z]+)', expand=False).str.upper()
+    parts.append(pd.DataFrame({'case_id': df['case_id'], 'kind': 'court', 'name': court}))
+    links = pd.concat(parts, ignore_index=True).dropna(subset=['name'])
+    links['name'] = links['name'].str.strip().str.replace(r'\s+', ' ', regex=True)
+    links['name_key'] = _entity_key(links['name'])
+    links = links[links['name_key'] != '']
+    return links.drop_duplicates(['case_id', 'kind', 'name_key'])[['case_id', 'kind', 'name_key', 'name']]
+
+def update_case_entities(conn, first_case_id, last_case_id):
+    # Links newly inserted cases to their (possibly new) entities and bumps
+    # each entity's case_count; runs inside the caller's transaction.
+    df = pd.read_sql('''SELECT case_id, parties_involved, investigation_agency, court_reference
+                         FROM cases WHERE case_id BETWEEN ? AND ?''', conn, params=(first_case_id, last_case_id))
+    links = extract_case_entities(df)
+    if links.empty:
+        return 0
+    names = links.drop_duplicates(['kind', 'name_key'])[['kind', 'name_key', 'name']]
+    conn.executemany('''INSERT INTO entities (kind, name_key, name) VALUES (?, ?, ?)
+                         ON CONFLICT (kind, name_key) DO NOTHING''', names.itertuples(index=False, name=None))
+    keys = list(names[['kind', 'name_key']].itertuples(index=False, name=None))
+    ids = []
+    for start in range(0, len(keys), LOOKUP_BATCH_KEYS):
+        batch = keys[start:start + LOOKUP_BATCH_KEYS]
+        ids.extend(conn.execute(f'''WITH wanted (wanted_kind, wanted_key) AS
+                                         (VALUES {', '.join(['(?, ?)'] * len(batch))})
+                                     SELECT entity_id, kind, name_key FROM wanted CROSS JOIN entities
+                                     WHERE kind = wanted_kind AND name_key = wanted_key''',
+                                  [value for key in batch for value in key]))
+    ids = pd.DataFrame(ids, columns=['entity_id', 'kind', 'name_key'])
+    links = links.merge(ids, on=['kind', 'name_key'])[['case_id', 'entity_id']]
+    before = conn.total_changes
+    conn.executemany("INSERT OR IGNORE INTO case_entities (case_id, entity_id) VALUES (?, ?)",
+                     links.itertuples(index=False, name=None))
+    if conn.total_changes - before != len(links):
+        # Some links already existed (cases re-indexed); recount from scratch
+        entity_ids = ids['entity_id'].tolist()
+        for start in range(0, len(entity_ids), LOOKUP_BATCH_KEYS):
+            batch = entity_ids[start:start + LOOKUP_BATCH_KEYS]
+            conn.execute(f'''UPDATE entities SET case_count =
+                                  (SELECT COUNT(*) FROM case_entities ce WHERE ce.entity_id = entities.entity_id)
+                              WHERE entity_id IN ({', '.join('?' * len(batch))})''', batch)
+    else:
+        counts = links.groupby('entity_id').size()
+        conn.executemany("UPDATE entities SET case_count = case_count + ? WHERE entity_id = ?",
+                         zip(counts.tolist(), counts.index.tolist()))
+    return len(links)
+
+@versioned_cache
+@traced('data')
+def get_entity_graph(kinds=ENTITY_LINK_KINDS, max_degree=ENTITY_HUB_DEGREE):
+    # CSR adjacency in both directions (case -> entities, entity -> cases),
+    # indexed directly by case_id / entity_id, over entities of the given
+    # kinds linked to at most max_degree cases.
+    with db_connection() as conn:
+        edges = pd.read_sql(f'''SELECT ce.case_id, ce.entity_id
+                                 FROM entities e JOIN case_entities ce ON ce.entity_id = e.entity_id
+                                 WHERE e.kind IN ({', '.join('?' * len(kinds))}) AND e.case_count <= ?''',
+                            conn, params=[*kinds, max_degree])
+        n_cases = conn.execute("SELECT COALESCE(MAX(case_id), 0) + 1 FROM cases").fetchone()[0]
+        n_entities = conn.execute("SELECT COALESCE(MAX(entity_id), 0) + 1 FROM entities").fetchone()[0]
+    case_ids = edges['case_id'].to_numpy(np.int64)
+    entity_ids = edges['entity_id'].to_numpy(np.int64)
+    by_case = np.argsort(case_ids, kind='stable')
+    by_entity = np.argsort(entity_ids, kind='stable')
+    return {
+        'case_ptr': np.concatenate([[0], np.cumsum(np.bincount(case_ids, minlength=n_cases))]),
+        'case_adj': entity_ids[by_case],
+        'entity_ptr': np.concatenate([[0], np.cumsum(np.bincount(entity_ids, minlength=n_entities))]),
+        'entity_adj': case_ids[by_entity],
+    }
+
+def _csr_gather(ptr, adj, nodes):
+    # (source, neighbour) pairs for every neighbour of every node, vectorized
+    starts, lengths = ptr[nodes], ptr[nodes + 1] - ptr[nodes]
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return np.repeat(nodes, lengths), adj[np.repeat(starts, lengths) + offsets]
+
+@traced('data')
+def case_neighbourhood(case_id, depth=1, kinds=ENTITY_LINK_KINDS, max_degree=ENTITY_HUB_DEGREE):
+    # Breadth-first search from one case over the adjacency index. One hop
+    # is case -> shared entity -> case. Returns the cases and entities
+    # reached with their hop number, and the case-entity edges walked.
+    graph = get_entity_graph(kinds, max_degree)
+    case_hops = np.full(len(graph['case_ptr']) - 1, -1)
+    entity_hops = np.full(len(graph['entity_ptr']) - 1, -1)
+    edges = []
+    if 0 <= case_id < len(case_hops):
+        case_hops[case_id] = 0
+        frontier = np.array([case_id])
+        for hop in range(1, depth + 1):
+            sources, entities = _csr_gather(graph['case_ptr'], graph['case_adj'], frontier)
+            edges.append((sources, entities))
+            entities = np.unique(entities[entity_hops[entities] < 0])
+            entity_hops[entities] = hop
+            entities, cases = _csr_gather(graph['entity_ptr'], graph['entity_adj'], entities)
+            edges.append((cases, entities))
+            frontier = np.unique(cases[case_hops[cases] < 0])
+            case_hops[frontier] = hop
+            if not len(frontier):
+                break
+    reached = np.flatnonzero(case_hops >= 0)
+    named = np.flatnonzero(entity_hops >= 0)
+    edges = pd.DataFrame({
+        'case_id': np.concatenate([e[0] for e in edges]) if edges else np.array([], dtype=np.int64),
+        'entity_id': np.concatenate([e[1] for e in edges]) if edges else np.array([], dtype=np.int64),
+    }).drop_duplicates()
+    return {
+        'cases': pd.DataFrame({'case_id': reached, 'hops': case_hops[reached]}),
+        'entities': pd.DataFrame({'entity_id': named, 'hops': entity_hops[named]}),
+        'edges': edges,
+    }
+
+@versioned_cache
+@traced('data')
+def get_case_components(kinds=ENTITY_LINK_KINDS, max_degree=ENTITY_HUB_DEGREE):
+    # Connected components of the case graph with a vectorized union-find:
+    # every case of an entity is unioned with the entity's first case, roots
+    # hook onto the smaller root, and pointer jumping compresses the paths
+    # until no edge spans two components. Cases without shared entities are
+    # left out.
+    graph = get_entity_graph(kinds, max_degree)
+    ptr, adj = graph['entity_ptr'], graph['entity_adj']
+    entities, right = _csr_gather(ptr, adj, np.flatnonzero(np.diff(ptr) > 1))
+    left = adj[ptr[entities]]
+    parent = np.arange(len(graph['case_ptr']) - 1)
+    while True:
+        root_left, root_right = parent[left], parent[right]
+        split = root_left != root_right
+        if not split.any():
+            break
+        np.minimum.at(parent, np.maximum(root_left[split], root_right[split]),
+                      np.minimum(root_left[split], root_right[split]))
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+    members = np.unique(np.concatenate([left, right]))
+    components = pd.DataFrame({'case_id': members, 'component': parent[members]})
+    components['size'] = components.groupby('component')['case_id'].transform('size')
+    return components
+
+def entity_graph_figure(hood, center_case_id):
+    # Radial layout: the centre case, then alternating rings of entities and
+    # cases by hop. Only the first ENTITY_GRAPH_MAX_NODES nodes are drawn.
+    cases = hood['cases'].sort_values(['hops', 'case_id']).head(ENTITY_GRAPH_MAX_NODES)
+    entities = hood['entities'].sort_values(['hops', 'entity_id']).head(ENTITY_GRAPH_MAX_NODES - len(cases))
+    nodes = pd.concat([
+        pd.DataFrame({'key': 'c' + cases['case_id'].astype(str), 'ring': cases['hops'] * 2, 'kind': 'case',
+                      'id': cases['case_id']}),
+        pd.DataFrame({'key': 'e' + entities['entity_id'].astype(str), 'ring': entities['hops'] * 2 - 1, 'kind': 'entity',
+                      'id': entities['entity_id']}),
+    ], ignore_index=True)
+    angle = 2 * np.pi * nodes.groupby('ring').cumcount() / nodes.groupby('ring')['key'].transform('size')
+    nodes['x'] = nodes['ring'] * np.cos(angle)
+    nodes['y'] = nodes['ring'] * np.sin(angle)
+
+    case_names = get_cases_by_id(cases['case_id'], ('case_id', 'case_name')).set_index('case_id')['case_name']
+    entity_info = get_entities_by_id(entities['entity_id']).set_index('entity_id')
+    is_case = nodes['kind'] == 'case'
+    nodes['label'] = np.where(is_case, '#' + nodes['id'].astype(str) + ' ' + nodes['id'].map(case_names).fillna(''),
+                              nodes['id'].map(entity_info['kind']).map(ENTITY_KINDS).fillna('') + ': '
+                              + nodes['id'].map(entity_info['name']).fillna(''))
+
+    position = nodes.set_index('key')[['x', 'y']]
+    edges = hood['edges']
+    edges = pd.DataFrame({'a': 'c' + edges['case_id'].astype(str), 'b': 'e' + edges['entity_id'].astype(str)})
+    edges = edges[edges['a'].isin(position.index) & edges['b'].isin(position.index)]
+    # One line trace with None breaks between segments
+    xs = np.column_stack([position.loc[edges['a'], 'x'], position.loc[edges['b'], 'x'], np.full(len(edges), np.nan)]).ravel()
+    ys = np.column_stack([position.loc[edges['a'], 'y'], position.loc[edges['b'], 'y'], np.full(len(edges), np.nan)]).ravel()
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=xs, y=ys, mode='lines', line=dict(color='#c3cfe2', width=1), hoverinfo='skip', showlegend=False))
+    for kind, color, symbol in (('entity', '#764ba2', 'diamond'), ('case', '#667eea', 'circle')):
+        part = nodes[nodes['kind'] == kind]
+        fig.add_trace(go.Scatter(x=part['x'], y=part['y'], mode='markers', name=kind.title() + 's',
+                                 marker=dict(color=color, symbol=symbol, size=10, line=dict(color='white', width=1)),
+                                 text=part['label'], hoverinfo='text'))
+    center = nodes[nodes['key'] == f'c{center_case_id}']
+    fig.add_trace(go.Scatter(x=center['x'], y=center['y'], mode='markers', name="Selected case",
+                             marker=dict(color='#e63946', size=16), text=center['label'], hoverinfo='text'))
+    fig.update_layout(height=550, xaxis=dict(visible=False), yaxis=dict(visible=False, scaleanchor='x'),
+                      margin=dict(l=10, r=10, t=10, b=10), plot_bgcolor='white')
+    return fig
+
+@traced('data')
+def get_cases_by_id(case_ids, columns=('case_id', 'case_name', 'case_type', 'location', 'date_reported', 'severity')):
+    case_ids = [int(c) for c in case_ids]
+    frames = []
+    with db_connection() as conn:
+        for start in range(0, len(case_ids), LOOKUP_BATCH_KEYS):
+            batch = case_ids[start:start + LOOKUP_BATCH_KEYS]
+            frames.append(pd.read_sql(f"SELECT {', '.join(columns)} FROM cases WHERE case_id IN ({', '.join('?' * len(batch))})",
+                                      conn, params=batch))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=list(columns))
+
+@traced('data')
+def get_entities_by_id(entity_ids):
+    entity_ids = [int(e) for e in entity_ids]
+    frames = []
+    with db_connection() as conn:
+        for start in range(0, len(entity_ids), LOOKUP_BATCH_KEYS):
+            batch = entity_ids[start:start + LOOKUP_BATCH_KEYS]
+            frames.append(pd.read_sql(f"""SELECT entity_id, kind, name, case_count FROM entities
+                                          WHERE entity_id IN ({', '.join('?' * len(batch))})""", conn, params=batch))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['entity_id', 'kind', 'name', 'case_count'])
+
+# --------------------------
+# Dashboard Data
+# --------------------------
+@versioned_cache
+@traced('data')
+def get_dashboard_summary(top_n=10):
+    # All Summary Dashboard KPIs come from the rollup cube, so only a few
+    # dozen rows are read no matter how large the cases table grows.
+    with db_connection():
+        totals = get_rollup().iloc[0]
+        yearly_counts = get_rollup(['year'])[['year', 'cases']].sort_values('year', ignore_index=True)
+        by_type = get_rollup(['case_type'])
+    top_types = by_type.nlargest(top_n, 'cases')[['case_type', 'cases']]
+    top_amounts = by_type.nlargest(top_n, 'amount_usd_total')[['case_type', 'amount_usd_total']]
+    return {
+        'total_cases': int(totals['cases']),
+        'total_amount': float(totals['amount_usd_total']),
+        'avg_amount': float(totals['amount_usd_total'] / totals['amount_usd_count']) if totals['amount_usd_count'] else 0.0,
+        'yearly_counts': yearly_counts,
+        'top_types': top_types.reset_index(drop=True),
+        'top_amounts': top_amounts.reset_index(drop=True),
+    }
+
+# --------------------------
+# Report Queries
+# --------------------------
+REPORT_PAGE_SIZES = [25, 50, 100, 250, 500]
+
+def _report_year_ranges(years):
+    # Report years as half-open date_reported ranges, consecutive years
+    # merged, e.g. [2019, 2020, 2023] -> ('2019-01-01', '2021-01-01'),
+    # ('2023-01-01', '2024-01-01'). Unlike REPORT_YEAR_SQL IN (...), a range
+    # is answered from idx_cases_date_reported or
+    # idx_cases_type_severity_date alone.
+    ranges = []
+    for year in sorted({int(year) for year in years}):
+        if ranges and ranges[-1][1] == year:
+            ranges[-1][1] = year + 1
+        else:
+            ranges.append([year, year + 1])
+    return [(f"{first:04d}-01-01", f"{end:04d}-01-01") for first, end in ranges]
+
+def _report_filter_sql(case_types=(), severities=(), years=()):
+    # Multiselect filters as a parameterized WHERE clause; an empty
+    # selection means "no filter", as in the old pandas version.
+    clauses, params = [], []
+    for column, values in (('case_type', case_types), ('severity', severities)):
+        if values:
+            clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+    if years:
+        ranges = _report_year_ranges(years)
+        clauses.append(f"({' OR '.join(['(date_reported >= ? AND date_reported < ?)'] * len(ranges))})")
+        params.extend(bound for year_range in ranges for bound in year_range)
+    return clauses, params
+
+@versioned_cache
+@traced('data')
+def get_report_years():
+    # The rollup's primary key starts with the year, so this walks that
+    # index instead of every case
+    with db_connection() as conn:
+        rows = conn.execute("SELECT DISTINCT year FROM case_rollup WHERE year <> 0 ORDER BY year DESC").fetchall()
+    return [row[0] for row in rows]
+
+@versioned_cache
+@traced('data')
+def count_report_cases(case_types=(), severities=(), years=()):
+    clauses, params = _report_filter_sql(case_types, severities, years)
+    sql = "SELECT COUNT(*) FROM cases"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    with db_connection() as conn:
+        return conn.execute(sql, params).fetchone()[0]
+
+@versioned_cache
+@traced('data')
+def get_report_page(case_types=(), severities=(), years=(), page_size=50, after=None):
+    # Keyset pagination over (date_reported DESC, case_id DESC). The dated
+    # rows are a row-value range seek on the date_reported index (rowid is
+    # its implicit last column); rows without a date sort last and are read
+    # as a second segment. `after` is the (date_reported, case_id) of the
+    # previous page's last row; returns the page and the next page's cursor
+    # (None on the last page).
+    clauses, params = _report_filter_sql(case_types, severities, years)
+    limit = page_size + 1
+    segments = []
+    if after is None or after[0] is not None:
+        dated = clauses + ["date_reported IS NOT NULL"]
+        dated_params = list(params)
+        if after is not None:
+            dated.append("(date_reported, case_id) < (?, ?)")
+            dated_params.extend(after)
+        segments.append((dated, dated_params, "date_reported DESC, case_id DESC"))
+    undated = clauses + ["date_reported IS NULL"]
+    undated_params = list(params)
+    if after is not None and after[0] is None:
+        undated.append("case_id < ?")
+        undated_params.append(after[1])
+    segments.append((undated, undated_params, "case_id DESC"))
+
+    frames = []
+    with db_connection() as conn:
+        for where, seg_params, order in segments:
+            if limit <= 0:
+                break
+            df = pd.read_sql(f"SELECT * FROM cases WHERE {' AND '.join(where)} ORDER BY {order} LIMIT ?",
+                             conn, params=seg_params + [limit])
+            if not df.empty:
+                frames.append(df)
+            limit -= len(df)
+
+    next_cursor = None
+    if limit <= 0:
+        # The extra row only says there is another page; the cursor is the
+        # raw date_reported text of the row before it
+        frames[-1] = frames[-1].iloc[:-1]
+        frames = [f for f in frames if not f.empty]
+        last = frames[-1].iloc[-1]
+        next_cursor = (None if pd.isna(last['date_reported']) else last['date_reported'], int(last['case_id']))
+    if not frames:
+        return _typed_case_frame(df.iloc[:0]), None
+    # Typed per segment, so an all-NULL column in the undated rows does not
+    # decide the dtype of the concatenated page
+    return _concat_case_frames([_typed_case_frame(f) for f in frames]), next_cursor
+
+# --------------------------
+# Report Export
+# --------------------------
+EXPORT_CHUNK_ROWS = 5000
+EXPORT_SPOOL_BYTES = 16 * 1024 * 1024
+EXCEL_MAX_ROWS = 1048576
+EXPORT_FORMATS = {
+    "CSV": ("fraud_cases_report.csv", "text/csv"),
+    "CSV (gzip)": ("fraud_cases_report.csv.gz", "application/gzip"),
+    "Excel": ("fraud_cases_report.xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+def _report_rows_cursor(conn, case_types=(), severities=(), years=()):
+    clauses, params = _report_filter_sql(case_types, severities, years)
+    sql = "SELECT * FROM cases"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY date_reported DESC, case_id DESC"
+    return conn.execute(sql, params)
+
+def export_report_csv(case_types=(), severities=(), years=(), compress=False):
+    # Streams matching rows from the cursor in chunks into a spooled buffer
+    # (RAM up to EXPORT_SPOOL_BYTES, then an anonymous temp file), so memory
+    # stays bounded whatever the row count and sessions never share a file.
+    spool = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_BYTES)
+    raw = gzip.GzipFile(fileobj=spool, mode='wb') if compress else spool
+    text = io.TextIOWrapper(raw, encoding='utf-8', newline='')
+    writer = csv.writer(text)
+    with db_connection() as conn:
+        cursor = _report_rows_cursor(conn, case_types, severities, years)
+        writer.writerow([col[0] for col in cursor.description])
+        while True:
+            rows = cursor.fetchmany(EXPORT_CHUNK_ROWS)
+            if not rows:
+                break
+            writer.writerows(rows)
+    text.flush()
+    text.detach()
+    if compress:
+        raw.close()
+    spool.seek(0)
+    return spool
+
+def export_report_excel(case_types=(), severities=(), years=()):
+    import xlsxwriter
+
+    # constant_memory flushes each row to disk as it is written, so the
+    # workbook never holds the report in memory.
+    spool = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_BYTES)
+    workbook = xlsxwriter.Workbook(spool, {'constant_memory': True, 'strings_to_urls': False,
+                                           'default_date_format': 'yyyy-mm-dd hh:mm:ss'})
+    with db_connection() as conn:
+        cursor = _report_rows_cursor(conn, case_types, severities, years)
+        columns = [col[0] for col in cursor.description]
+        date_cols = [i for i, col in enumerate(columns) if col in CASE_DATE_COLUMNS]
+        sheet, row_no = None, EXCEL_MAX_ROWS
+        while True:
+            rows = cursor.fetchmany(EXPORT_CHUNK_ROWS)
+            if not rows:
+                break
+            for row in rows:
+                if row_no == EXCEL_MAX_ROWS:
+                    # Roll over to a new sheet at Excel's row limit
+                    name = "Report" if sheet is None else f"Report {len(workbook.worksheets()) + 1}"
+                    sheet = workbook.add_worksheet(name)
+                    sheet.write_row(0, 0, columns)
+                    row_no = 1
+                row = list(row)
+                for col_no in date_cols:
+                    if row[col_no]:
+                        try:
+                            row[col_no] = datetime.fromisoformat(row[col_no])
+                        except (TypeError, ValueError):
+                            pass
+                sheet.write_row(row_no, 0, row)
+                row_no += 1
+        if sheet is None:
+            workbook.add_worksheet("Report").write_row(0, 0, columns)
+    workbook.close()
+    spool.seek(0)
+    return spool
+
+@traced('data')
+def export_report(export_format, case_types=(), severities=(), years=()):
+    if export_format == "Excel":
+        return export_report_excel(case_types, severities, years)
+    return export_report_csv(case_types, severities, years, compress=export_format == "CSV (gzip)")
+
+# --------------------------
+# Bulk Import
+# --------------------------
+IMPORT_CHUNK_ROWS = 5000
+IMPORT_DATE_COLUMNS = ['date_detected', 'date_reported', 'date_resolved']
+IMPORT_TEXT_COLUMNS = ['case_name', 'case_type', 'description', 'location', 'currency',
+                       'parties_involved', 'investigation_agency', 'court_reference',
+                       'source_url', 'created_by', 'severity']
+
+# Header spellings seen in agency feeds and in the Case Builder form labels
+IMPORT_COLUMN_ALIASES = {
+    'name': 'case_name',
+    'type': 'case_type',
+    'amount': 'amount_involved',
+    'parties': 'parties_involved',
+    'agency': 'investigation_agency',
+    'court_ref': 'court_reference',
+    'source': 'source_url',
+}
+
+def _normalize_import_header(name):
+    key = str(name).strip().lower().replace(' ', '_').replace('-', '_')
+    key = key.replace('(optional)', '').strip('_')
+    return IMPORT_COLUMN_ALIASES.get(key, key)
+
+def iter_import_chunks(source, file_name, chunk_rows=IMPORT_CHUNK_ROWS):
+    # Yields DataFrames of at most chunk_rows raw rows from a CSV or XLSX
+    # file, so large feeds are never loaded whole.
+    if str(file_name).lower().endswith(('.xlsx', '.xlsm')):
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(source, read_only=True, data_only=True)
+        try:
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            columns = [_normalize_import_header(h) for h in header]
+            while True:
+                chunk = [row for _, row in zip(range(chunk_rows), rows)]
+                if not chunk:
+                    break
+                yield pd.DataFrame(chunk, columns=columns, dtype=object)
+        finally:
+            workbook.close()
+    else:
+        for chunk in pd.read_csv(source, chunksize=chunk_rows, dtype=str, keep_default_na=False):
+            chunk.columns = [_normalize_import_header(c) for c in chunk.columns]
+            yield chunk
+
+def validate_import_chunk(raw, created_by, first_line):
+    # Coerces one raw chunk to the cases schema column by column. Returns the
+    # rows ready for CASE_INSERT_SQL and a frame of rejected rows with reasons.
+    n = len(raw)
+    data = pd.DataFrame(index=raw.index)
+    errors = pd.Series('', index=raw.index)
+
+    def reject(mask, reason):
+        errors[mask] = errors[mask] + reason + '; '
+
+    for col in IMPORT_TEXT_COLUMNS:
+        if col in raw.columns:
+            values = raw[col].astype(object).where(raw[col].notna(), '').astype(str).str.strip()
+            data[col] = values.where(values != '', None)
+        else:
+            data[col] = None
+
+    reject(data['case_name'].isna(), "case_name is required")
+
+    if 'amount_involved' in raw.columns:
+        text = raw['amount_involved'].astype(object).where(raw['amount_involved'].notna(), '').astype(str)
+        text = text.str.replace(',', '', regex=False).str.strip()
+        amounts = pd.to_numeric(text, errors='coerce')
+        reject(amounts.isna() & (text != ''), "amount_involved is not a number")
+        reject(amounts < 0, "amount_involved is negative")
+        data['amount_involved'] = amounts.astype(object).where(amounts.notna(), None)
+    else:
+        data['amount_involved'] = None
+
+    data['currency'] = data['currency'].str.upper().fillna('USD')
+    reject(~data['currency'].isin(CURRENCIES), f"currency must be one of {', '.join(CURRENCIES)}")
+
+    severity = data['severity'].str.capitalize()
+    reject(severity.notna() & ~severity.isin(SEVERITY_LEVELS),
+           f"severity must be one of {', '.join(SEVERITY_LEVELS)}")
+    data['severity'] = severity
+
+    for col in IMPORT_DATE_COLUMNS:
+        if col not in raw.columns:
+            data[col] = None
+            continue
+        present = raw[col].notna() & (raw[col].astype(str).str.strip() != '')
+        parsed = pd.to_datetime(raw[col].where(present), errors='coerce', format='mixed')
+        reject(present & parsed.isna(), f"{col} is not a valid date")
+        data[col] = parsed.dt.strftime('%Y-%m-%d').where(parsed.notna(), None)
+
+    data['created_by'] = data['created_by'].fillna(created_by)
+
+    ok = errors == ''
+    rows = list(data.loc[ok, CASE_INSERT_COLUMNS].itertuples(index=False, name=None))
+    rejects = pd.DataFrame({
+        'line': raw.index[~ok] - raw.index[0] + first_line,
+        'case_name': data.loc[~ok, 'case_name'],
+        'reason': errors[~ok].str.rstrip('; '),
+    })
+    return rows, rejects
+
+@traced('data')
+def import_cases(source, file_name, created_by, dry_run=False, chunk_rows=IMPORT_CHUNK_ROWS, progress=None):
+    # Streams a CSV/XLSX feed in chunks, validates each chunk vectorially and
+    # inserts the good rows with executemany, all in one transaction. Derived
+    # tables are updated once at the end over the import's id range, which is
+    # contiguous since the write lock is held throughout. `progress` is called
+    # with the number of rows processed so far.
+    inserted, processed = 0, 0
+    reject_frames = []
+    first_id = last_id = None
+    with db_connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for raw in iter_import_chunks(source, file_name, chunk_rows):
+                # +2: header line, and file lines are 1-based
+                rows, rejects = validate_import_chunk(raw.reset_index(drop=True), created_by, processed + 2)
+                processed += len(raw)
+                if not rejects.empty:
+                    reject_frames.append(rejects)
+                if rows and not dry_run:
+                    if first_id is None:
+                        first_id = conn.execute("SELECT COALESCE(MAX(case_id), 0) + 1 FROM cases").fetchone()[0]
+                    conn.executemany(CASE_INSERT_SQL, rows)
+                inserted += len(rows)
+                if progress is not None:
+                    progress(processed)
+            if first_id is not None:
+                last_id = conn.execute("SELECT MAX(case_id) FROM cases").fetchone()[0]
+                after_cases_inserted(conn, first_id, last_id)
+            if dry_run:
+                conn.rollback()
+            else:
+                conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    rejects = (pd.concat(reject_frames, ignore_index=True) if reject_frames
+               else pd.DataFrame(columns=['line', 'case_name', 'reason']))
+    duplicates = get_case_duplicates(first_id, last_id) if last_id is not None and not dry_run else None
+    return {
+        'rows': processed,
+        'inserted': 0 if dry_run else inserted,
+        'valid': inserted,
+        'rejected': len(rejects),
+        'rejects': rejects,
+        'first_case_id': first_id,
+        'last_case_id': last_id,
+        'duplicates': duplicates,
+        'dry_run': dry_run,
+    }
+
+# --------------------------
+# Case Search
+# --------------------------
+SEARCH_PAGE_SIZE = 20
+SEARCH_SNIPPET_TOKENS = 16
+# bm25 has to score every match before it can sort, so very broad queries
+# are ranked over their most recent SEARCH_RANK_WINDOW matches only.
+SEARCH_RANK_WINDOW = 20000
+# Control characters mark snippet hits so the text can be HTML-escaped
+# before the markers become <mark> tags.
+SEARCH_HIT_START, SEARCH_HIT_END = '\x02', '\x03'
+
+_SEARCH_TOKEN_RE = re.compile(r'"([^"]*)"|(\S+)')
+
+def build_search_query(text):
+    # Turns what users type into a safe FTS5 MATCH expression: "quoted
+    # phrases" stay phrases, a trailing * makes a prefix query, OR between
+    # terms is kept and every other term is quoted so punctuation in case
+    # references cannot break the query syntax. Terms are ANDed.
+    parts = []
+    for phrase, word in _SEARCH_TOKEN_RE.findall(text or ''):
+        if word == 'OR':
+            if parts and parts[-1] != 'OR':
+                parts.append('OR')
+            continue
+        term = phrase if phrase else word.replace('"', '')
+        prefix = not phrase and term.endswith('*')
+        term = term.rstrip('*').strip().replace('"', '""')
+        if term:
+            parts.append(f'"{term}"' + ('*' if prefix else ''))
+    while parts and parts[-1] == 'OR':
+        parts.pop()
+    return ' '.join(parts)
+
+@versioned_cache
+@traced('data')
+def count_search_matches(query):
+    match = build_search_query(query)
+    if not match:
+        return 0
+    with db_connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM cases_fts WHERE cases_fts MATCH ?", (match,)).fetchone()[0]
+
+# Best bm25 matches first (the cases_fts rank is configured with the column
+# weights). The rowid floor is pushed into FTS5, which then only reads the
+# doclists above it.
+SEARCH_PAGE_SQL = f'''SELECT c.case_id, c.case_name, c.case_type, c.location, c.severity, c.date_reported,
+                             snippet(cases_fts, -1, ?, ?, ' … ', {SEARCH_SNIPPET_TOKENS}) AS snippet,
+                             cases_fts.rank AS score
+                      FROM cases_fts JOIN cases c ON c.case_id = cases_fts.rowid
+                      WHERE cases_fts MATCH ? AND cases_fts.rowid >= ?
+                      ORDER BY cases_fts.rank
+                      LIMIT ? OFFSET ?'''
+
+def _search_rank_floor(conn, match):
+    # Lowest case_id inside the ranking window: the SEARCH_RANK_WINDOW-th
+    # newest match, or 0 when the query matches fewer cases than that.
+    row = conn.execute("""SELECT rowid FROM cases_fts WHERE cases_fts MATCH ?
+                          ORDER BY rowid DESC LIMIT 1 OFFSET ?""", (match, SEARCH_RANK_WINDOW - 1)).fetchone()
+    return row[0] if row else 0
 
+@versioned_cache
+@traced('data')
+def search_cases(query, page=0, page_size=SEARCH_PAGE_SIZE):
+    # Ranked results page by offset: the order only exists per query, and
+    # the window keeps the ranked set bounded.
+    match = build_search_query(query)
+    if not match:
+        return pd.DataFrame(columns=['case_id', 'case_name', 'case_type', 'location', 'severity',
+                                     'date_reported', 'snippet', 'score'])
+    with db_connection() as conn:
+        floor = _search_rank_floor(conn, match)
+        return pd.read_sql(SEARCH_PAGE_SQL, conn,
+                           params=(SEARCH_HIT_START, SEARCH_HIT_END, match, floor, page_size, page * page_size))
+
+def search_snippet_html(snippet):
+    text = html.escape(snippet or '')
+    return text.replace(SEARCH_HIT_START, '<mark>').replace(SEARCH_HIT_END, '</mark>')
+
+
+def is_admin():
+    return st.session_state.get('username') == ADMIN_USERNAME
 
 def make_hashes(password):
     return hashlib.sha256(password.encode()).hexdigest()
@@ -280,24 +3104,25 @@ def check_hashes(password, hashed_text):
     return make_hashes(password) == hashed_text
 
 
+@traced('data')
 def create_user(username, password):
-    try:
-        conn = sqlite3.connect('fraudcases.db')
-        c = conn.cursor()
-        c.execute('INSERT INTO users (username, password) VALUES (?,?)', 
-                  (username, make_hashes(password)))
-        conn.commit()
-        conn.close()
-        return True
-    except sqlite3.IntegrityError:
-        return False
+    with db_connection() as conn:
+        try:
+            c = conn.cursor()
+            c.execute('INSERT INTO users (username, password) VALUES (?,?)', 
+                      (username, make_hashes(password)))
+            conn.commit()
+            return True
+        except sqlite3.IntegrityError:
+            conn.rollback()
+            return False
 
+@traced('data')
 def authenticate_user(username, password):
-    conn = sqlite3.connect('fraudcases.db')
-    c = conn.cursor()
-    c.execute('SELECT password FROM users WHERE username = ?', (username,))
-    data = c.fetchone()
-    conn.close()
+    with db_connection() as conn:
+        c = conn.cursor()
+        c.execute('SELECT password FROM users WHERE username = ?', (username,))
+        data = c.fetchone()
     return data is not None and check_hashes(password, data[0])
 
 # --------------------------
@@ -499,12 +3324,22 @@ def apply_custom_styles():
     </style>
     """, unsafe_allow_html=True)
 
+@traced('page')
 def create_sidebar():
+    # Only the signed-in app draws the menu; the login page never loads it
+    from streamlit_option_menu import option_menu
+
+    pages = ["Launch Pad", "Summary Dashboard", "Case Builder", "Bulk Import", "Case Analysis", "Reports", "Search"]
+    icons = ["house", "bar-chart", "clipboard", "upload", "search", "file-earmark", "binoculars"]
+    if is_admin():
+        pages.append("Performance")
+        icons.append("speedometer2")
+
     with st.sidebar:
         selected = option_menu(
             "Navigation", 
-            ["Launch Pad", "Summary Dashboard", "Case Builder", "Case Analysis", "Reports"],
-            icons=["house", "bar-chart", "clipboard", "search", "file-earmark"],
+            pages,
+            icons=icons,
             menu_icon="cast", 
             default_index=0,
             styles={
@@ -515,7 +3350,25 @@ def create_sidebar():
             }
         )
         st.session_state['current_page'] = selected
-    
+
+        if is_admin():
+            with st.expander("🩺 Database Pool"):
+                st.json(get_pool_metrics())
+            with st.expander("🗃️ Result Cache"):
+                st.json(get_result_cache_stats())
+            with st.expander("📈 Memory vs Sessions"):
+                current, history = get_session_tracker().snapshot()
+                if current['rss_bytes'] is None:
+                    st.caption("Process memory is not available on this platform.")
+                else:
+                    with perf_span('figure', 'sidebar: memory gauge'):
+                        plot_chart(session_memory_gauge(current))
+                    st.caption("Resident memory of the whole server process, which every session shares.")
+                    if history['sessions'].nunique() > 1:
+                        history['rss_mb'] = history['rss_bytes'] / 2**20
+                        with perf_span('figure', 'sidebar: memory vs sessions'):
+                            plot_chart(px.scatter(history, x='sessions', y='rss_mb', height=200,
+                                                  labels={'sessions': 'Active sessions', 'rss_mb': 'RSS (MB)'}))
         
         # Logout button at the bottom
         st.markdown('<div class="logout-btn">', unsafe_allow_html=True)
@@ -525,6 +3378,7 @@ def create_sidebar():
             st.rerun()
         st.markdown('</div>', unsafe_allow_html=True)
 
+@traced('page')
 def login_page():
     st.markdown("""
     <style>
@@ -586,6 +3440,7 @@ def login_page():
                     else:
                         st.error("Username already exists")
 
+@traced('page')
 def launch_pad():
     st.markdown("""
     <style>
@@ -685,25 +3540,20 @@ def launch_pad():
 
     st.markdown("---")
     
+@traced('page')
 def show_summary_dashboard():
-    import locale
-    locale.setlocale(locale.LC_ALL, '')  
-
     st.markdown("## 📊 Summary Dashboard")
     
-    df = get_all_cases()
+    summary = get_dashboard_summary()
     
-    if df.empty:
+    if summary['total_cases'] == 0:
         st.warning("No data available.")
         return
 
-    # Ensure correct datetime format
-    df['date_reported'] = pd.to_datetime(df['date_reported'], errors='coerce')
-
     # Key summary metrics
-    total_cases = len(df)
-    total_amount = df['amount_involved'].sum()
-    avg_amount = df['amount_involved'].mean()
+    total_cases = summary['total_cases']
+    total_amount = summary['total_amount']
+    avg_amount = summary['avg_amount']
 
     # Format with commas
     formatted_total = f"${total_amount:,.2f}"
@@ -712,56 +3562,59 @@ def show_summary_dashboard():
     # Display metrics
     col1, col2, col3 = st.columns(3)
     col1.metric("Total Fraud Cases", total_cases)
-    col2.metric("Total Amount Involved", formatted_total)
-    col3.metric("Average Fraud Amount", formatted_avg)
+    col2.metric("Total Amount Involved (USD)", formatted_total)
+    col3.metric("Average Fraud Amount (USD)", formatted_avg)
 
     st.markdown("---")
 
     # Fraud cases by year
     st.markdown("### 📅 Fraud Cases Reported by Year")
-    df['year'] = df['date_reported'].dt.year
-    yearly_counts = df['year'].value_counts().sort_index()
-    fig1 = px.bar(
-        yearly_counts,
-        x=yearly_counts.index,
-        y=yearly_counts.values,
-        labels={"x": "Year", "y": "Number of Cases"},
-        title="Fraud Cases by Year"
-    )
-    st.plotly_chart(fig1, use_container_width=True)
+    yearly_counts = summary['yearly_counts']
+    with perf_span('figure', 'dashboard: cases by year'):
+        fig1 = px.bar(
+            yearly_counts,
+            x='year',
+            y='cases',
+            labels={"year": "Year", "cases": "Number of Cases"},
+            title="Fraud Cases by Year"
+        )
+        plot_chart(fig1)
 
     st.markdown("### 🔍 Top Fraud Categories by Frequency")
-    category_counts = df['case_type'].value_counts().nlargest(10).reset_index()
+    category_counts = summary['top_types']
     category_counts.columns = ['Fraud Type', 'Cases']
-    fig2 = px.bar(
-        category_counts,
-        x='Fraud Type',
-        y='Cases',
-        title="Top 10 Most Common Fraud Types",
-        color='Cases',
-        color_continuous_scale='blues'
-    )
-    st.plotly_chart(fig2, use_container_width=True)
+    with perf_span('figure', 'dashboard: top fraud types'):
+        fig2 = px.bar(
+            category_counts,
+            x='Fraud Type',
+            y='Cases',
+            title="Top 10 Most Common Fraud Types",
+            color='Cases',
+            color_continuous_scale='blues'
+        )
+        plot_chart(fig2)
 
     st.markdown("### 💰 High-Impact Fraud Types")
-    impact = df.groupby('case_type')['amount_involved'].sum().nlargest(10).reset_index()
+    impact = summary['top_amounts']
     impact.columns = ['Fraud Type', 'Total Amount']
-    fig3 = px.bar(
-        impact,
-        x='Fraud Type',
-        y='Total Amount',
-        title="Top 10 Fraud Types by Amount Involved",
-        labels={'Total Amount': 'Amount (USD)'},
-        color='Total Amount',
-        color_continuous_scale='reds'
-    )
-    st.plotly_chart(fig3, use_container_width=True)
+    with perf_span('figure', 'dashboard: high-impact types'):
+        fig3 = px.bar(
+            impact,
+            x='Fraud Type',
+            y='Total Amount',
+            title="Top 10 Fraud Types by Amount Involved",
+            labels={'Total Amount': 'Amount (USD)'},
+            color='Total Amount',
+            color_continuous_scale='reds'
+        )
+        plot_chart(fig3)
 
 
+@traced('page')
 def show_case_builder():
     st.markdown("## 🏗️ Case Builder")
 
-    if st.session_state.username != "Admin@fraudcases123*":
+    if not is_admin():
         st.error("🔒 Only the Admin can access the Case Builder.")
         return
 
@@ -796,7 +3649,7 @@ def show_case_builder():
         description = st.text_area("Description")
         location = st.text_input("Location")
         amount_involved = st.number_input("Amount Involved", min_value=0.0, step=100.0)
-        currency = st.selectbox("Currency", ["USD", "ZWL", "ZAR", "BWP", "NAD", "KES", "SZL"])
+        currency = st.selectbox("Currency", CURRENCIES)
         date_detected = st.date_input("Date Detected")
         date_reported = st.date_input("Date Reported")
         date_resolved = st.date_input("Date Resolved (Optional)", value=None)
@@ -804,7 +3657,7 @@ def show_case_builder():
         agency = st.text_input("Investigation Agency")
         court_ref = st.text_input("Court Reference")
         source_url = st.text_input("Source URL (optional)")
-        severity = st.selectbox("Severity", ["Low", "Medium", "High", "Critical"])
+        severity = st.selectbox("Severity", SEVERITY_LEVELS)
 
         submitted = st.form_submit_button("➕ Submit Case")
 
@@ -827,21 +3680,87 @@ def show_case_builder():
 
     st.markdown('</div>', unsafe_allow_html=True)
 
+@traced('page')
+def show_bulk_import():
+    st.markdown("## 📥 Bulk Import")
+
+    if not is_admin():
+        st.error("🔒 Only the Admin can import cases.")
+        return
+
+    st.markdown(
+        "Upload a CSV or Excel sheet with one case per row. Columns match the Case Builder fields "
+        f"(`{'`, `'.join(CASE_INSERT_COLUMNS)}`); only `case_name` is required."
+    )
+
+    uploaded = st.file_uploader("Case file", type=["csv", "xlsx"], key="bulk_import_file")
+    dry_run = st.checkbox("Validate only (dry run)", key="bulk_import_dry_run")
+
+    if uploaded is not None and st.button("📥 Import cases", key="bulk_import_btn"):
+        progress = st.empty()
+        with st.spinner(f"Importing {uploaded.name}..."):
+            result = import_cases(
+                uploaded, uploaded.name, st.session_state.username, dry_run=dry_run,
+                progress=lambda rows: progress.caption(f"{rows:,} rows processed"),
+            )
+
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Rows read", f"{result['rows']:,}")
+        col2.metric("Valid" if dry_run else "Imported", f"{result['valid'] if dry_run else result['inserted']:,}")
+        col3.metric("Rejected", f"{result['rejected']:,}")
+
+        if dry_run:
+            st.info("Dry run: nothing was written.")
+        elif result['inserted']:
+            st.success(f"✅ Imported cases {result['first_case_id']}–{result['last_case_id']}.")
+
+        if result['rejected']:
+            st.warning("Some rows were rejected; fix them and re-import just those rows.")
+            st.dataframe(result['rejects'], use_container_width=True)
+            st.download_button(
+                "⬇️ Download rejected rows", data=result['rejects'].to_csv(index=False).encode('utf-8'),
+                file_name="import_rejects.csv", mime="text/csv",
+            )
+
+        duplicates = result['duplicates']
+        if duplicates is not None and not duplicates.empty:
+            st.warning(f"{duplicates['case_id'].nunique():,} imported cases look like duplicates of existing ones.")
+            st.dataframe(duplicates, use_container_width=True, hide_index=True)
 
+    st.markdown("---")
+    st.markdown("### 💱 Exchange Rates")
+    st.markdown(
+        "Amounts are converted to USD at the rate in force on each case's detection date. Upload a CSV with "
+        "`currency`, `rate_date` and `units_per_usd` columns to add or correct rates; every case is reconverted."
+    )
+    rates_file = st.file_uploader("Rates file", type=["csv"], key="fx_rates_file")
+    if rates_file is not None and st.button("💱 Load rates", key="fx_rates_btn"):
+        try:
+            with st.spinner("Reconverting case amounts..."):
+                result = load_fx_rates(rates_file, label=rates_file.name)
+        except ValueError as e:
+            st.error(str(e))
+        else:
+            st.success(f"✅ Loaded {result['rates']:,} rates for {', '.join(result['currencies'])}; "
+                       f"{result['cases_converted']:,} case amounts changed.")
+    with st.expander("Current rates"):
+        st.dataframe(get_fx_rates(), use_container_width=True, hide_index=True)
+
+
+@traced('page')
 def show_case_analysis():
     st.markdown("## 🔍 Case Analysis")
     st.markdown("Analyze fraud patterns and trends")
     
-    df = get_all_cases()
+    # Charts read from the case_rollup cube; only the map needs case rows.
+    totals = get_rollup().iloc[0]
     
-    if not df.empty:
-        # Convert dates for analysis
-        df['date_reported'] = pd.to_datetime(df['date_reported'])
-        df['year'] = df['date_reported'].dt.year
-        df['month'] = df['date_reported'].dt.month_name()
+    if totals['cases'] > 0:
+        by_type = get_rollup(['case_type']).sort_values('cases', ascending=False, ignore_index=True)
         
         # Analysis tabs
-        tab1, tab2, tab3, tab4 = st.tabs(["Trend Analysis", "Geographic Distribution", "Case Types", "Pattern Discovery"])
+        tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["Trend Analysis", "Geographic Distribution", "Case Types",
+                                                      "Pattern Discovery", "Anomalies", "Connections"])
 
         
         
@@ -850,93 +3769,102 @@ def show_case_analysis():
             
             # Time series analysis
             time_agg = st.radio("Time Aggregation", ["Monthly", "Quarterly", "Yearly"], horizontal=True)
-            
-            # Ensure correct month order
-            month_order = ['January', 'February', 'March', 'April', 'May', 'June', 
-                           'July', 'August', 'September', 'October', 'November', 'December']
-
-            df['month'] = pd.Categorical(df['month'], categories=month_order, ordered=True)
-
-            if time_agg == "Monthly":
-                df_time = df.groupby(['year', 'month']).size().reset_index(name='count')
-                df_time.sort_values(by='month', inplace=True)
-                
-                fig = px.bar(
-                    df_time,
-                    x='month',
-                    y='count',
-                    color='year',
-                    barmode='group',
-                    title="Monthly Fraud Cases by Year",
-                    labels={'month': 'Month', 'count': 'Number of Cases'}
-                )
-            elif time_agg == "Quarterly":
-                df['quarter'] = df['date_reported'].dt.quarter
-                df_time = df.groupby(['year', 'quarter']).size().reset_index(name='count')
-                
-                fig = px.bar(
-                    df_time,
-                    x='quarter',
-                    y='count',
-                    color='year',
-                    barmode='group',
-                    title="Quarterly Fraud Cases by Year",
-                    labels={'quarter': 'Quarter', 'count': 'Number of Cases'}
-                )
-
-            elif time_agg == "Quarterly":
-                df['quarter'] = df['date_reported'].dt.quarter
-                df_time = df.groupby(['year', 'quarter']).size().reset_index(name='count')
-                fig = px.line(df_time, x='quarter', y='count', color='year',
-                              title="Quarterly Fraud Cases by Year",
-                              labels={'quarter': 'Quarter', 'count': 'Number of Cases'})
-            else:  # Yearly
-                df_time = df.groupby('year').size().reset_index(name='count')
-                fig = px.bar(df_time, x='year', y='count',
-                             title="Annual Fraud Cases",
-                             labels={'year': 'Year', 'count': 'Number of Cases'})
-            
-            st.plotly_chart(fig, use_container_width=True)
+
+            with perf_span('figure', 'analysis: cases over time'):
+                if time_agg == "Monthly":
+                    df_time = get_rollup(['year', 'month'])[['year', 'month', 'cases']].rename(columns={'cases': 'count'})
+                    # Ensure correct month order
+                    df_time['month'] = pd.Categorical.from_codes(df_time['month'] - 1, categories=MONTH_ORDER, ordered=True)
+                    df_time.sort_values(by='month', inplace=True)
+
+                    fig = px.bar(
+                        df_time,
+                        x='month',
+                        y='count',
+                        color='year',
+                        barmode='group',
+                        title="Monthly Fraud Cases by Year",
+                        labels={'month': 'Month', 'count': 'Number of Cases'}
+                    )
+                elif time_agg == "Quarterly":
+                    df_time = get_rollup(['year', 'quarter'])[['year', 'quarter', 'cases']].rename(columns={'cases': 'count'})
+
+                    fig = px.bar(
+                        df_time,
+                        x='quarter',
+                        y='count',
+                        color='year',
+                        barmode='group',
+                        title="Quarterly Fraud Cases by Year",
+                        labels={'quarter': 'Quarter', 'count': 'Number of Cases'}
+                    )
+                else:  # Yearly
+                    df_time = get_rollup(['year'])[['year', 'cases']].rename(columns={'cases': 'count'})
+                    fig = px.bar(df_time, x='year', y='count',
+                                 title="Annual Fraud Cases",
+                                 labels={'year': 'Year', 'count': 'Number of Cases'})
+
+                plot_chart(fig)
             
             # Amount analysis
             st.markdown("### Financial Impact Analysis")
-            df_amount = df[df['amount_involved'] > 0].groupby('year')['amount_involved'].sum().reset_index()
-            fig = px.bar(df_amount, x='year', y='amount_involved',
-                         title="Total Fraud Amounts by Year",
-                         labels={'year': 'Year', 'amount_involved': 'Total Amount (USD)'})
-            st.plotly_chart(fig, use_container_width=True)
+            df_amount = get_rollup(['year'])
+            df_amount = df_amount[df_amount['positive_amount_usd_count'] > 0]
+            df_amount = df_amount[['year', 'positive_amount_usd_total']].rename(columns={'positive_amount_usd_total': 'amount_usd'})
+            with perf_span('figure', 'analysis: amounts by year'):
+                fig = px.bar(df_amount, x='year', y='amount_usd',
+                             title="Total Fraud Amounts by Year",
+                             labels={'year': 'Year', 'amount_usd': 'Total Amount (USD)'})
+                plot_chart(fig)
         
         with tab2:
             st.markdown("### Geographic Distribution")
             
-            # Zimbabwe-specific coordinates
-            zimbabwe_locations = {
-                'Harare': (-17.8292, 31.0522),
-                'Bulawayo': (-20.1325, 28.6265),
-                'Chinhoyi': (-17.3667, 30.2000),
-                'Gweru': (-19.4500, 29.8167),
-                'Beitbridge': (-22.2167, 30.0000),
-                'Nationwide': (-19.0154, 29.1549)  # Center of Zimbabwe
-            }
-            
-            # Add coordinates to dataframe
-            df['lat'] = df['location'].apply(lambda x: zimbabwe_locations.get(x, (-19.0154, 29.1549))[0])
-            df['lon'] = df['location'].apply(lambda x: zimbabwe_locations.get(x, (-19.0154, 29.1549))[1])
+            map_mode = st.radio("Map", ["By location", "Case clusters"], horizontal=True, key="map_mode")
 
-            
-            fig = px.scatter_mapbox(df, lat='lat', lon='lon', 
-                                   color='case_type', size='amount_involved',
-                                   hover_name='case_name', hover_data=['date_reported', 'severity'],
-                                   zoom=5, height=600)
-            fig.update_layout(mapbox_style="open-street-map")
-            st.plotly_chart(fig, use_container_width=True)
+            # One marker per gazetteer location, pre-aggregated from the rollup
+            points, unresolved = get_location_points()
+
+            if map_mode == "Case clusters":
+                col1, col2 = st.columns(2)
+                with col1:
+                    zoom = st.slider("Zoom level", *MAP_ZOOM_LEVELS, value=5, key="map_zoom",
+                                     help="Cases are grouped into map cells sized for this zoom level")
+                with col2:
+                    map_type = st.selectbox("Case type", ["All"] + by_type['case_type'].tolist(), key="map_case_type")
+                binned = get_case_map_bins(zoom, None if map_type == "All" else map_type)
+                with perf_span('figure', 'analysis: case clusters map'):
+                    plot_chart(case_map_figure(binned, zoom))
+                caption = f"{binned['cases']:,} cases in {binned['cells']:,} map cells"
+                if binned['omitted_cells']:
+                    caption += (f"; the {binned['omitted_cells']:,} quietest cells ({binned['omitted_cases']:,} cases) "
+                                f"are not drawn")
+                st.caption(caption)
+            else:
+                with perf_span('figure', 'analysis: location map'):
+                    fig = px.scatter_mapbox(points, lat='lat', lon='lon',
+                                            color='top_case_type', size='cases', size_max=40,
+                                            hover_name='name',
+                                            hover_data={'cases': ':,', 'amount_usd': ':,.0f', 'spellings': True,
+                                                        'lat': False, 'lon': False},
+                                            labels={'top_case_type': 'Most common type', 'amount_usd': 'Amount (USD)',
+                                                    'cases': 'Cases', 'spellings': 'Recorded as'},
+                                            center=MAP_CENTER, zoom=5, height=600)
+                    fig.update_layout(mapbox_style="open-street-map")
+                    plot_chart(fig)
+            if not unresolved.empty:
+                st.caption(f"{int(unresolved['cases'].sum()):,} cases at {len(unresolved):,} locations the gazetteer "
+                           f"does not know are not on the map: "
+                           + ", ".join(unresolved['location'].head(10))
+                           + (" …" if len(unresolved) > 10 else ""))
             
             # Location frequency
             st.markdown("#### Cases by Location")
-            loc_counts = df['location'].value_counts().reset_index()
+            loc_counts = get_rollup(['location']).sort_values('cases', ascending=False)[['location', 'cases']]
             loc_counts.columns = ['Location', 'Cases']
-            fig = px.bar(loc_counts, x='Location', y='Cases', color='Location')
-            st.plotly_chart(fig, use_container_width=True)
+            with perf_span('figure', 'analysis: cases by location'):
+                fig = px.bar(loc_counts, x='Location', y='Cases', color='Location')
+                plot_chart(fig)
         
         with tab3:
             st.markdown("### Case Type Analysis")
@@ -945,90 +3873,169 @@ def show_case_analysis():
             
             with col1:
                 st.markdown("#### Distribution by Type")
-                type_counts = df['case_type'].value_counts().reset_index()
+                type_counts = by_type[['case_type', 'cases']].copy()
                 type_counts.columns = ['Case Type', 'Count']
-                fig = px.pie(type_counts, values='Count', names='Case Type')
-                st.plotly_chart(fig, use_container_width=True)
+                with perf_span('figure', 'analysis: type distribution'):
+                    fig = px.pie(type_counts, values='Count', names='Case Type')
+                    plot_chart(fig)
             
             with col2:
                 st.markdown("#### Severity Analysis")
-                severity_counts = df.groupby(['case_type', 'severity']).size().reset_index(name='count')
-                fig = px.bar(severity_counts, x='case_type', y='count', color='severity',
-                             labels={'case_type': 'Case Type', 'count': 'Number of Cases'})
-                st.plotly_chart(fig, use_container_width=True)
+                severity_counts = get_rollup(['case_type', 'severity'])[['case_type', 'severity', 'cases']]
+                severity_counts = severity_counts.rename(columns={'cases': 'count'})
+                with perf_span('figure', 'analysis: severity by type'):
+                    fig = px.bar(severity_counts, x='case_type', y='count', color='severity',
+                                 labels={'case_type': 'Case Type', 'count': 'Number of Cases'})
+                    plot_chart(fig)
             
             st.markdown("#### Average Amount by Case Type")
-            df_amount = df[df['amount_involved'] > 0]
+            df_amount = by_type[by_type['positive_amount_usd_count'] > 0]
             if not df_amount.empty:
-                avg_amount = df_amount.groupby('case_type')['amount_involved'].mean().reset_index()
-                fig = px.bar(avg_amount, x='case_type', y='amount_involved',
-                             labels={'case_type': 'Case Type', 'amount_involved': 'Average Amount (USD)'})
-                st.plotly_chart(fig, use_container_width=True)
+                avg_amount = pd.DataFrame({
+                    'case_type': df_amount['case_type'],
+                    'amount_usd': df_amount['positive_amount_usd_total'] / df_amount['positive_amount_usd_count'],
+                })
+                with perf_span('figure', 'analysis: average amount by type'):
+                    fig = px.bar(avg_amount, x='case_type', y='amount_usd',
+                                 labels={'case_type': 'Case Type', 'amount_usd': 'Average Amount (USD)'})
+                    plot_chart(fig)
             else:
                 st.warning("No financial data available for analysis")
-    with tab4:
-        st.markdown("### 🔍 Pattern Discovery by Fraud Type")
-        st.info("Explore dominant characteristics across fraud types based on severity, location, financial amounts, and seasonality.")
+        with tab4:
+            st.markdown("### 🔍 Pattern Discovery by Fraud Type")
+            st.info("Explore dominant characteristics across fraud types based on severity, location, financial amounts, and seasonality.")
 
-        fraud_types = df['case_type'].unique().tolist()
-        selected_type = st.selectbox("Select Fraud Type to Explore", fraud_types)
+            fraud_types = by_type['case_type'].tolist()
+            selected_type = st.selectbox("Select Fraud Type to Explore", fraud_types)
 
-        df_type = df[df['case_type'] == selected_type]
+            type_totals = get_rollup(case_type=selected_type).iloc[0]
 
-        if not df_type.empty:
-            col1, col2 = st.columns(2)
+            if type_totals['cases'] > 0:
+                by_severity = get_rollup(['severity'], case_type=selected_type)
+                by_severity = by_severity.sort_values(['cases', 'severity'], ascending=[False, True])
+                by_location = get_rollup(['location'], case_type=selected_type)
+                by_location = by_location.sort_values(['cases', 'location'], ascending=[False, True])
+                col1, col2 = st.columns(2)
 
-            with col1:
-                st.markdown("#### 🔢 Summary Stats")
-                stats = {
-                    "Number of Cases": len(df_type),
-                    "Average Amount Involved (USD)": round(df_type['amount_involved'].mean(), 2),
-                    "Most Common Severity": df_type['severity'].mode()[0],
-                    "Top Location": df_type['location'].mode()[0],
-                    "Earliest Case": df_type['date_reported'].min().strftime("%Y-%m-%d"),
-                    "Latest Case": df_type['date_reported'].max().strftime("%Y-%m-%d"),
-                }
-                st.json(stats)
+                with col1:
+                    st.markdown("#### 🔢 Summary Stats")
+                    avg_amount = type_totals['amount_usd_total'] / type_totals['amount_usd_count'] if type_totals['amount_usd_count'] else 0.0
+                    stats = {
+                        "Number of Cases": int(type_totals['cases']),
+                        "Average Amount Involved (USD)": round(avg_amount, 2),
+                        "Most Common Severity": by_severity['severity'].iloc[0] if not by_severity.empty else None,
+                        "Top Location": by_location['location'].iloc[0] if not by_location.empty else None,
+                        "Earliest Case": (type_totals['first_reported'] or '')[:10],
+                        "Latest Case": (type_totals['last_reported'] or '')[:10],
+                    }
+                    st.json(stats)
+
+                with col2:
+                    st.markdown("#### 📅 Seasonality Trend")
+                    by_month = get_rollup(['month'], case_type=selected_type).set_index('month')['cases']
+                    month_counts = pd.Series(by_month.reindex(range(1, 13)).values, index=MONTH_ORDER)
+                    with perf_span('figure', 'analysis: type seasonality'):
+                        fig = px.bar(month_counts, x=month_counts.index, y=month_counts.values,
+                                     labels={"x": "Month", "y": "Number of Cases"},
+                                     title=f"Monthly Distribution for {selected_type}")
+                        plot_chart(fig)
+
+                st.markdown("#### 🗺️ Location Distribution")
+                loc_data = by_location[['location', 'cases']].copy()
+                loc_data.columns = ['Location', 'Count']
+                with perf_span('figure', 'analysis: type locations'):
+                    fig = px.bar(loc_data, x='Location', y='Count', color='Location',
+                                 title=f"Locations Involved in {selected_type}")
+                    plot_chart(fig)
+
+                st.markdown("#### 🚨 Severity Distribution")
+                severity_counts = by_severity[['severity', 'cases']].copy()
+                severity_counts.columns = ['Severity', 'Count']
+                with perf_span('figure', 'analysis: type severity'):
+                    fig = px.pie(severity_counts, names='Severity', values='Count',
+                                 title=f"Severity Levels in {selected_type}")
+                    plot_chart(fig)
+
+            else:
+                st.warning("No data found for this fraud type.")
 
+        with tab5:
+            st.markdown("### 🚩 Anomalous Cases")
+            st.info(f"Each case is compared with its peers (same case type, location and report year) on amount, "
+                    f"time from detection to report, and severity relative to amount. "
+                    f"Scores of {ANOMALY_THRESHOLD:g} or more are flagged.")
+
+            summary = get_anomaly_summary()
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Cases", f"{summary['cases']:,}")
+            col2.metric(f"With ≥{ANOMALY_MIN_PEERS} peers", f"{summary['scored']:,}")
+            col3.metric("Flagged", f"{summary['flagged']:,}")
+
+            top_k = st.slider("Show top", min_value=10, max_value=200, value=25, step=5, key="anomaly_top_k")
+            anomalies = get_top_anomalies(top_k)
+            if not anomalies.empty:
+                st.dataframe(anomalies, use_container_width=True, hide_index=True)
+            elif summary['scored'] == 0:
+                st.warning(f"No peer group has {ANOMALY_MIN_PEERS} or more cases yet, so there is nothing to compare against.")
+            else:
+                st.success("No cases stand out from their peers.")
+
+        with tab6:
+            st.markdown("### 🕸️ Case Connections")
+            st.info("Cases are connected when they name the same party, agency, court or court reference.")
+
+            col1, col2 = st.columns(2)
+            with col1:
+                link_kinds = st.multiselect("Connect cases through", list(ENTITY_KINDS), default=list(ENTITY_LINK_KINDS),
+                                            format_func=ENTITY_KINDS.get, key="graph_kinds")
             with col2:
-                st.markdown("#### 📅 Seasonality Trend")
-                df_type['month'] = df_type['date_reported'].dt.month_name()
-                month_counts = df_type['month'].value_counts().reindex([
-                    "January", "February", "March", "April", "May", "June", 
-                    "July", "August", "September", "October", "November", "December"
-                ])
-                fig = px.bar(month_counts, x=month_counts.index, y=month_counts.values,
-                             labels={"x": "Month", "y": "Number of Cases"},
-                             title=f"Monthly Distribution for {selected_type}")
-                st.plotly_chart(fig, use_container_width=True)
-
-            st.markdown("#### 🗺️ Location Distribution")
-            loc_data = df_type['location'].value_counts().reset_index()
-            loc_data.columns = ['Location', 'Count']
-            fig = px.bar(loc_data, x='Location', y='Count', color='Location',
-                         title=f"Locations Involved in {selected_type}")
-            st.plotly_chart(fig, use_container_width=True)
-
-            st.markdown("#### 🚨 Severity Distribution")
-            severity_counts = df_type['severity'].value_counts().reset_index()
-            severity_counts.columns = ['Severity', 'Count']
-            fig = px.pie(severity_counts, names='Severity', values='Count',
-                         title=f"Severity Levels in {selected_type}")
-            st.plotly_chart(fig, use_container_width=True)
+                max_degree = st.number_input("Ignore entities shared by more than N cases", min_value=2,
+                                             value=ENTITY_HUB_DEGREE, step=10, key="graph_max_degree")
 
-        else:
-            st.warning("No data found for this fraud type.")
+            if not link_kinds:
+                st.warning("Pick at least one kind of entity to connect cases through.")
+            else:
+                link_kinds = tuple(sorted(link_kinds))
+
+                st.markdown("#### Neighbourhood of a case")
+                col1, col2 = st.columns(2)
+                with col1:
+                    case_id = st.number_input("Case ID", min_value=1, value=1, step=1, key="graph_case_id")
+                with col2:
+                    depth = st.radio("Hops", [1, 2, 3], horizontal=True, key="graph_depth")
+
+                hood = case_neighbourhood(int(case_id), depth, link_kinds, int(max_degree))
+                if len(hood['cases']) <= 1:
+                    st.warning("This case shares no entities with other cases.")
+                else:
+                    with perf_span('figure', 'analysis: case connections graph'):
+                        plot_chart(entity_graph_figure(hood, int(case_id)))
+                    connected = hood['cases'][hood['cases']['hops'] > 0]
+                    connected = connected.merge(get_cases_by_id(connected['case_id']), on='case_id')
+                    st.dataframe(connected.sort_values(['hops', 'case_id']), use_container_width=True, hide_index=True)
+
+                st.markdown("#### Connected groups of cases")
+                components = get_case_components(link_kinds, int(max_degree))
+                groups = (components.groupby('component', as_index=False)['size'].first()
+                          .sort_values(['size', 'component'], ascending=[False, True]))
+                if groups.empty:
+                    st.warning("No two cases share an entity of the selected kinds.")
+                else:
+                    st.caption(f"{len(groups):,} groups covering {int(groups['size'].sum()):,} cases")
+                    top = groups.head(20)
+                    group = st.selectbox("Group", top['component'].tolist(), key="graph_component",
+                                         format_func=lambda c: f"Group of case #{c} ({int(top.set_index('component').at[c, 'size']):,} cases)")
+                    members = components.loc[components['component'] == group, 'case_id']
+                    st.dataframe(get_cases_by_id(members.head(1000)), use_container_width=True, hide_index=True)
+    else:
+        st.warning("No cases available for analysis.")
         
+@traced('page')
 def show_reports():
     st.markdown("## 📑 Reports")
     st.markdown("Generate detailed fraud case reports")
 
-    df = get_all_cases()
-
-    if not df.empty:
-        # Convert to datetime safely
-        df['date_reported'] = pd.to_datetime(df['date_reported'], errors='coerce')
-
+    if count_report_cases() > 0:
         # Report filters
         col1, col2, col3 = st.columns(3)
 
@@ -1036,51 +4043,257 @@ def show_reports():
             case_type_filter = st.multiselect("Filter by Case Type", get_case_types())
 
         with col2:
-            severity_filter = st.multiselect("Filter by Severity", ["Low", "Medium", "High", "Critical"])
+            severity_filter = st.multiselect("Filter by Severity", SEVERITY_LEVELS)
 
         with col3:
-            valid_years = df['date_reported'].dropna().dt.year.unique()
-            year_filter = st.multiselect("Filter by Year", sorted(valid_years, reverse=True))
+            year_filter = st.multiselect("Filter by Year", get_report_years())
+
+        filters = (tuple(case_type_filter), tuple(severity_filter), tuple(year_filter))
+        page_size = st.selectbox("Rows per page", REPORT_PAGE_SIZES, index=1)
+
+        # Keyset cursors for the pages visited so far; start over whenever
+        # the filters or page size change.
+        pager = st.session_state.get('report_pager')
+        if pager is None or pager['key'] != (filters, page_size):
+            pager = {'key': (filters, page_size), 'cursors': [None]}
+            st.session_state['report_pager'] = pager
+
+        matched = count_report_cases(*filters)
 
-        # Apply filters
-        if case_type_filter:
-            df = df[df['case_type'].isin(case_type_filter)]
-        if severity_filter:
-            df = df[df['severity'].isin(severity_filter)]
-        if year_filter:
-            df = df[df['date_reported'].dt.year.isin(year_filter)]
+        if matched > 0:
+            page, next_cursor = get_report_page(*filters, page_size=page_size, after=pager['cursors'][-1])
+            page_no = len(pager['cursors'])
+            first_row = (page_no - 1) * page_size + 1
+            st.caption(f"Showing {first_row:,}–{first_row + len(page) - 1:,} of {matched:,} matching cases")
 
-        if not df.empty:
-            # Optional: drop geospatial or derived fields for export clarity
-            columns_to_drop = [col for col in ['lat', 'lon', 'year', 'month'] if col in df.columns]
-            df_display = df.drop(columns=columns_to_drop)
+            st.dataframe(page, use_container_width=True)
 
-            st.dataframe(df_display, use_container_width=True)
+            nav1, nav2, _ = st.columns([1, 1, 4])
+            with nav1:
+                if st.button("◀ Previous", disabled=page_no == 1, key="report_prev"):
+                    pager['cursors'].pop()
+                    st.rerun()
+            with nav2:
+                if st.button("Next ▶", disabled=next_cursor is None, key="report_next"):
+                    pager['cursors'].append(next_cursor)
+                    st.rerun()
 
             st.markdown("### Export Reports")
 
+            # Exports cover every matching row, so they are only built when
+            # asked for, streamed straight from SQLite.
             col1, col2 = st.columns(2)
 
             with col1:
-                csv = df_display.to_csv(index=False).encode('utf-8')
-                st.download_button("⬇️ Download CSV", data=csv, file_name="fraud_cases_report.csv", mime="text/csv")
+                export_format = st.selectbox("Export format", list(EXPORT_FORMATS), key="report_export_format")
 
             with col2:
-                excel_buffer = pd.ExcelWriter("fraud_cases_report.xlsx", engine="xlsxwriter")
-                df_display.to_excel(excel_buffer, index=False, sheet_name="Report")
-                excel_buffer.close()
-                with open("fraud_cases_report.xlsx", "rb") as f:
-                    st.download_button("⬇️ Download Excel", data=f, file_name="fraud_cases_report.xlsx", mime="application/vnd.ms-excel")
+                prepare = st.button("📦 Prepare export", key="report_export_btn")
+
+            if prepare:
+                with st.spinner(f"Exporting {matched:,} cases..."):
+                    spool = export_report(export_format, *filters)
+                file_name, mime = EXPORT_FORMATS[export_format]
+                # download_button needs the finished file as bytes
+                with spool:
+                    st.download_button(f"⬇️ Download {export_format}", data=spool.read(), file_name=file_name, mime=mime)
         else:
             st.warning("No cases matched the selected filters.")
     else:
         st.warning("No cases available for reporting.")
 
+@traced('page')
+def show_search():
+    st.markdown("## 🔎 Search Cases")
+    st.caption('Searches case names, descriptions, parties, agencies and court references. '
+               'Use "quotes" for an exact phrase, a trailing * for a prefix (e.g. `launder*`) and OR for alternatives.')
+
+    st.markdown("""
+    <style>
+    .search-hit {
+        background: white;
+        padding: 0.8rem 1rem;
+        border-radius: 10px;
+        border-left: 4px solid #667eea;
+        margin-bottom: 0.6rem;
+    }
+    .search-hit mark {
+        background: #fde68a;
+        padding: 0 2px;
+    }
+    </style>
+    """, unsafe_allow_html=True)
+
+    query = st.text_input("Search", key="search_query", placeholder='e.g. "command agriculture" OR zimbabwe*')
+    if not build_search_query(query):
+        return
+
+    # Back to the first page whenever the query changes
+    pager = st.session_state.get('search_pager')
+    if pager is None or pager['query'] != query:
+        pager = {'query': query, 'page': 0}
+        st.session_state['search_pager'] = pager
+
+    matched = count_search_matches(query)
+    if matched == 0:
+        st.warning("No cases matched your search.")
+        return
+
+    results = search_cases(query, pager['page'])
+    first_row = pager['page'] * SEARCH_PAGE_SIZE + 1
+    st.caption(f"Showing {first_row:,}–{first_row + len(results) - 1:,} of {matched:,} matching cases")
+    ranked = min(matched, SEARCH_RANK_WINDOW)
+    if matched > ranked:
+        st.caption(f"Broad search: ranking the {ranked:,} most recent matches. Add terms to narrow it down.")
+
+    for hit in results.itertuples(index=False):
+        meta = " · ".join(html.escape(str(v)) for v in (hit.case_type, hit.location, hit.severity, hit.date_reported) if v)
+        st.markdown(
+            f'<div class="search-hit"><b>#{hit.case_id} {html.escape(hit.case_name or "")}</b>'
+            f'<br><small>{meta}</small><br>{search_snippet_html(hit.snippet)}</div>',
+            unsafe_allow_html=True,
+        )
+
+    nav1, nav2, _ = st.columns([1, 1, 4])
+    with nav1:
+        if st.button("◀ Previous", disabled=pager['page'] == 0, key="search_prev"):
+            pager['page'] -= 1
+            st.rerun()
+    with nav2:
+        if st.button("Next ▶", disabled=first_row + len(results) > ranked, key="search_next"):
+            pager['page'] += 1
+            st.rerun()
+
+PERF_TABLE_LABELS = {'name': 'Name', 'calls': 'Calls', 'p50_ms': 'p50 ms', 'p95_ms': 'p95 ms', 'max_ms': 'Max ms',
+                     'total_ms': 'Total ms', 'sql_ms': 'SQL ms', 'render_ms': 'Render ms', 'python_ms': 'Python ms',
+                     'rows': 'Rows', 'bytes': 'KB'}
+
+def _perf_table(frame, columns, limit=50):
+    if frame.empty:
+        st.caption("Nothing recorded yet.")
+        return
+    if not PERF_CHART_BYTES:
+        columns = [col for col in columns if col != 'bytes']
+    table = frame[columns].head(limit)
+    if 'bytes' in columns:
+        table = table.assign(bytes=table['bytes'] / 1024)
+    st.dataframe(table.round(1).rename(columns=PERF_TABLE_LABELS), use_container_width=True, hide_index=True)
+
+def _perf_histogram(kind, names, key):
+    if names.empty:
+        return
+    name = st.selectbox("Latency histogram for", names, key=key)
+    with perf_span('figure', 'performance: latency histogram'):
+        plot_chart(px.bar(get_perf_recorder().histogram(kind, name), x='bucket', y='calls', height=250,
+                          labels={'bucket': 'Time', 'calls': 'Calls'}))
+
+@traced('page')
+def show_performance():
+    st.markdown("## ⏱️ Performance")
+
+    if not is_admin():
+        st.error("🔒 Only the Admin can access Performance.")
+        return
+
+    if not PERF_ENABLED:
+        st.warning("Instrumentation is turned off (FRAUDX_PERF=0).")
+        return
+
+    recorder = get_perf_recorder()
+    col1, col2 = st.columns([5, 1])
+    col1.caption(f"All sessions in this server process since {recorder.started:%Y-%m-%d %H:%M}. Percentiles cover "
+                 f"the last {recorder.samples:,} calls of each page, function, chart or query. SQL is time spent in "
+                 f"SQLite, render is time sending charts to the browser, Python is the rest (mostly pandas).")
+    with col2:
+        if st.button("Reset", key="perf_reset"):
+            recorder.reset()
+            st.rerun()
+
+    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["Pages", "Data Functions", "Queries", "Slow Queries", "Charts",
+                                                  "Cache Hit Ratios"])
+
+    with tab1:
+        st.markdown("### Slowest pages")
+        st.caption("Whole reruns: the sidebar and the page, from the user's click to the last element sent.")
+        reruns = get_perf_summary('rerun')
+        _perf_table(reruns, ['name', 'calls', 'p50_ms', 'p95_ms', 'max_ms', 'sql_ms', 'render_ms', 'python_ms',
+                             'rows', 'bytes'])
+        _perf_histogram('rerun', reruns['name'], "perf_rerun_histogram")
+        st.markdown("#### Page functions")
+        _perf_table(get_perf_summary('page'), ['name', 'calls', 'p50_ms', 'p95_ms', 'max_ms', 'sql_ms',
+                                               'render_ms', 'python_ms'])
+
+    with tab2:
+        st.markdown("### Slowest data functions")
+        st.caption("Cache misses only; hits are counted under Cache Hit Ratios.")
+        functions = get_perf_summary('data')
+        _perf_table(functions, ['name', 'calls', 'p50_ms', 'p95_ms', 'max_ms', 'total_ms', 'sql_ms', 'python_ms',
+                                'rows'])
+        _perf_histogram('data', functions['name'], "perf_data_histogram")
+
+    with tab3:
+        queries = get_perf_summary('query')
+        st.markdown("### Slowest queries")
+        st.caption("Per statement shape, from execute to the last row fetched.")
+        _perf_table(queries, ['name', 'calls', 'p50_ms', 'p95_ms', 'max_ms', 'total_ms', 'rows'], limit=25)
+        st.markdown("#### Most time in total")
+        _perf_table(queries.sort_values('total_ms', ascending=False),
+                    ['name', 'calls', 'total_ms', 'p95_ms', 'rows'], limit=25)
+
+    with tab4:
+        st.markdown("### Slow queries")
+        st.caption(f"Statements that took {SLOW_QUERY_MS:,g} ms or more from execute to last row "
+                   f"(FRAUDX_SLOW_QUERY_MS), with the plan SQLite chose for them. The newest "
+                   f"{SLOW_QUERY_LOG_ROWS:,} are kept in the slow_query_log table.")
+        log = get_slow_query_stats()
+        if log['dropped'] or log['errors']:
+            st.warning(f"{log['dropped']:,} slow statements were not logged because the queue was full and "
+                       f"{log['errors']:,} failed to write ({log['last_error']}).")
+        report = slow_query_report()
+        if report.empty:
+            st.caption("No slow statements logged yet.")
+        else:
+            st.markdown("#### Scans an index would fix")
+            fixable = report[report['suggested_index'].notna()]
+            if fixable.empty:
+                st.success("None of the logged full table scans would become a search with a single new index.")
+            else:
+                st.caption("Checked against the planner: with the index, SQLite searches instead of scanning.")
+                st.dataframe(fixable[['statement', 'calls', 'max_ms', 'full_scans', 'suggested_index']].round(1),
+                             use_container_width=True, hide_index=True)
+                st.code(";\n".join(fixable['suggested_index'].str.replace("; ", ";\n")) + ";", language='sql')
+            st.markdown("#### Slowest statements")
+            st.dataframe(report[['statement', 'calls', 'max_ms', 'mean_ms', 'mean_rows', 'param_shape', 'full_scans',
+                                 'context', 'last_seen']].round(1), use_container_width=True, hide_index=True)
+            statement = st.selectbox("Query plan for", report['statement'], key="perf_slow_plan")
+            st.code(report.loc[report['statement'] == statement, 'plan'].iloc[0] or "(no plan)", language=None)
+
+    with tab5:
+        st.markdown("### Charts")
+        st.caption("Python is building the figure (pandas and Plotly)"
+                   + ("; KB is the serialised figure sent to the browser." if PERF_CHART_BYTES else
+                      ". Set FRAUDX_PERF_CHART_BYTES=1 to also measure the KB sent per figure, "
+                      "at the cost of serialising each one twice."))
+        _perf_table(get_perf_summary('figure'), ['name', 'calls', 'p50_ms', 'p95_ms', 'python_ms', 'render_ms',
+                                                 'bytes'])
+
+    with tab6:
+        cache = get_result_cache_stats()
+        pool = get_pool_metrics()
+        col1, col2 = st.columns(2)
+        col1.metric("Result cache hit ratio", f"{cache['hit_ratio']:.0%}",
+                    help=f"{cache['hits']:,} hits, {cache['misses']:,} misses, {cache['entries']:,} entries "
+                         f"({cache['bytes'] / 2**20:,.0f} of {cache['max_bytes'] / 2**20:,.0f} MB)")
+        col2.metric("Average connection wait", f"{pool['wait_seconds_avg'] * 1000:,.2f} ms",
+                    help=f"{pool['checkouts']:,} checkouts, {pool['open_connections']} of {pool['max_size']} open")
+        st.markdown("#### Result cache by function")
+        st.dataframe(get_result_cache().function_stats(), use_container_width=True, hide_index=True)
+
 # --------------------------
 # Main App
 # --------------------------
 def main():
-    # Initialize database
+    # Apply pending schema migrations (runs once per server process)
     init_db()
     
     # Page configuration
@@ -1091,27 +4304,37 @@ def main():
         initial_sidebar_state="expanded"
     )
     
-    # Apply custom styles
-    apply_custom_styles()
+    # Everything after set_page_config is one 'rerun' sample, named after the page shown
+    with perf_span('rerun', "Login") as rerun:
+        # Apply custom styles
+        apply_custom_styles()
+        track_session()
     
-    # Check authentication
-    if 'logged_in' not in st.session_state:
-        st.session_state.logged_in = False
+        # Check authentication
+        if 'logged_in' not in st.session_state:
+            st.session_state.logged_in = False
     
-    if not st.session_state.logged_in:
-        login_page()
-    else:
-        create_sidebar()
-    if st.session_state.get('current_page') == "Case Builder":
-        show_case_builder()
-    elif st.session_state.get('current_page') == "Summary Dashboard":
-        show_summary_dashboard()
-    elif st.session_state.get('current_page') == "Case Analysis":
-        show_case_analysis()
-    elif st.session_state.get('current_page') == "Reports":
-        show_reports()
-    else:
-            launch_pad()
+        if not st.session_state.logged_in:
+            login_page()
+        else:
+            create_sidebar()
+            rerun.name = st.session_state['current_page']
+            if st.session_state.get('current_page') == "Case Builder":
+                show_case_builder()
+            elif st.session_state.get('current_page') == "Summary Dashboard":
+                show_summary_dashboard()
+            elif st.session_state.get('current_page') == "Bulk Import":
+                show_bulk_import()
+            elif st.session_state.get('current_page') == "Case Analysis":
+                show_case_analysis()
+            elif st.session_state.get('current_page') == "Reports":
+                show_reports()
+            elif st.session_state.get('current_page') == "Search":
+                show_search()
+            elif st.session_state.get('current_page') == "Performance":
+                show_performance()
+            else:
+                launch_pad()
         
 
 if __name__ == "__main__":
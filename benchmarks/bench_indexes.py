@@ -0,0 +1,139 @@
+"""Index benchmark for the cases table.
+
+Builds (or reuses) a database with --rows synthetic cases
+(benchmarks.synthetic, so the rollup and every derived table are filled
+as in the app), then checks the EXPLAIN QUERY PLAN of every listing,
+report and dashboard query shape the app issues and times it. Exits
+non-zero if any query falls back to a full table scan, sorts through a
+temp b-tree, for the shapes marked 'covering' is not answered from an
+index alone, or for the shapes marked 'rollup' reads cases at all.
+
+The shapes marked 'index' fetch whole rows (SELECT *), so they only have
+to avoid the scan and the sort and are reported as "ok, reads table rows".
+Report-year filters are the app's own WHERE clause (date_reported ranges),
+and the year options and per-year counts come from case_rollup.
+
+    python -m benchmarks.bench_indexes --rows 1000000 --db bench_cases.db
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+from benchmarks.synthetic import populate
+
+
+def query_shapes(F):
+    def report_where(**filters):
+        clauses, params = F._report_filter_sql(**filters)
+        return ' AND '.join(clauses), tuple(params)
+
+    years, year_params = report_where(years=(2019, 2020))
+    filtered, filtered_params = report_where(case_types=('Bank Fraud', 'Cyber Fraud'), severities=('High',),
+                                             years=(2018, 2020))
+    # (label, sql, params, expectation) where expectation is 'covering' when the
+    # query must be answered from an index alone, 'rollup' when it must not
+    # touch cases, and 'index' when it only needs to avoid a full scan and an
+    # ORDER BY sort (it may still read rows).
+    return [
+        ("cases: newest first",
+         "SELECT * FROM cases ORDER BY date_reported DESC LIMIT 100", (), 'index'),
+        ("get_case_types: distinct types",
+         "SELECT DISTINCT case_type FROM cases", (), 'covering'),
+        ("dashboard: cases by location",
+         "SELECT location, COUNT(*) FROM cases GROUP BY location", (), 'covering'),
+        ("dashboard: cases by report year",
+         "SELECT year, SUM(case_count) FROM case_rollup WHERE year <> 0 GROUP BY year", (), 'rollup'),
+        ("reports: year filter options",
+         "SELECT DISTINCT year FROM case_rollup WHERE year <> 0 ORDER BY year DESC", (), 'covering'),
+        ("reports: count by type + severity",
+         "SELECT COUNT(*) FROM cases WHERE case_type IN (?, ?) AND severity IN (?, ?)",
+         ('Bank Fraud', 'Cyber Fraud', 'High', 'Critical'), 'covering'),
+        ("reports: count by type + severity + year range",
+         "SELECT COUNT(*) FROM cases WHERE case_type IN (?, ?) AND severity = ? "
+         "AND date_reported >= ? AND date_reported < ?",
+         ('Bank Fraud', 'Cyber Fraud', 'High', '2020-01-01', '2021-01-01'), 'covering'),
+        ("reports: count by year",
+         f"SELECT COUNT(*) FROM cases WHERE {years}", year_params, 'covering'),
+        ("reports: count by type + severity + years",
+         f"SELECT COUNT(*) FROM cases WHERE {filtered}", filtered_params, 'covering'),
+        ("reports: rows for a year",
+         f"SELECT * FROM cases WHERE {years} LIMIT 100", year_params, 'index'),
+        ("reports: rows by type + severity",
+         "SELECT * FROM cases WHERE case_type = ? AND severity = ? "
+         "ORDER BY date_reported DESC, case_id DESC LIMIT 100", ('Tax Evasion', 'Critical'), 'index'),
+        ("reports: keyset page",
+         "SELECT * FROM cases WHERE date_reported IS NOT NULL AND (date_reported, case_id) < (?, ?) "
+         "ORDER BY date_reported DESC, case_id DESC LIMIT 51", ('2015-06-01', 500000), 'index'),
+        ("reports: keyset page by type",
+         "SELECT * FROM cases WHERE case_type IN (?, ?) AND date_reported IS NOT NULL "
+         "AND (date_reported, case_id) < (?, ?) ORDER BY date_reported DESC, case_id DESC LIMIT 51",
+         ('Bank Fraud', 'Tax Evasion', '2015-06-01', 500000), 'index'),
+    ]
+
+
+def check_plan(details, expectation):
+    problems = []
+    for detail in details:
+        if detail.startswith('SCAN cases') and 'INDEX' not in detail:
+            problems.append('full table scan')
+        if 'USE TEMP B-TREE' in detail:
+            problems.append('temp b-tree sort')
+    if expectation == 'covering' and not any('COVERING INDEX' in d for d in details):
+        problems.append('not index-only')
+    if expectation == 'rollup' and any(d.split()[:2] in (['SCAN', 'cases'], ['SEARCH', 'cases']) for d in details):
+        problems.append('reads cases')
+    return problems
+
+
+def time_query(conn, sql, params, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--db', default='bench_cases.db')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    # FraudX reads its database path at import time.
+    os.environ['FRAUDX_DB'] = args.db
+    import FraudX as F
+
+    F.init_db()
+    _, populate_seconds = populate(F, args.rows)
+    with F.db_connection() as conn:
+        total = conn.execute("SELECT COUNT(*) FROM cases").fetchone()[0]
+    setup = '' if populate_seconds is None else f" (setup {populate_seconds:.1f}s)"
+    print(f"{total:,} cases in {args.db}{setup}\n")
+
+    failures = 0
+    with F.db_connection() as conn:
+        for label, sql, params, expectation in query_shapes(F):
+            details = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+            problems = check_plan(details, expectation)
+            ms = time_query(conn, sql, params, args.repeat)
+            failures += bool(problems)
+            if problems:
+                status = 'FAIL ' + ', '.join(problems)
+            elif any('COVERING INDEX' in d for d in details):
+                status = 'ok, index-only'
+            elif expectation == 'rollup':
+                status = 'ok, from case_rollup'
+            else:
+                status = 'ok, reads table rows'
+            print(f"{label:<48} {ms:>9.2f} ms  {status}")
+            for detail in details:
+                print(f"    {detail}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
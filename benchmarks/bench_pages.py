@@ -0,0 +1,240 @@
+"""Page data-path benchmark at synthetic scales, checked against a baseline.
+
+For each --scales entry (10k, 100k, 1m, 10m) builds or reuses a database of
+synthetic cases (benchmarks.synthetic, so reruns with the same --seed see
+the same data), then in a fresh process runs what each page does to get
+its data before drawing anything: the Summary Dashboard, Case Analysis
+tabs, Reports (filters, pages, CSV export) and Search. The result cache is cleared before every call so each timing
+includes the queries. Per step it records the median/min/max of --repeat
+runs and the peak Python/numpy allocation of one more run under
+tracemalloc; per scale, the process's peak RSS.
+
+Results are written as JSON to --output. Any step whose median time or
+peak allocation has grown by more than --tolerance over --baseline (and by
+more than the noise floor) is listed under "regressions" and makes the run
+exit non-zero. --update-baseline folds this run's numbers into the
+baseline file instead. Baselines are only comparable on the same machine.
+
+    python -m benchmarks.bench_pages --scales 10k 100k --output pages.json
+    python -m benchmarks.bench_pages --scales 1m --update-baseline
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from benchmarks.synthetic import SCALES, populate
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(ROOT, 'benchmarks', 'baseline_pages.json')
+RESULTS_FORMAT = 1
+# Differences smaller than these are noise, whatever the ratio
+TIME_FLOOR_MS = 5.0
+MEMORY_FLOOR_MB = 4.0
+
+
+def page_steps(F):
+    # (step, setup, call): setup runs once, untimed, and returns what the
+    # call needs. Each call is what the named page does for its data.
+    def analysis_setup():
+        by_type = F.get_rollup(['case_type']).sort_values('cases', ascending=False)
+        return by_type['case_type'].iloc[0]
+
+    def analysis_charts(_):
+        F.get_rollup().iloc[0]
+        for dims in (['case_type'], ['year', 'month'], ['year', 'quarter'], ['year'], ['location'],
+                     ['case_type', 'severity']):
+            F.get_rollup(dims)
+
+    def analysis_type_drilldown(case_type):
+        F.get_rollup(case_type=case_type)
+        for dims in (['severity'], ['location'], ['month']):
+            F.get_rollup(dims, case_type=case_type)
+
+    def report_filters():
+        return tuple(F.get_case_types()[:2]), ('High', 'Critical'), tuple(F.get_report_years()[:2])
+
+    def report_export(_):
+        spool = F.export_report('CSV')
+        spool.seek(0, os.SEEK_END)
+        return spool.tell()
+
+    none = lambda: None
+    return [
+        ('dashboard/summary', none, lambda _: F.get_dashboard_summary()),
+        ('analysis/charts', none, analysis_charts),
+        ('analysis/type drilldown', analysis_setup, analysis_type_drilldown),
+        ('analysis/location map', none, lambda _: F.get_location_points()),
+        ('analysis/case clusters', none, lambda _: F.get_case_map_bins(5)),
+        ('analysis/anomalies', none, lambda _: (F.get_anomaly_summary(), F.get_top_anomalies(25))),
+        ('analysis/connections', none, lambda _: F.get_case_components()),
+        ('reports/filter options', none, lambda _: (F.get_case_types(), F.get_report_years())),
+        ('reports/first page', none, lambda _: (F.count_report_cases(), F.get_report_page(page_size=50))),
+        ('reports/filtered page', report_filters,
+         lambda f: (F.count_report_cases(*f), F.get_report_page(*f, page_size=50))),
+        ('reports/export csv', none, report_export),
+        ('search/term', none, lambda _: (F.count_search_matches('payment'), F.search_cases('payment'))),
+        ('search/phrase', none,
+         lambda _: (F.count_search_matches('"ghost workers"'), F.search_cases('"ghost workers"'))),
+    ]
+
+
+def measure(F, setup, call, repeat):
+    arg = setup()
+    cache = F.get_result_cache()
+    timings = []
+    for _ in range(repeat):
+        cache.clear()
+        started = time.perf_counter()
+        call(arg)
+        timings.append((time.perf_counter() - started) * 1000)
+    cache.clear()
+    tracemalloc.start()
+    try:
+        call(arg)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    cache.clear()
+    timings.sort()
+    return {'median_ms': round(timings[len(timings) // 2], 3), 'min_ms': round(timings[0], 3),
+            'max_ms': round(timings[-1], 3), 'peak_alloc_mb': round(peak / 2**20, 3)}
+
+
+def child(scale, db, repeat, seed, only):
+    # Runs in its own process: FraudX reads its database path at import time,
+    # and each scale should start with a cold process.
+    import FraudX as F
+
+    F.init_db()
+
+    def report(have):
+        print(f"\r  {scale}: {have:,} cases generated", end='', file=sys.stderr, flush=True)
+
+    rows, populate_seconds = populate(F, SCALES[scale], seed, progress=report)
+    if populate_seconds is not None:
+        print(file=sys.stderr)
+    steps = {}
+    for name, setup, call in page_steps(F):
+        if only and not any(name.startswith(prefix) for prefix in only):
+            continue
+        steps[name] = measure(F, setup, call, repeat)
+        print(f"  {scale}: {name:<28} {steps[name]['median_ms']:>10.1f} ms", file=sys.stderr, flush=True)
+    with F.db_connection() as conn:
+        total = conn.execute("SELECT COUNT(*) FROM cases").fetchone()[0]
+    print(json.dumps({
+        'rows': total,
+        'synthetic_rows': rows,
+        'db': os.path.basename(db),
+        'populate_seconds': populate_seconds,
+        # ru_maxrss is in KiB on Linux
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'steps': steps,
+    }))
+
+
+def run_child(scale, db, args):
+    command = [sys.executable, '-m', 'benchmarks.bench_pages', '--child', scale, '--child-db', db,
+               '--repeat', str(args.repeat), '--seed', str(args.seed)]
+    if args.only:
+        command += ['--only', *args.only]
+    env = dict(os.environ, FRAUDX_DB=db)
+    out = subprocess.run(command, cwd=ROOT, env=env, check=True, stdout=subprocess.PIPE, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def environment():
+    import sqlite3
+
+    import numpy
+    import pandas
+    return {'python': platform.python_version(), 'platform': platform.platform(),
+            'machine': platform.machine(), 'cpus': os.cpu_count(), 'sqlite': sqlite3.sqlite_version,
+            'pandas': pandas.__version__, 'numpy': numpy.__version__}
+
+
+def find_regressions(results, baseline, tolerance):
+    regressions = []
+    for scale, current in results['scales'].items():
+        before = baseline.get('scales', {}).get(scale)
+        if not before or before.get('synthetic_rows') != current['synthetic_rows']:
+            continue
+        for step, now in current['steps'].items():
+            then = before['steps'].get(step)
+            if not then:
+                continue
+            for metric, floor in (('median_ms', TIME_FLOOR_MS), ('peak_alloc_mb', MEMORY_FLOOR_MB)):
+                if now[metric] > then[metric] * (1 + tolerance) and now[metric] - then[metric] > floor:
+                    regressions.append({'scale': scale, 'step': step, 'metric': metric,
+                                        'baseline': then[metric], 'current': now[metric],
+                                        'ratio': round(now[metric] / then[metric], 2) if then[metric] else None})
+    return regressions
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', nargs='+', choices=list(SCALES), default=['10k', '100k'])
+    parser.add_argument('--db-dir', default='.', help="where the bench_pages_<scale>.db files are kept")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--only', nargs='+', metavar='PREFIX', help="run only steps starting with these, e.g. reports/")
+    parser.add_argument('--output', help="write the results JSON here (default: stdout)")
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--tolerance', type=float, default=0.3,
+                        help="flag a step when it is this fraction slower or larger than the baseline")
+    parser.add_argument('--update-baseline', action='store_true',
+                        help="store this run's numbers as the baseline for its scales")
+    parser.add_argument('--child', choices=list(SCALES), help=argparse.SUPPRESS)
+    parser.add_argument('--child-db', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child(args.child, args.child_db, args.repeat, args.seed, args.only)
+        return 0
+
+    results = {'format': RESULTS_FORMAT, 'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+               'seed': args.seed, 'repeat': args.repeat, 'environment': environment(), 'scales': {}}
+    for scale in args.scales:
+        db = os.path.abspath(os.path.join(args.db_dir, f'bench_pages_{scale}.db'))
+        print(f"{scale} ({db})", file=sys.stderr)
+        results['scales'][scale] = run_child(scale, db, args)
+
+    baseline = load_baseline(args.baseline)
+    if args.update_baseline:
+        merged = dict(results, scales={**baseline.get('scales', {}), **results['scales']})
+        with open(args.baseline, 'w') as f:
+            json.dump(merged, f, indent=1, sort_keys=True)
+            f.write('\n')
+        print(f"baseline updated for {', '.join(args.scales)}: {args.baseline}", file=sys.stderr)
+        results['regressions'] = []
+    else:
+        results['regressions'] = find_regressions(results, baseline, args.tolerance)
+
+    text = json.dumps(results, indent=1)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    for r in results['regressions']:
+        print(f"REGRESSION {r['scale']} {r['step']}: {r['metric']} {r['baseline']:,.1f} -> {r['current']:,.1f}",
+              file=sys.stderr)
+    return 1 if results['regressions'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""Full-text search benchmark for the cases_fts index.
+
+Builds (or reuses) a database with --rows synthetic cases
+(benchmarks.synthetic, whose narratives, parties and agencies are drawn
+from a fraud vocabulary), then times the search shapes the Search page issues (term, prefix, phrase, OR,
+rare term) for both the ranked page and the match count. Each one is also
+checked to go through the FTS index rather than scanning cases. Exits
+non-zero if any query scans or its median exceeds --max-ms.
+
+    python -m benchmarks.bench_search --rows 1000000 --db bench_search.db
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+from benchmarks.bench_indexes import check_plan
+from benchmarks.synthetic import populate
+
+
+def search_shapes():
+    return [
+        ("common term", 'payment'),
+        ("two terms (AND)", 'offshore transfer'),
+        ("prefix", 'launder*'),
+        ("phrase", '"ghost workers"'),
+        ("OR", 'gold OR forex'),
+        ("party surname + agency", 'Mpofu ZACC'),
+        ("court reference", '"HC 1234"'),
+        ("rare terms", 'borehole bursary clinic pensioners'),
+    ]
+
+
+def time_call(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--db', default='bench_search.db')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--max-ms', type=float, default=250.0,
+                        help="fail if a median page or count query is slower than this")
+    args = parser.parse_args(argv)
+
+    # FraudX reads its database path at import time.
+    os.environ['FRAUDX_DB'] = args.db
+    import FraudX as F
+
+    F.init_db()
+    # Inserts fire the cases_fts triggers, so the load time includes index upkeep
+    _, load_seconds = populate(F, args.rows)
+    with F.db_connection() as conn:
+        total = conn.execute("SELECT COUNT(*) FROM cases").fetchone()[0]
+    print(f"{total:,} cases in {args.db}")
+    if load_seconds is not None:
+        print(f"loaded through CASE_INSERT_SQL and after_cases_inserted in {load_seconds:.1f}s")
+    print()
+
+    failures = 0
+    print(f"{'query':<28} {'matches':>9} {'page ms':>9} {'count ms':>9}")
+    with F.db_connection() as conn:
+        for label, text in search_shapes():
+            match = F.build_search_query(text)
+            params = ('[', ']', match, 0, F.SEARCH_PAGE_SIZE, 0)
+            details = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + F.SEARCH_PAGE_SQL, params)]
+            problems = check_plan(details, 'index')
+            if not any('VIRTUAL TABLE' in d for d in details):
+                problems.append('not answered by cases_fts')
+            # Bypass the result cache to time the queries themselves
+            matches = F.count_search_matches.__wrapped__(text)
+            page_ms = time_call(lambda: F.search_cases.__wrapped__(text), args.repeat)
+            count_ms = time_call(lambda: F.count_search_matches.__wrapped__(text), args.repeat)
+            if max(page_ms, count_ms) > args.max_ms:
+                problems.append(f'slower than {args.max_ms:g} ms')
+            failures += bool(problems)
+            status = 'FAIL ' + ', '.join(problems) if problems else 'ok'
+            print(f"{label:<28} {matches:>9,} {page_ms:>9.2f} {count_ms:>9.2f}  {status}")
+
+        # For reference: the LIKE scan the index replaces
+        like_sql = "SELECT COUNT(*) FROM cases WHERE description LIKE ? OR parties_involved LIKE ?"
+        like_ms = time_call(lambda: conn.execute(like_sql, ('%ghost workers%', '%Mpofu%')).fetchall(), 1)
+        print(f"{'LIKE scan (reference)':<28} {'':>9} {like_ms:>9.2f}")
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
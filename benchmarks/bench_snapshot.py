@@ -0,0 +1,154 @@
+"""Cold-load benchmark for a columnar snapshot of the cases frame.
+
+Builds (or reuses) a database with --rows synthetic cases, writes an Arrow
+snapshot of the cases frame next to it (uncompressed Arrow IPC, i.e.
+Feather v2), then loads the frame in fresh processes both ways: from SQL
+(SELECT *, converted chunk by chunk to the compact row schema the Reports
+page uses) and from the memory-mapped snapshot. Reports wall time, peak
+RSS growth and in-memory frame size for each, best of --repeat runs. Exits
+non-zero if the snapshot load is not at least --min-speedup times faster.
+
+The app itself never loads the whole frame (its pages query SQL and the
+case_rollup cube), so the snapshot lives here rather than in FraudX.
+
+    python -m benchmarks.bench_snapshot --rows 1000000 --db bench_cases.db
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+from benchmarks.synthetic import populate
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOAD_CHUNK_ROWS = 100000
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def read_case_frame(F, conn):
+    # Every case in report order, in the app's compact row schema. Each chunk
+    # is converted as it arrives, so the object-dtype copy of the raw rows
+    # never exists for the whole table.
+    import pandas as pd
+
+    sql = "SELECT * FROM cases ORDER BY date_reported DESC"
+    frames = [F._typed_case_frame(chunk) for chunk in pd.read_sql(sql, conn, chunksize=LOAD_CHUNK_ROWS)]
+    return F._concat_case_frames(frames or [F._typed_case_frame(pd.read_sql(f"{sql} LIMIT 0", conn))])
+
+
+def write_snapshot(frame, path):
+    # Written as a single record batch so every column maps back as one
+    # contiguous buffer; replaced atomically so a reader never sees a
+    # partial file.
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(frame, preserve_index=False).combine_chunks()
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return os.path.getsize(path)
+
+
+def read_snapshot(F, path):
+    # Memory-maps the snapshot; numeric and timestamp columns without nulls
+    # become pandas blocks over the mapped buffers without a copy, and the
+    # dictionary columns become Categoricals.
+    import pyarrow as pa
+
+    table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    text = {pa.string(): F._case_text_dtype(), pa.large_string(): F._case_text_dtype()}
+    return table.to_pandas(split_blocks=True, types_mapper=text.get)
+
+
+def child(mode, snapshot_path):
+    # Runs in its own process so each load is genuinely cold
+    import FraudX as F
+
+    F.init_db()
+    base = peak_rss_mb()
+    started = time.perf_counter()
+    if mode == 'snapshot':
+        frame = read_snapshot(F, snapshot_path)
+    else:
+        with F.db_connection() as conn:
+            frame = read_case_frame(F, conn)
+    seconds = time.perf_counter() - started
+    result = {'mode': mode, 'seconds': seconds, 'rss_mb': peak_rss_mb() - base,
+              'frame_mb': frame.memory_usage(deep=True).sum() / 2**20, 'rows': len(frame)}
+    if mode == 'write':
+        started = time.perf_counter()
+        result['bytes'] = write_snapshot(frame, snapshot_path)
+        result['seconds'] = time.perf_counter() - started
+    print(json.dumps(result))
+
+
+def run_child(mode, db, snapshot_path):
+    env = dict(os.environ, FRAUDX_DB=db)
+    command = [sys.executable, '-m', 'benchmarks.bench_snapshot', '--child', mode, '--snapshot', snapshot_path]
+    out = subprocess.run(command, cwd=ROOT, env=env, check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--db', default='bench_cases.db')
+    parser.add_argument('--snapshot', help="where to write the snapshot (default: the database path + .cases.arrow)")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--min-speedup', type=float, default=2.0,
+                        help="fail unless the snapshot loads at least this many times faster")
+    parser.add_argument('--child', choices=['sql', 'snapshot', 'write'], help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child(args.child, args.snapshot)
+        return 0
+
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        print("the snapshot needs pyarrow; pip install pyarrow")
+        return 1
+
+    db = os.path.abspath(args.db)
+    snapshot_path = os.path.abspath(args.snapshot or f"{args.db}.cases.arrow")
+    # FraudX reads its database path at import time.
+    os.environ['FRAUDX_DB'] = db
+    import FraudX as F
+
+    F.init_db()
+    populate(F, args.rows)
+    with F.db_connection() as conn:
+        total = conn.execute("SELECT COUNT(*) FROM cases").fetchone()[0]
+    written = run_child('write', db, snapshot_path)
+    print(f"{total:,} cases in {args.db}")
+    print(f"snapshot {snapshot_path}: {written['bytes'] / 2**20:,.1f} MB written in {written['seconds']:.2f}s\n")
+
+    best = {}
+    for mode in ('sql', 'snapshot'):
+        runs = [run_child(mode, db, snapshot_path) for _ in range(args.repeat)]
+        best[mode] = min(runs, key=lambda run: run['seconds'])
+
+    print(f"{'load':<22} {'seconds':>9} {'peak RSS MB':>12} {'frame MB':>10}")
+    for mode, label in (('sql', 'SQL'), ('snapshot', 'snapshot (mmap)')):
+        run = best[mode]
+        print(f"{label:<22} {run['seconds']:>9.2f} {run['rss_mb']:>12,.0f} {run['frame_mb']:>10,.0f}")
+    speedup = best['sql']['seconds'] / best['snapshot']['seconds']
+    print(f"\nsnapshot speedup {speedup:.1f}x")
+    return 0 if speedup >= args.min_speedup else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
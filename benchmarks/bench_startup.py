@@ -0,0 +1,214 @@
+"""Cold-start benchmark: import time and time-to-first-paint of the login page.
+
+In a fresh process, times `import streamlit` and then `import FraudX`, and
+lists which of the heavy analytics modules (pandas, numpy, plotly.express,
+pyarrow, streamlit_option_menu) that import pulled in; the login page and
+launch pad should load none of them. Then, --repeat times, starts
+`streamlit run FraudX.py` against a database with no pending migrations
+and opens two browser-like sessions over the websocket: the first pays for
+the script's imports (cold), the second reruns it in a warm server. For
+each it records the time to the first element drawn and to the end of the
+script run.
+
+Results are written as JSON to --output (default: stdout). The run exits
+non-zero if the import loaded a heavy module, or if the median FraudX
+import or cold first paint is over --max-import-ms / --max-first-paint-ms.
+
+    python -m benchmarks.bench_startup --repeat 5 --max-first-paint-ms 800
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_FORMAT = 1
+HEAVY_MODULES = ['pandas', 'numpy', 'plotly.express', 'pyarrow', 'streamlit_option_menu']
+SERVER_START_TIMEOUT = 60.0
+SESSION_TIMEOUT = 120.0
+
+
+def child_import():
+    # Runs in its own process so both imports are genuinely cold
+    started = time.perf_counter()
+    import streamlit  # noqa: F401
+    streamlit_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    import FraudX  # noqa: F401
+    fraudx_ms = (time.perf_counter() - started) * 1000
+    print(json.dumps({'streamlit_ms': round(streamlit_ms, 1), 'fraudx_ms': round(fraudx_ms, 1),
+                      'heavy_modules': [name for name in HEAVY_MODULES if name in sys.modules]}))
+
+
+def measure_import(db):
+    env = dict(os.environ, FRAUDX_DB=db)
+    out = subprocess.run([sys.executable, '-m', 'benchmarks.bench_startup', '--child', 'import'],
+                         cwd=ROOT, env=env, check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('localhost', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_server(port, server):
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"streamlit exited with status {server.returncode}")
+        try:
+            with urllib.request.urlopen(f"http://localhost:{port}/_stcore/health", timeout=1) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.05)
+    raise RuntimeError(f"streamlit did not answer on port {port} within {SERVER_START_TIMEOUT:.0f}s")
+
+
+async def open_session(port):
+    # What a browser tab does: connect, ask for a script run, and read
+    # forward messages until the run finishes.
+    from streamlit.proto.BackMsg_pb2 import BackMsg
+    from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+    from tornado.websocket import websocket_connect
+
+    started = time.perf_counter()
+    ws = await websocket_connect(f"ws://localhost:{port}/_stcore/stream")
+    try:
+        request = BackMsg()
+        request.rerun_script.query_string = ''
+        request.rerun_script.page_script_hash = ''
+        await ws.write_message(request.SerializeToString(), binary=True)
+        first_paint = None
+        while True:
+            data = await ws.read_message()
+            if data is None:
+                raise RuntimeError("the server closed the session before the script finished")
+            message = ForwardMsg()
+            message.ParseFromString(data)
+            kind = message.WhichOneof('type')
+            if kind == 'delta' and first_paint is None:
+                first_paint = time.perf_counter() - started
+            elif kind == 'script_finished':
+                finished = time.perf_counter() - started
+                return {'first_paint_ms': round(first_paint * 1000, 1), 'finished_ms': round(finished * 1000, 1)}
+    finally:
+        ws.close()
+
+
+def measure_server(db):
+    port = free_port()
+    env = dict(os.environ, FRAUDX_DB=db)
+    command = [sys.executable, '-m', 'streamlit', 'run', 'FraudX.py', '--server.headless', 'true',
+               '--server.port', str(port), '--server.fileWatcherType', 'none',
+               '--browser.gatherUsageStats', 'false']
+    started = time.perf_counter()
+    server = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_server(port, server)
+        result = {'server_ready_ms': round((time.perf_counter() - started) * 1000, 1)}
+        for session in ('cold', 'warm'):
+            result[session] = asyncio.run(asyncio.wait_for(open_session(port), SESSION_TIMEOUT))
+        return result
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+            server.wait()
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def environment():
+    import sqlite3
+
+    import streamlit
+    return {'python': platform.python_version(), 'platform': platform.platform(),
+            'machine': platform.machine(), 'cpus': os.cpu_count(), 'sqlite': sqlite3.sqlite_version,
+            'streamlit': streamlit.__version__}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', default='bench_startup.db')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help="write the results JSON here (default: stdout)")
+    parser.add_argument('--max-import-ms', type=float,
+                        help="fail when the median `import FraudX` takes longer than this")
+    parser.add_argument('--max-first-paint-ms', type=float,
+                        help="fail when the median cold first paint of the login page takes longer than this")
+    parser.add_argument('--child', choices=['import'], help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child_import()
+        return 0
+
+    db = os.path.abspath(args.db)
+    # Migrations run once per database, not per start; apply them up front
+    # so the server runs see the steady state.
+    os.environ['FRAUDX_DB'] = db
+    import FraudX as F
+
+    F.init_db()
+
+    runs = []
+    for run in range(args.repeat):
+        imported = measure_import(db)
+        served = measure_server(db)
+        runs.append({'import': imported, 'server': served})
+        print(f"  run {run + 1}: import FraudX {imported['fraudx_ms']:>7.1f} ms"
+              f"   cold first paint {served['cold']['first_paint_ms']:>7.1f} ms"
+              f"   warm first paint {served['warm']['first_paint_ms']:>7.1f} ms", file=sys.stderr, flush=True)
+
+    summary = {
+        'import_streamlit_ms': median(r['import']['streamlit_ms'] for r in runs),
+        'import_fraudx_ms': median(r['import']['fraudx_ms'] for r in runs),
+        'server_ready_ms': median(r['server']['server_ready_ms'] for r in runs),
+    }
+    for session in ('cold', 'warm'):
+        for metric in ('first_paint_ms', 'finished_ms'):
+            summary[f'{session}_{metric}'] = median(r['server'][session][metric] for r in runs)
+    heavy = sorted({name for r in runs for name in r['import']['heavy_modules']})
+
+    failures = []
+    if heavy:
+        failures.append(f"import FraudX loaded {', '.join(heavy)}")
+    if args.max_import_ms is not None and summary['import_fraudx_ms'] > args.max_import_ms:
+        failures.append(f"import FraudX took {summary['import_fraudx_ms']:.1f} ms (limit {args.max_import_ms:.0f})")
+    if args.max_first_paint_ms is not None and summary['cold_first_paint_ms'] > args.max_first_paint_ms:
+        failures.append(f"cold first paint took {summary['cold_first_paint_ms']:.1f} ms "
+                        f"(limit {args.max_first_paint_ms:.0f})")
+
+    results = {'format': RESULTS_FORMAT, 'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+               'repeat': args.repeat, 'environment': environment(), 'summary': summary,
+               'heavy_modules_at_import': heavy, 'runs': runs, 'failures': failures}
+    text = json.dumps(results, indent=1)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,398 @@
+"""Concurrent-session load test for the app, driven headlessly with AppTest.
+
+Starts --sessions simulated investigators in one process, the way one
+Streamlit server hosts them. Each session:
+- logs in through the login form as a load-test user;
+- goes --cycles times through every page its sidebar menu offers, in menu
+  order but starting at a different page from its neighbours;
+- on each page, flips the radios, sliders and filters an investigator would
+  (pages without a scenario, such as Bulk Import, are just opened: AppTest
+  cannot drive a file upload).
+Session 0 is promoted to Admin after logging in, so the admin-only Case
+Builder, the Performance page and the admin sidebar panels are exercised
+too; the other sessions' menus do not list Performance, so they skip it.
+With --writes the admin also submits a case every cycle, which invalidates
+every session's cached results.
+
+Every rerun is timed end to end (script run plus widget tree), and the
+SQLite time spent inside it is read from the app's own statement tracing:
+the harness hooks the app's perf recorder and adds up the SQL time of the
+'rerun' samples each session records, so FRAUDX_PERF must be on. The
+report gives, per page and per action, rerun latency
+percentiles, mean DB time and its share of the rerun, plus the process's
+baseline and peak RSS. It is printed as a table and written as JSON. The
+run exits non-zero if any rerun raised or a page's p95 exceeds --max-p95-ms.
+
+    python -m benchmarks.load_test --sessions 8 --cycles 2 --db bench_pages_100k.db --rows 100k
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from unittest.mock import MagicMock, patch
+
+from benchmarks.synthetic import parse_rows, populate
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, 'FraudX.py')
+LOAD_USER = 'loadtest'
+LOAD_PASSWORD = 'loadtest-password'
+PERCENTILES = (50, 90, 95, 99)
+RSS_SAMPLE_SECONDS = 0.1
+
+# Harness thread -> simulated session id, read when AppTest builds its runner
+_current = threading.local()
+# Session id -> page the sidebar menu returns for it, and the pages it
+# offered on the session's last rerun
+_menu_pages = {}
+_menu_options = {}
+# Session id -> SQL ms of the 'rerun' perf samples it recorded since the
+# harness last collected them
+_rerun_sql_ms = defaultdict(float)
+
+
+# --------------------------
+# Instrumentation
+# --------------------------
+@contextmanager
+def instrumented_streamlit(timeout):
+    # AppTest was written for one test at a time: every run installs and then
+    # clears a process-wide mock Runtime, patches config.get_option, and
+    # gives every session the same id. Run concurrently, one session ending
+    # would pull the runtime out from under the others (and the app's
+    # st.cache_resource singletons with it). So for the whole load test:
+    # one runtime that stays, appTest config that stays on, a distinct
+    # session id per simulated user, and a sidebar menu answered per session
+    # that remembers which pages it listed. AppTest also compiles the script
+    # afresh for every run, and concurrent compiles of it now and then fail
+    # with a SystemError, so the runners share one script cache, as a
+    # server's sessions do. Finally, one warm-up run creates the app's perf
+    # recorder, and its record() is hooked to add each session's rerun SQL
+    # time to _rerun_sql_ms.
+    from streamlit import config
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import AppTest, app_test
+    import streamlit_option_menu
+
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    get_option = config.get_option
+    script_cache = ScriptCache()
+    # Every run executes the app as a fresh __main__ module; the last one
+    app_module = {}
+
+    class SessionScriptRunner(app_test.LocalScriptRunner):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self._session_id = getattr(_current, 'session_id', self._session_id)
+            self._script_cache = script_cache
+
+        def _new_module(self, name):
+            module = app_module['module'] = super()._new_module(name)
+            return module
+
+    def option_menu(title, options, *args, default_index=0, **kwargs):
+        ctx = get_script_run_ctx()
+        session_id = ctx.session_id if ctx else None
+        _menu_options[session_id] = list(options)
+        page = _menu_pages.get(session_id)
+        return page if page in options else options[default_index]
+
+    with ExitStack() as stack:
+        stack.enter_context(patch.object(Runtime, 'exists', classmethod(lambda cls: True)))
+        stack.enter_context(patch.object(Runtime, 'instance', classmethod(lambda cls: runtime)))
+        stack.enter_context(patch.object(config, 'get_option',
+                                         lambda name: True if name == 'global.appTest' else get_option(name)))
+        stack.enter_context(patch.object(app_test, 'LocalScriptRunner', SessionScriptRunner))
+        stack.enter_context(patch.object(streamlit_option_menu, 'option_menu', option_menu))
+
+        warmup = AppTest.from_file(APP_PATH, default_timeout=timeout).run()
+        if warmup.exception:
+            raise RuntimeError(f"the app failed to load: {warmup.exception[0].value}")
+        # The recorder is a cache_resource singleton made by the warm-up
+        # run, so it is an instance of that run's PerfRecorder class and every
+        # later run hands out the same one. (Calling get_perf_recorder() from
+        # here, outside a script run, would miss the cache and make another.)
+        recorder_class = app_module['module'].PerfRecorder
+        record = recorder_class.record
+
+        def hooked_record(self, kind, name, ms, sql_ms=0.0, *args, **kwargs):
+            ctx = get_script_run_ctx()
+            if kind == 'rerun' and ctx is not None:
+                _rerun_sql_ms[ctx.session_id] += sql_ms
+            return record(self, kind, name, ms, sql_ms, *args, **kwargs)
+
+        stack.enter_context(patch.object(recorder_class, 'record', hooked_record))
+        yield
+
+
+# --------------------------
+# Simulated sessions
+# --------------------------
+def _widget(at, kind, label=None, key=None):
+    for widget in getattr(at, kind):
+        if (key is not None and widget.key == key) or (label is not None and widget.label == label):
+            return widget
+    raise LookupError(f"no {kind} {key or label!r} on the page")
+
+
+def _set(kind, value, label=None, key=None):
+    return lambda at: _widget(at, kind, label, key).set_value(value)
+
+
+def _first_options(label, count):
+    def action(at):
+        widget = _widget(at, 'multiselect', label)
+        return widget.set_value(widget.options[:count])
+    return action
+
+
+def _submit_case(at):
+    stamp = f"{threading.get_ident()}-{time.time_ns()}"
+    _widget(at, 'text_input', 'Case Name').set_value(f"Load test case {stamp}")
+    _widget(at, 'text_area', 'Description').set_value(f"Submitted by the load test harness, run {stamp}, "
+                                                      f"to exercise case inserts under concurrent reads.")
+    _widget(at, 'text_input', 'Location').set_value('Harare')
+    _widget(at, 'number_input', 'Amount Involved').set_value(25000.0)
+    _widget(at, 'text_input', 'Parties Involved').set_value('Load Test Holdings')
+    return _widget(at, 'button', '➕ Submit Case').click()
+
+
+# (action, interaction) per page; an interaction returns the widget whose
+# run() performs the rerun, None just opens the page
+SCENARIOS = {
+    'Summary Dashboard': [('open', None)],
+    'Case Analysis': [
+        ('open', None),
+        ('quarterly', _set('radio', 'Quarterly', label='Time Aggregation')),
+        ('yearly', _set('radio', 'Yearly', label='Time Aggregation')),
+        ('case clusters', _set('radio', 'Case clusters', key='map_mode')),
+        ('zoom 8', _set('slider', 8, key='map_zoom')),
+        ('by location', _set('radio', 'By location', key='map_mode')),
+    ],
+    'Reports': [
+        ('open', None),
+        ('filter types', _first_options('Filter by Case Type', 2)),
+        ('filter severity', _set('multiselect', ['High', 'Critical'], label='Filter by Severity')),
+        ('next page', lambda at: _widget(at, 'button', key='report_next').click()),
+        ('page size 250', _set('selectbox', 250, label='Rows per page')),
+        ('clear filters', lambda at: (_widget(at, 'multiselect', 'Filter by Severity').set_value([]),
+                                      _widget(at, 'multiselect', 'Filter by Case Type').set_value([]))[-1]),
+    ],
+    'Case Builder': [('open', None)],
+    'Search': [
+        ('open', None),
+        ('term', _set('text_input', 'payment', key='search_query')),
+        ('phrase', _set('text_input', '"ghost workers"', key='search_query')),
+    ],
+    'Launch Pad': [('open', None)],
+}
+OPEN_ONLY = [('open', None)]
+
+
+class LoadSession:
+    def __init__(self, number, cycles, admin, writes, timeout):
+        from streamlit.testing.v1 import AppTest
+
+        self.number = number
+        self.session_id = f"load-session-{number}"
+        self.cycles = cycles
+        self.admin = admin
+        self.writes = writes
+        self.timeout = timeout
+        self.at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+        self.records = []
+
+    def rerun(self, page, action, interaction=None):
+        _menu_pages[self.session_id] = page
+        _rerun_sql_ms.pop(self.session_id, None)
+        error = None
+        started = time.perf_counter()
+        try:
+            target = interaction(self.at) if interaction else self.at
+            target.run(timeout=self.timeout)
+            if self.at.exception:
+                error = self.at.exception[0].value
+            elif not self.at.main.children:
+                # AppTest reports a script that failed to compile as an empty page
+                error = "the script run drew nothing"
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        elapsed = time.perf_counter() - started
+        # A login's st.rerun() records two 'rerun' samples in one run
+        self.records.append({'session': self.number, 'page': page, 'action': action, 'ms': elapsed * 1000,
+                             'db_ms': _rerun_sql_ms.pop(self.session_id, 0.0), 'error': error})
+
+    def login(self):
+        self.rerun('Login', 'open')
+        _widget(self.at, 'text_input', 'Username').set_value(LOAD_USER)
+        _widget(self.at, 'text_input', 'Password').set_value(LOAD_PASSWORD)
+        self.rerun('Login', 'sign in', lambda at: _widget(at, 'button', 'Login').click())
+        if not self.at.session_state['logged_in']:
+            raise RuntimeError(f"session {self.number} could not log in")
+
+    def run(self, barrier, admin_username):
+        _current.session_id = self.session_id
+        barrier.wait()
+        self.login()
+        pages = _menu_options[self.session_id]
+        if self.admin:
+            # Set between runs, so Streamlit logs a (harmless) missing
+            # ScriptRunContext warning. Redraw the first page so the menu
+            # lists the admin pages too.
+            self.at.session_state['username'] = admin_username
+            self.rerun(pages[0], 'open')
+            pages = _menu_options[self.session_id]
+        # Neighbouring sessions start on different pages
+        start = self.number % len(pages)
+        order = pages[start:] + pages[:start]
+        for _ in range(self.cycles):
+            for page in order:
+                for action, interaction in SCENARIOS.get(page, OPEN_ONLY):
+                    self.rerun(page, action, interaction)
+                if page == 'Case Builder' and self.admin and self.writes:
+                    self.rerun(page, 'submit case', _submit_case)
+
+
+# --------------------------
+# Reporting
+# --------------------------
+def percentile(sorted_values, p):
+    # Nearest-rank percentile
+    index = max(0, min(len(sorted_values) - 1, int(round(p / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def summarize(records):
+    ms = sorted(r['ms'] for r in records)
+    db_ms = sum(r['db_ms'] for r in records)
+    summary = {'reruns': len(records), 'errors': sum(r['error'] is not None for r in records)}
+    summary.update({f'p{p}_ms': round(percentile(ms, p), 1) for p in PERCENTILES})
+    summary.update({'max_ms': round(ms[-1], 1), 'mean_ms': round(statistics.fmean(ms), 1),
+                    'mean_db_ms': round(db_ms / len(records), 1),
+                    'db_share': round(db_ms / sum(ms), 3) if sum(ms) else 0.0})
+    return summary
+
+
+def group(records, *fields):
+    groups = defaultdict(list)
+    for record in records:
+        groups[' / '.join(record[f] for f in fields)].append(record)
+    return {name: summarize(rows) for name, rows in groups.items()}
+
+
+class RssSampler(threading.Thread):
+    def __init__(self, read_rss):
+        super().__init__(daemon=True)
+        self.read_rss = read_rss
+        self.peak = self.read_rss() or 0
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(RSS_SAMPLE_SECONDS):
+            self.peak = max(self.peak, self.read_rss() or 0)
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=4)
+    parser.add_argument('--cycles', type=int, default=2, help="times each session goes through every page")
+    parser.add_argument('--db', default='bench_load.db')
+    parser.add_argument('--rows', type=parse_rows, default=parse_rows('100k'),
+                        help="synthetic cases to top the database up to first: 10k, 100k, 1m, 10m or a number")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--writes', action='store_true', help="the admin session submits a case every cycle")
+    parser.add_argument('--timeout', type=float, default=600.0, help="seconds one rerun may take")
+    parser.add_argument('--max-p95-ms', type=float, help="fail if any page's p95 rerun latency exceeds this")
+    parser.add_argument('--output', help="write the results JSON here (default: stdout)")
+    args = parser.parse_args(argv)
+
+    # FraudX reads its database path at import time, and so does each AppTest run.
+    os.environ['FRAUDX_DB'] = os.path.abspath(args.db)
+    import FraudX as F
+
+    F.init_db()
+    total, _ = populate(F, args.rows, args.seed)
+    F.create_user(LOAD_USER, LOAD_PASSWORD)
+    print(f"{total:,} synthetic cases in {args.db}; {args.sessions} sessions x {args.cycles} cycles",
+          file=sys.stderr)
+
+    sessions = [LoadSession(n, args.cycles, admin=n == 0, writes=args.writes, timeout=args.timeout)
+                for n in range(args.sessions)]
+    barrier = threading.Barrier(len(sessions))
+    failures = []
+
+    def drive(session):
+        try:
+            session.run(barrier, F.ADMIN_USERNAME)
+        except Exception as e:
+            failures.append(f"session {session.number}: {type(e).__name__}: {e}")
+
+    with instrumented_streamlit(args.timeout):
+        baseline_rss = F.process_rss_bytes()
+        sampler = RssSampler(F.process_rss_bytes)
+        sampler.start()
+        started = time.perf_counter()
+        threads = [threading.Thread(target=drive, args=(s,), name=s.session_id) for s in sessions]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - started
+        sampler.stop()
+
+    records = [r for s in sessions for r in s.records]
+    errors = [r for r in records if r['error']]
+    pages = group(records, 'page')
+    results = {
+        'sessions': args.sessions, 'cycles': args.cycles, 'rows': total, 'writes': args.writes,
+        'wall_seconds': round(wall, 2), 'reruns': len(records),
+        'reruns_per_second': round(len(records) / wall, 2) if wall else 0.0,
+        'baseline_rss_mb': round((baseline_rss or 0) / 2**20, 1),
+        'peak_rss_mb': round(sampler.peak / 2**20, 1),
+        'pages': pages,
+        'actions': group(records, 'page', 'action'),
+        'errors': [{k: r[k] for k in ('session', 'page', 'action', 'error')} for r in errors] + failures,
+    }
+
+    print(f"\n{'page':<20} {'reruns':>7} {'p50':>8} {'p90':>8} {'p95':>8} {'p99':>8} {'max':>8} "
+          f"{'db ms':>8} {'db %':>6}", file=sys.stderr)
+    for name, s in pages.items():
+        print(f"{name:<20} {s['reruns']:>7} {s['p50_ms']:>8.0f} {s['p90_ms']:>8.0f} {s['p95_ms']:>8.0f} "
+              f"{s['p99_ms']:>8.0f} {s['max_ms']:>8.0f} {s['mean_db_ms']:>8.0f} {s['db_share']:>6.0%}",
+              file=sys.stderr)
+    print(f"\n{len(records):,} reruns in {wall:.1f}s ({results['reruns_per_second']:.1f}/s); RSS "
+          f"{results['baseline_rss_mb']:,.0f} MB before, {results['peak_rss_mb']:,.0f} MB peak", file=sys.stderr)
+    for error in results['errors'][:20]:
+        print(f"ERROR {error}", file=sys.stderr)
+
+    text = json.dumps(results, indent=1)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    slow = [name for name, s in pages.items() if args.max_p95_ms is not None and s['p95_ms'] > args.max_p95_ms]
+    for name in slow:
+        print(f"SLOW {name}: p95 {pages[name]['p95_ms']:,.0f} ms > {args.max_p95_ms:g} ms", file=sys.stderr)
+    return 1 if results['errors'] or slow else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,367 @@
+"""Seeded synthetic case generator for benchmarking FraudX at scale.
+
+Generates cases shaped like the real feed rather than uniform noise: a few
+case types and Harare/Bulawayo dominate, a share of locations is spelled
+with gazetteer aliases or not resolvable at all, reporting grows year on
+year, amounts have a lognormal body with a Pareto tail and are entered in
+the currency of their place and era, severity follows amount, and parties
+are drawn from a popularity-skewed pool so the entity graph has hubs. A
+small share of cases are near-copies of an earlier one.
+
+The same --seed and --chunk-rows always produce the same cases, so a
+smaller scale is a prefix of a larger one and an interrupted load resumes
+where it stopped. Cases go in through CASE_INSERT_SQL and
+after_cases_inserted(), one transaction per chunk exactly as an import
+would, so the rollup, USD amounts, geocodes, anomaly scores, duplicate
+index and entity graph are all populated. That upkeep is most of the cost:
+expect roughly half an hour for 1m and several hours for 10m.
+
+    python -m benchmarks.synthetic --rows 1m --db bench_1m.db
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+SCALES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000, '10m': 10_000_000}
+SYNTHETIC_USER = 'synthetic'
+CHUNK_ROWS = 50000
+# People and companies named as parties; popularity is Zipf-skewed, so the
+# same few hundred turn up across many cases at every scale
+PARTY_POOL_SIZE = 200_000
+
+# Share of all cases, most common first
+CASE_TYPE_WEIGHTS = {
+    'Public Sector Fraud': 0.22, 'Bank Fraud': 0.16, 'Procurement Fraud': 0.14, 'Cyber Fraud': 0.12,
+    'Corporate Fraud': 0.09, 'Money Laundering': 0.08, 'Insurance Fraud': 0.07, 'Tax Evasion': 0.05,
+    'Identity Theft': 0.04, 'Ponzi Scheme': 0.03,
+}
+# Typical loss relative to the overall median, by case type
+CASE_TYPE_SCALE = {
+    'Public Sector Fraud': 6.0, 'Bank Fraud': 1.5, 'Procurement Fraud': 4.0, 'Cyber Fraud': 0.3,
+    'Corporate Fraud': 3.0, 'Money Laundering': 8.0, 'Insurance Fraud': 0.6, 'Tax Evasion': 2.5,
+    'Identity Theft': 0.1, 'Ponzi Scheme': 5.0,
+}
+CASE_TYPE_WORDS = {
+    'Public Sector Fraud': ['council', 'minister', 'ghost', 'workers', 'payroll', 'land', 'allocation'],
+    'Bank Fraud': ['bank', 'loan', 'teller', 'account', 'cheque', 'overdraft', 'transfer'],
+    'Procurement Fraud': ['tender', 'contract', 'inflated', 'invoice', 'supplier', 'kickback'],
+    'Cyber Fraud': ['phishing', 'mobile', 'money', 'sim', 'swap', 'hacked', 'online'],
+    'Corporate Fraud': ['director', 'accounts', 'shareholders', 'audit', 'misstated', 'shell'],
+    'Money Laundering': ['offshore', 'laundering', 'gold', 'smuggling', 'cash', 'property'],
+    'Insurance Fraud': ['insurance', 'claim', 'forged', 'vehicle', 'accident', 'funeral'],
+    'Tax Evasion': ['customs', 'duty', 'rebate', 'import', 'undeclared', 'zimra'],
+    'Identity Theft': ['identity', 'forged', 'documents', 'passport', 'impersonation'],
+    'Ponzi Scheme': ['investors', 'returns', 'scheme', 'pyramid', 'deposits', 'promised'],
+}
+COMMON_WORDS = ['funds', 'payment', 'officials', 'company', 'accused', 'millions', 'diverted', 'fake',
+                'records', 'investigation', 'arrested', 'court', 'money', 'public', 'scheme', 'bribe']
+# Free-text filler, drawn uniformly so two unrelated narratives share little
+NARRATIVE_WORDS = sorted({w for words in CASE_TYPE_WORDS.values() for w in words} | set(COMMON_WORDS) | {
+    'allegedly', 'between', 'auditors', 'discovered', 'irregular', 'transactions', 'ledger', 'receipts',
+    'vouchers', 'approved', 'without', 'authority', 'beneficiaries', 'relatives', 'proxy', 'accounts',
+    'withdrawn', 'over', 'counter', 'several', 'months', 'whistleblower', 'reported', 'suspended',
+    'pending', 'hearing', 'bail', 'remanded', 'recovered', 'assets', 'seized', 'vehicles', 'houses',
+    'farm', 'equipment', 'tenders', 'awarded', 'unregistered', 'suppliers', 'goods', 'never', 'delivered',
+    'inflated', 'prices', 'quotations', 'signed', 'backdated', 'minutes', 'board', 'resolution',
+    'treasury', 'grant', 'donor', 'project', 'clinic', 'borehole', 'road', 'rehabilitation', 'bursary',
+    'students', 'pensioners', 'farmers', 'traders', 'vendors', 'licences', 'permits', 'stands', 'title',
+    'deeds', 'cooperative', 'savings', 'club', 'agents', 'ecocash', 'swipe', 'machines', 'forex',
+    'parallel', 'market', 'rate', 'exchange', 'proceeds', 'cross', 'border', 'trucks', 'warehouse'})
+NARRATIVE_TEMPLATES = [
+    "{who} allegedly diverted {amount} from {org} in {place} between {start} and {end}.",
+    "Auditors at {org} flagged {amount} in irregular payments approved by {who} in {start}.",
+    "{count} victims in {place} say they lost {amount} to {who}, trading as {org}.",
+    "{who} is accused of inflating invoices to {org} by {amount} from {start} to {end}.",
+    "Ghost workers on the {org} payroll in {place} drew {amount} until {end}, according to {who}.",
+    "{org} reported {count} suspicious transfers totalling {amount} linked to {who}.",
+]
+MONTHS = ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September',
+          'October', 'November', 'December']
+SURNAMES = ['Moyo', 'Ncube', 'Dube', 'Sibanda', 'Chikore', 'Mutasa', 'Banda', 'Phiri', 'Mpofu', 'Nyathi',
+            'Chirwa', 'Maphosa', 'Ndlovu', 'Gumbo', 'Mapfumo', 'Zhou', 'Tshuma', 'Marufu', 'Chinamasa',
+            'Mhlanga', 'Zulu', 'Khumalo', 'Makoni', 'Gono', 'Mugabe', 'Tsvangirai', 'Chamisa', 'Mliswa']
+COMPANY_WORDS = ['Gold', 'Star', 'Delta', 'Sable', 'Zambezi', 'Kariba', 'Granite', 'Unity', 'Mhofu',
+                 'Eagle', 'Baobab', 'Summit', 'Pioneer', 'Heritage', 'Savanna', 'Limpopo']
+COMPANY_SUFFIXES = ['Holdings (Pvt) Ltd', 'Investments', 'Trading', 'Mining', 'Logistics', 'Construction']
+AGENCY_WEIGHTS = {'ZRP Commercial Crimes': 0.35, 'ZACC': 0.25, 'FIU': 0.1, 'ZIMRA': 0.1, 'NPA': 0.08,
+                  'Auditor General': 0.05, 'Internal Audit': 0.05, 'RBZ': 0.02}
+# Spellings that no gazetteer entry or alias matches
+UNRESOLVED_LOCATIONS = ['Unknown', 'Rural district', 'Various', 'Online', 'Ward 12']
+# Where a location's own currency applies outside Zimbabwe
+COUNTRY_CURRENCY = {'South Africa': 'ZAR', 'Botswana': 'BWP', 'Namibia': 'NAD', 'Eswatini': 'SZL',
+                    'Kenya': 'KES', 'Zambia': 'USD', 'Mozambique': 'USD', 'Malawi': 'USD'}
+FIRST_YEAR, LAST_YEAR = 2000, 2024
+REPORT_GROWTH = 1.08        # cases reported per year grow ~8% a year
+RESOLVED_BY = np.datetime64('2025-06-30')
+
+
+def parse_rows(value):
+    # "100k", "1m" or a plain number
+    return SCALES.get(value.lower()) or int(value.replace('_', '').replace(',', ''))
+
+
+def _weighted(weights):
+    names = list(weights)
+    p = np.array([weights[n] for n in names], dtype=float)
+    return names, p / p.sum()
+
+
+def location_spellings(F):
+    # Zipf over the gazetteer's own order (major cities first), with about a
+    # tenth of cases using an alias and a few lower-cased or unresolvable
+    spellings, countries, weights = [], [], []
+    for rank, (name, country, kind, _, _, aliases) in enumerate(F.GAZETTEER_SEED, start=1):
+        share = 1.0 / rank ** 1.1
+        spellings.append(name)
+        countries.append(country)
+        weights.append(share * (0.88 if aliases else 0.97))
+        spellings.append(name.lower())
+        countries.append(country)
+        weights.append(share * 0.02)
+        for alias in aliases:
+            spellings.append(alias)
+            countries.append(country)
+            weights.append(share * 0.1 / len(aliases))
+    for name in UNRESOLVED_LOCATIONS:
+        spellings.append(name)
+        countries.append('Zimbabwe')
+        weights.append(0.003)
+    p = np.array(weights)
+    return np.array(spellings, dtype=object), np.array(countries, dtype=object), p / p.sum()
+
+
+def fx_lookup(F):
+    # currency -> (rate dates, units per USD), for entering amounts locally
+    table = {}
+    for currency, rate_date, rate in sorted(F.FX_SEED_RATES):
+        dates, rates = table.setdefault(currency, ([], []))
+        dates.append(np.datetime64(rate_date))
+        rates.append(rate)
+    return {c: (np.array(d, dtype='datetime64[D]'), np.array(r)) for c, (d, r) in table.items()}
+
+
+def _units_per_usd(fx, currencies, dates):
+    rates = np.ones(len(currencies))
+    for currency, (rate_dates, values) in fx.items():
+        mask = currencies == currency
+        if mask.any():
+            at = np.searchsorted(rate_dates, dates[mask], side='right') - 1
+            rates[mask] = values[np.clip(at, 0, len(values) - 1)]
+    return rates
+
+
+def _iso(dates, mask=None):
+    text = np.datetime_as_string(dates, unit='D').astype(object)
+    if mask is not None:
+        text[mask] = None
+    return text
+
+
+def party_pool(rng_seed, size=PARTY_POOL_SIZE):
+    rng = np.random.default_rng([rng_seed, 0xC0FFEE])
+    initials = rng.choice(list('ABCDEFGHJKLMNPRSTW'), size)
+    surnames = rng.choice(SURNAMES, size)
+    people = [f"{i}. {s}" for i, s in zip(initials, surnames)]
+    companies = [f"{a} {b} {c}" for a, b, c in zip(rng.choice(COMPANY_WORDS, size // 4),
+                                                      rng.choice(COMPANY_WORDS, size // 4),
+                                                      rng.choice(COMPANY_SUFFIXES, size // 4))]
+    pool = np.array(list(dict.fromkeys(people + companies)), dtype=object)
+    rng.shuffle(pool)
+    # A few parties turn up in many cases, most in one or two
+    p = 1.0 / np.arange(1, len(pool) + 1) ** 0.9
+    return pool, p / p.sum()
+
+
+class SyntheticCases:
+    """Deterministic source of synthetic case rows in CASE_INSERT_COLUMNS order."""
+
+    def __init__(self, F, seed=42, chunk_rows=CHUNK_ROWS):
+        self.seed = seed
+        self.chunk_rows = chunk_rows
+        self.types, self.type_p = _weighted(CASE_TYPE_WEIGHTS)
+        self.type_scale = np.array([CASE_TYPE_SCALE[t] for t in self.types])
+        self.type_words = [np.array(CASE_TYPE_WORDS[t] + COMMON_WORDS, dtype=object) for t in self.types]
+        self.locations, self.countries, self.location_p = location_spellings(F)
+        self.agencies, self.agency_p = _weighted(AGENCY_WEIGHTS)
+        self.fx = fx_lookup(F)
+        self.severities = np.array(F.SEVERITY_LEVELS, dtype=object)
+        self.parties, self.party_p = party_pool(seed)
+        years = np.arange(FIRST_YEAR, LAST_YEAR + 1)
+        self.years = years
+        year_p = REPORT_GROWTH ** (years - FIRST_YEAR)
+        self.year_p = year_p / year_p.sum()
+
+    def chunk(self, index):
+        # Rows for chunk `index`; each chunk has its own generator so any one
+        # can be rebuilt without the ones before it
+        rng = np.random.default_rng([self.seed, index])
+        n = self.chunk_rows
+        first_no = index * n
+
+        type_idx = rng.choice(len(self.types), n, p=self.type_p)
+        loc_idx = rng.choice(len(self.locations), n, p=self.location_p)
+        locations = self.locations[loc_idx]
+        countries = self.countries[loc_idx]
+
+        years = rng.choice(self.years, n, p=self.year_p)
+        detected = (years - 1970).astype('datetime64[Y]').astype('datetime64[D]') + rng.integers(0, 365, n)
+        reported = detected + np.minimum(rng.exponential(45, n), 900).astype(int)
+        resolved = reported + (rng.lognormal(6.2, 0.7, n)).astype(int)
+        no_resolution = (rng.random(n) > 0.4) | (resolved > RESOLVED_BY)
+        no_detection = rng.random(n) < 0.03
+
+        # Loss in USD: lognormal body, Pareto tail for the big scandals
+        usd = rng.lognormal(9.5, 1.8, n) * self.type_scale[type_idx]
+        tail = rng.random(n) < 0.02
+        usd[tail] = np.minimum((rng.pareto(1.2, tail.sum()) + 1) * 1e6, 5e9)
+
+        currencies = self._currencies(rng, countries, years)
+        amounts = np.round(usd * _units_per_usd(self.fx, currencies, detected), 2).astype(object)
+        amount_roll = rng.random(n)
+        amounts[amount_roll < 0.05] = None
+        amounts[(amount_roll >= 0.05) & (amount_roll < 0.06)] = 0.0
+
+        # Severity follows the size of the loss, with some disagreement
+        level = np.digitize(np.log10(usd), [4.0, 5.5, 7.0])
+        noise = rng.random(n) < 0.15
+        level[noise] = rng.integers(0, len(self.severities), noise.sum())
+        severities = self.severities[level]
+
+        parties = self._parties(rng, n)
+        descriptions = self._descriptions(rng, type_idx, parties, locations, usd, detected, reported)
+        court_refs = np.full(n, None, dtype=object)
+        in_court = rng.random(n) < 0.3
+        refs = rng.integers(1, 9999, in_court.sum())
+        court_refs[in_court] = [f"HC {r}/{y % 100:02d}" for r, y in zip(refs, years[in_court])]
+        agencies = rng.choice(self.agencies, n, p=self.agency_p)
+        names = [f"{self.types[t]} in {loc} ({first_no + i + 1:07d})"
+                 for i, (t, loc) in enumerate(zip(type_idx, locations))]
+
+        # Near-duplicates: the same story filed again, one word different
+        copies = np.flatnonzero(rng.random(n) < 0.02)
+        copies = copies[copies > 0]
+        originals = rng.integers(0, copies, len(copies)) if len(copies) else copies
+        for row, original in zip(copies, originals):
+            words = descriptions[original].split()
+            words[rng.integers(len(words))] = rng.choice(COMMON_WORDS)
+            descriptions[row] = ' '.join(words)
+            parties[row] = parties[original]
+            type_idx[row] = type_idx[original]
+            locations[row] = locations[original]
+
+        types = np.array(self.types, dtype=object)[type_idx]
+        return list(zip(names, types, descriptions, locations, amounts, currencies,
+                        _iso(detected, no_detection), _iso(reported), _iso(resolved, no_resolution),
+                        parties, agencies, court_refs, [None] * n, [SYNTHETIC_USER] * n, severities))
+
+    def _currencies(self, rng, countries, years):
+        n = len(years)
+        roll = rng.random(n)
+        # Zimbabwe by era: Zimbabwe dollars, then dollarisation, then RTGS/ZWL
+        currencies = np.where(years < 2009, np.where(roll < 0.5, 'ZWL', np.where(roll < 0.9, 'USD', 'ZAR')),
+                              np.where(years < 2019, np.where(roll < 0.85, 'USD', np.where(roll < 0.95, 'ZAR', 'BWP')),
+                                       np.where(roll < 0.55, 'USD', np.where(roll < 0.95, 'ZWL', 'ZAR'))))
+        currencies = currencies.astype(object)
+        for country, currency in COUNTRY_CURRENCY.items():
+            local = (countries == country) & (rng.random(n) < 0.7)
+            currencies[local] = currency
+        return currencies
+
+    def _parties(self, rng, n):
+        counts = rng.integers(1, 5, n)
+        picks = self.parties[rng.choice(len(self.parties), counts.sum(), p=self.party_p)]
+        ends = np.cumsum(counts)
+        return np.array([', '.join(picks[end - k:end]) for k, end in zip(counts, ends)], dtype=object)
+
+    def _descriptions(self, rng, type_idx, parties, locations, usd, detected, reported):
+        # One templated sentence with the case's own particulars, a few topic
+        # words for its type, then free text
+        n = len(type_idx)
+        templates = rng.integers(len(NARRATIVE_TEMPLATES), size=n)
+        orgs = self.parties[rng.choice(len(self.parties), n, p=self.party_p)]
+        counts = rng.integers(2, 400, n)
+        topic = rng.integers(0, 1 << 16, (n, 3))
+        filler = rng.choice(NARRATIVE_WORDS, (n, 30))
+        lengths = rng.integers(8, 31, n)
+        detected = detected.astype(object)
+        reported = reported.astype(object)
+        out = np.empty(n, dtype=object)
+        for row in range(n):
+            words = self.type_words[type_idx[row]]
+            start, end = detected[row], reported[row]
+            sentence = NARRATIVE_TEMPLATES[templates[row]].format(
+                who=parties[row].split(', ')[0], org=orgs[row], place=locations[row], count=counts[row],
+                amount=f"US${usd[row]:,.0f}", start=f"{MONTHS[start.month - 1]} {start.year}",
+                end=f"{MONTHS[end.month - 1]} {end.year}")
+            tail = ' '.join([words[i % len(words)] for i in topic[row]] + list(filler[row, :lengths[row]]))
+            out[row] = f"{sentence} {tail.capitalize()}."
+        return out
+
+
+def populate(F, rows, seed=42, chunk_rows=CHUNK_ROWS, progress=None):
+    """Tops the open database up to `rows` synthetic cases.
+
+    Returns (synthetic cases, seconds spent inserting or None if nothing
+    was added). `progress` is called with the synthetic case count after
+    each chunk.
+    """
+    source = SyntheticCases(F, seed, chunk_rows)
+    with F.db_connection() as conn:
+        have = conn.execute("SELECT COUNT(*) FROM cases WHERE created_by = ?", (SYNTHETIC_USER,)).fetchone()[0]
+        if have >= rows:
+            return have, None
+        started = time.perf_counter()
+        while have < rows:
+            index, skip = divmod(have, chunk_rows)
+            chunk = source.chunk(index)[skip:skip + rows - have]
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                first_id = conn.execute("SELECT COALESCE(MAX(case_id), 0) + 1 FROM cases").fetchone()[0]
+                conn.executemany(F.CASE_INSERT_SQL, chunk)
+                F.after_cases_inserted(conn, first_id, first_id + len(chunk) - 1)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            have += len(chunk)
+            if progress is not None:
+                progress(have)
+        conn.execute("INSERT INTO cases_fts (cases_fts) VALUES ('optimize')")
+        conn.execute("ANALYZE")
+        conn.commit()
+        return have, time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=parse_rows, default=SCALES['100k'],
+                        help="cases to generate: 10k, 100k, 1m, 10m or a number")
+    parser.add_argument('--db', default='bench_synthetic.db')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    args = parser.parse_args(argv)
+
+    # FraudX reads its database path at import time.
+    os.environ['FRAUDX_DB'] = args.db
+    import FraudX as F
+
+    F.init_db()
+    started = time.perf_counter()
+
+    def report(have):
+        elapsed = time.perf_counter() - started
+        print(f"\r{have:,} / {args.rows:,} cases ({elapsed:.0f}s)", end='', flush=True)
+
+    total, seconds = populate(F, args.rows, args.seed, args.chunk_rows, progress=report)
+    if seconds is None:
+        print(f"{args.db} already holds {total:,} synthetic cases")
+    else:
+        print(f"\n{total:,} synthetic cases in {args.db}: {seconds:.1f}s ({total / seconds:,.0f} rows/s)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,164 @@
+"""Command-line maintenance tasks for the FraudX database.
+
+    python fraudx_cli.py rebuild-rollups
+    python fraudx_cli.py verify-rollups
+    python fraudx_cli.py import-cases cases.csv --rejects rejects.csv
+    python fraudx_cli.py rescore-anomalies
+    python fraudx_cli.py load-fx-rates rates.csv
+    python fraudx_cli.py load-gazetteer locations.csv
+    python fraudx_cli.py slow-queries
+    python fraudx_cli.py --db other.db rebuild-rollups
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+
+def cmd_rebuild_rollups(F, args):
+    buckets = F.rebuild_rollups()
+    print(f"Rebuilt case_rollup: {buckets:,} buckets")
+    return cmd_verify_rollups(F, args)
+
+
+def cmd_verify_rollups(F, args):
+    mismatches = F.verify_rollups()
+    if mismatches.empty:
+        print("case_rollup is consistent with cases")
+        return 0
+    print(f"case_rollup has {len(mismatches):,} inconsistent buckets:")
+    print(mismatches.head(50).to_string(index=False))
+    return 1
+
+
+def cmd_rescore_anomalies(F, args):
+    started = time.perf_counter()
+    flagged = F.rebuild_anomaly_scores()
+    print(f"Rescored all cases in {time.perf_counter() - started:.1f}s: {flagged:,} flagged")
+    return 0
+
+
+def cmd_load_fx_rates(F, args):
+    started = time.perf_counter()
+    try:
+        with open(args.path, 'rb') as source:
+            result = F.load_fx_rates(source, label=os.path.basename(args.path))
+    except ValueError as e:
+        print(f"Rates not loaded: {e}")
+        return 1
+    print(f"Loaded {result['rates']:,} rates for {', '.join(result['currencies'])} in "
+          f"{time.perf_counter() - started:.1f}s: {result['cases_converted']:,} case amounts changed")
+    return 0
+
+
+def cmd_load_gazetteer(F, args):
+    started = time.perf_counter()
+    try:
+        with open(args.path, 'rb') as source:
+            result = F.load_gazetteer(source)
+    except ValueError as e:
+        print(f"Gazetteer not loaded: {e}")
+        return 1
+    print(f"Loaded {result['locations']:,} locations and {result['aliases']:,} aliases in "
+          f"{time.perf_counter() - started:.1f}s; re-resolved {result['spellings']:,} location spellings")
+    _, unresolved = F.get_location_points()
+    if not unresolved.empty:
+        print(f"{len(unresolved):,} spellings are still unresolved:")
+        print(unresolved.head(50).to_string(index=False))
+    return 0
+
+
+def cmd_import_cases(F, args):
+    started = time.perf_counter()
+    with open(args.path, 'rb') as source:
+        result = F.import_cases(source, args.path, args.user, dry_run=args.dry_run, chunk_rows=args.chunk_size)
+    elapsed = time.perf_counter() - started
+    verb = "Validated" if args.dry_run else "Imported"
+    print(f"{verb} {result['valid']:,} of {result['rows']:,} rows in {elapsed:.2f}s "
+          f"({result['rejected']:,} rejected)")
+    duplicates = result['duplicates']
+    if duplicates is not None and not duplicates.empty:
+        print(f"{duplicates['case_id'].nunique():,} imported cases look like duplicates of existing ones:")
+        print(duplicates.head(50).to_string(index=False))
+    if result['rejected']:
+        if args.rejects:
+            result['rejects'].to_csv(args.rejects, index=False)
+            print(f"Rejected rows written to {args.rejects}")
+        else:
+            print(result['rejects'].head(50).to_string(index=False))
+    return 1 if result['rejected'] else 0
+
+
+def cmd_slow_queries(F, args):
+    report = F.slow_query_report(args.limit)
+    if report.empty:
+        print(f"No statements over {F.SLOW_QUERY_MS:g} ms have been logged")
+        return 0
+    print(f"{len(report):,} slow statements (over {F.SLOW_QUERY_MS:g} ms), slowest first:")
+    print(report[['calls', 'max_ms', 'mean_rows', 'full_scans', 'statement']].round(1)
+          .to_string(index=False, max_colwidth=100))
+    fixable = report[report['suggested_index'].notna()]
+    if fixable.empty:
+        return 0
+    print(f"\n{len(fixable):,} full table scans an index would fix:")
+    for row in fixable.itertuples(index=False):
+        print(f"  -- {row.statement[:100]}")
+        print(f"  {row.suggested_index.replace('; ', ';' + chr(10) + '  ')};")
+    return 1
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', help="database path (default: $FRAUDX_DB or fraudcases.db)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    rebuild = commands.add_parser('rebuild-rollups', help="recompute case_rollup from scratch and verify it")
+    rebuild.set_defaults(func=cmd_rebuild_rollups)
+
+    verify = commands.add_parser('verify-rollups', help="check case_rollup against the cases table")
+    verify.set_defaults(func=cmd_verify_rollups)
+
+    rescore = commands.add_parser('rescore-anomalies', help="recompute every case's anomaly score")
+    rescore.set_defaults(func=cmd_rescore_anomalies)
+
+    rates = commands.add_parser('load-fx-rates', help="add or correct FX rates and reconvert case amounts")
+    rates.add_argument('path', help="CSV with currency, rate_date and units_per_usd columns")
+    rates.set_defaults(func=cmd_load_fx_rates)
+
+    gazetteer = commands.add_parser('load-gazetteer', help="add or correct map locations and their aliases")
+    gazetteer.add_argument('path', help="CSV with name, lat, lon and optional country, kind and aliases (a|b) columns")
+    gazetteer.set_defaults(func=cmd_load_gazetteer)
+
+    load = commands.add_parser('import-cases', help="bulk load cases from a CSV or Excel file")
+    load.add_argument('path', help="CSV or .xlsx file with one case per row")
+    load.add_argument('--user', default='bulk-import', help="created_by for rows that do not set it")
+    load.add_argument('--dry-run', action='store_true', help="validate only, write nothing")
+    load.add_argument('--rejects', help="write rejected rows and reasons to this CSV")
+    load.add_argument('--chunk-size', type=int, default=5000, help="rows per insert batch")
+    load.set_defaults(func=cmd_import_cases)
+
+    slow = commands.add_parser('slow-queries',
+                               help="report logged slow statements; exits 1 if an index would fix a full scan")
+    slow.add_argument('--limit', type=int, default=50, help="statements to report, slowest first")
+    slow.set_defaults(func=cmd_slow_queries)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    # FraudX reads its database path at import time.
+    if args.db:
+        os.environ['FRAUDX_DB'] = args.db
+    import FraudX as F
+    logging.getLogger('streamlit').setLevel(logging.ERROR)
+
+    F.init_db()
+    status = args.func(F, args)
+    # Slow statements are written by a background thread; let it catch up
+    F.get_slow_query_log(F.DB_PATH).flush()
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())